@@ -0,0 +1,116 @@
+"""
+Metadata ingestion throughput of the Celery tasks.
+
+    python -m benchmarks.bench_ingest [messages] [records] [latency_ms]
+
+Sends `messages` (default 50) SNS-wrapped S3 events of `records` uploads each (default
+10) through Celery's in-memory broker to a worker started in this process, with moto
+standing in for S3 and DynamoDB and `latency_ms` (default 25) added to every AWS call.
+
+- legacy: the previous task, one message per task with a new S3 client per call, one
+  HEAD and one PutItem, and only the first record of each message
+- batched: process_sqs_messages, with concurrent HEADs and one batch_writer per task
+"""
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+
+# Keep boto3 away from real credentials and Redis
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ['CELERY_BROKER_URL'] = 'memory://'
+
+import boto3
+from celery.contrib.testing.worker import start_worker
+from moto import mock_aws
+
+BUCKET = 'image-upload-bench'
+LATENCY_MS = float(sys.argv[3]) if len(sys.argv) > 3 else 25.0
+
+
+def delay(**kwargs):
+    time.sleep(LATENCY_MS / 1000)
+
+
+# Registered on the default session, so clients created later (per call, in the legacy task) are delayed too
+boto3.setup_default_session()
+boto3.DEFAULT_SESSION.events.register('before-call.*.*', delay)
+
+import tasks
+
+tasks.celery_app.conf.result_backend = 'cache+memory://'
+
+
+@tasks.celery_app.task
+def legacy_process_sqs_message(message_body: dict):
+    s3_event = tasks.s3_records(message_body)[0]
+    s3_client = boto3.client('s3', region_name=tasks.AWS_REGION)
+    s3_object = s3_client.head_object(Bucket=s3_event['bucket']['name'], Key=s3_event['object']['key'])
+    tasks.table.put_item(Item={
+        'ImageId': str(uuid.uuid4()),
+        'FileName': s3_event['object']['key'],
+        'Bucket': s3_event['bucket']['name'],
+        'UploadTime': datetime.utcnow().isoformat(),
+        'ContentType': s3_object['ContentType'],
+        'Size': s3_object['ContentLength'],
+    })
+
+
+def sns_message(keys) -> dict:
+    """SQS body of an S3 event delivered through SNS"""
+    s3_event = {'Records': [{'s3': {'bucket': {'name': BUCKET}, 'object': {'key': key}}} for key in keys]}
+    return {'Type': 'Notification', 'Message': json.dumps(s3_event)}
+
+
+def stored_items() -> int:
+    return tasks.table.scan(Select='COUNT')['Count']
+
+
+def run(label, send, concurrency, prefetch, records):
+    tasks.celery_app.conf.worker_prefetch_multiplier = prefetch
+    before = stored_items()
+    with start_worker(tasks.celery_app, pool='threads', concurrency=concurrency, perform_ping_check=False):
+        start = time.perf_counter()
+        for result in send():
+            result.get(timeout=600)
+        elapsed = time.perf_counter() - start
+    stored = stored_items() - before
+    print(f"{label:<34} images={stored:<5} of {records:<5} {elapsed * 1000:9.0f}ms {stored / elapsed:8.1f} images/s")
+
+
+def main(messages=50, records=10):
+    with mock_aws():
+        s3 = boto3.client('s3')
+        s3.create_bucket(Bucket=BUCKET)
+        boto3.client('dynamodb').create_table(
+            TableName=tasks.table.name,
+            BillingMode='PAY_PER_REQUEST',
+            AttributeDefinitions=[{'AttributeName': 'ImageId', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': 'ImageId', 'KeyType': 'HASH'}],
+        )
+        keys = [f'uploads/image-{n}.jpg' for n in range(messages * records)]
+        for key in keys:
+            s3.put_object(Bucket=BUCKET, Key=key, Body=b'x' * 1024, ContentType='image/jpeg')
+        bodies = [sns_message(keys[n * records:(n + 1) * records]) for n in range(messages)]
+        total = messages * records
+
+        # Celery's defaults: prefork with one process per CPU, prefetch 4 (run as threads here)
+        run('legacy, concurrency=cpus', lambda: [legacy_process_sqs_message.delay(body) for body in bodies],
+            os.cpu_count() or 1, 4, total)
+        run('legacy, concurrency=32', lambda: [legacy_process_sqs_message.delay(body) for body in bodies], 32, 1, total)
+        run('batched, one message per task', lambda: [tasks.process_sqs_messages.delay([body]) for body in bodies],
+            32, 1, total)
+        run('batched, 10 messages per task',
+            lambda: [tasks.process_sqs_messages.delay(bodies[n:n + 10]) for n in range(0, len(bodies), 10)],
+            32, 1, total)
+
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    )
@@ -1,10 +1,12 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional
-from datetime import datetime
+from typing import List
 import boto3
 import os
 
+# SQS messages are processed by the Celery tasks in tasks.py
+from tasks import process_sqs_messages
+
 # Initialize FastAPI app
 app = FastAPI()
 
@@ -41,38 +43,9 @@ async def get_image_details(image_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# Celery worker (simplified for demonstration)
-# In a real application, Celery would run as a separate process
-# and consume messages from SQS.
-
-# This function would be called by a Celery task
-def process_sqs_message(message_body: dict):
-    try:
-        # Extract metadata from SQS message (example structure)
-        s3_event = message_body.get('Records')[0].get('s3')
-        bucket_name = s3_event.get('bucket').get('name')
-        object_key = s3_event.get('object').get('key')
-
-        # Get object details from S3 (optional, but good for comprehensive metadata)
-        s3_client = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
-        s3_object = s3_client.head_object(Bucket=bucket_name, Key=object_key)
-
-        metadata = {
-            'ImageId': str(uuid.uuid4()), # Generate a unique ID for DynamoDB
-            'FileName': object_key,
-            'Bucket': bucket_name,
-            'UploadTime': datetime.utcnow().isoformat(),
-            'ContentType': s3_object['ContentType'],
-            'Size': s3_object['ContentLength'],
-        }
-
-        table.put_item(Item=metadata)
-        print(f"Successfully processed and stored metadata for {object_key}")
-    except Exception as e:
-        print(f"Error processing SQS message: {e}")
-
 # Example of how to manually trigger processing (for testing without SQS/Celery setup)
+# A plain def runs in the threadpool, as the task's S3 and DynamoDB calls block
 @app.post("/process-image-manual")
-async def manual_process_image(message: dict):
-    process_sqs_message(message)
+def manual_process_image(message: dict):
+    process_sqs_messages([message])
     return {"message": "Manual processing initiated"}
@@ -1,39 +1,134 @@
 from celery import Celery
 import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from concurrent.futures import ThreadPoolExecutor
+import json
 import os
 from datetime import datetime
+from urllib.parse import unquote_plus
 import uuid
 
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+
+# HEAD requests in flight at once per worker process, shared by all its tasks
+HEAD_CONCURRENCY = int(os.environ.get('HEAD_CONCURRENCY', '16'))
+
+# Records whose HEAD request failed for a reason other than a missing or forbidden object
+# (throttling, 5xx, network) are retried this many times, after 2, 4, 8... seconds
+MAX_RETRIES = int(os.environ.get('MAX_RETRIES', '5'))
+RETRY_DELAY = int(os.environ.get('RETRY_DELAY', '2'))
+
+# Error codes of objects that retrying will not make readable: deleted since the event, or not ours
+SKIPPED_ERROR_CODES = ('404', 'NoSuchKey', '403', 'AccessDenied')
+
 # Initialize Celery app
 celery_app = Celery('tasks', broker=os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0'))
 
-# Initialize AWS clients
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+# Tasks spend their time waiting on S3 and DynamoDB, so one process runs many of them on
+# threads. A low prefetch keeps a busy worker from holding messages an idle one could take,
+# and late acks hand the messages of a worker that dies to another one.
+celery_app.conf.update(
+    worker_pool=os.environ.get('CELERY_POOL', 'threads'),
+    worker_concurrency=int(os.environ.get('CELERY_CONCURRENCY', '32')),
+    worker_prefetch_multiplier=int(os.environ.get('CELERY_PREFETCH_MULTIPLIER', '1')),
+    task_acks_late=True,
+)
+
+# Initialize AWS clients once per process; clients are thread-safe and keep their connections
+s3_client = boto3.client('s3', region_name=AWS_REGION, config=Config(max_pool_connections=HEAD_CONCURRENCY))
+dynamodb = boto3.resource('dynamodb', region_name=AWS_REGION)
 table = dynamodb.Table(os.environ.get('DYNAMODB_TABLE_NAME', 'ImageMetadata'))
 
-@celery_app.task
-def process_sqs_message(message_body: dict):
-    try:
-        # Extract metadata from SQS message (example structure)
-        s3_event = message_body.get('Records')[0].get('s3')
-        bucket_name = s3_event.get('bucket').get('name')
-        object_key = s3_event.get('object').get('key')
+# Threads start on first use, so a prefork child creates its own
+head_pool = ThreadPoolExecutor(max_workers=HEAD_CONCURRENCY)
 
-        # Get object details from S3 (optional, but good for comprehensive metadata)
-        s3_client = boto3.client('s3', region_name=os.environ.get('AWS_REGION', 'us-east-1'))
+
+def s3_records(message_body) -> list:
+    """S3 records of an SQS message body: an S3 event, or the SNS notification wrapping one"""
+    if isinstance(message_body, str):
+        message_body = json.loads(message_body)
+    if message_body.get('Type') == 'Notification' and 'Message' in message_body:
+        message_body = json.loads(message_body['Message'])
+    return [record['s3'] for record in message_body.get('Records', []) if 's3' in record]
+
+
+def image_metadata(s3_event: dict):
+    """Metadata item for one S3 record, or None if its object is missing or forbidden.
+
+    Other errors, which a retry may fix, are raised.
+    """
+    bucket_name = s3_event['bucket']['name']
+    # Keys arrive URL-encoded in S3 events
+    object_key = unquote_plus(s3_event['object']['key'])
+    try:
         s3_object = s3_client.head_object(Bucket=bucket_name, Key=object_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] not in SKIPPED_ERROR_CODES:
+            raise
+        print(f"Skipping s3://{bucket_name}/{object_key}: {e}")
+        return None
+    return {
+        'ImageId': str(uuid.uuid4()), # Generate a unique ID for DynamoDB
+        'FileName': object_key,
+        'Bucket': bucket_name,
+        'UploadTime': datetime.utcnow().isoformat(),
+        'ContentType': s3_object['ContentType'],
+        'Size': s3_object['ContentLength'],
+    }
+
+
+def read_metadata(s3_event: dict):
+    """(metadata item or None, error) for one S3 record; the error is one a retry may fix.
+
+    A malformed record is logged and skipped, so it cannot fail the rest of the batch.
+    """
+    try:
+        return image_metadata(s3_event), None
+    except (ClientError, BotoCoreError) as e:
+        return None, e
+    except (KeyError, TypeError, AttributeError) as e:
+        print(f"Skipping malformed S3 record {s3_event!r}: {e!r}")
+        return None, None
+
+
+def store_metadata(task, message_bodies: list, retry_args):
+    """Store metadata for every S3 record in a batch of SQS messages.
+
+    The records' HEAD requests run concurrently on head_pool, and the items are written
+    with BatchWriteItem (25 per call, unprocessed items sent again). Records whose HEAD
+    request failed are then retried by `task`, with `retry_args` making one message body
+    of them, so the stored items are not written twice.
+    """
+    s3_events = []
+    for message_body in message_bodies:
+        try:
+            s3_events.extend(s3_records(message_body))
+        except (ValueError, AttributeError, TypeError, KeyError) as e:
+            print(f"Error reading SQS message: {e!r}")
+
+    results = list(head_pool.map(read_metadata, s3_events))
+    items = [item for item, _ in results if item]
+    with table.batch_writer() as batch:
+        for item in items:
+            batch.put_item(Item=item)
+    print(f"Successfully stored metadata for {len(items)} of {len(s3_events)} images")
+
+    failed = [(s3_event, error) for s3_event, (_, error) in zip(s3_events, results) if error]
+    if failed:
+        print(f"Retrying {len(failed)} images: {failed[-1][1]}")
+        retry_body = {'Records': [{'s3': s3_event} for s3_event, _ in failed]}
+        raise task.retry(args=retry_args(retry_body), exc=failed[-1][1], countdown=RETRY_DELAY * 2 ** task.request.retries)
+    return {'records': len(s3_events), 'stored': len(items)}
+
 
-        metadata = {
-            'ImageId': str(uuid.uuid4()), # Generate a unique ID for DynamoDB
-            'FileName': object_key,
-            'Bucket': bucket_name,
-            'UploadTime': datetime.utcnow().isoformat(),
-            'ContentType': s3_object['ContentType'],
-            'Size': s3_object['ContentLength'],
-        }
+@celery_app.task(bind=True, max_retries=MAX_RETRIES)
+def process_sqs_messages(self, message_bodies: list):
+    """Store metadata for every S3 record in a batch of SQS messages (see store_metadata)"""
+    return store_metadata(self, message_bodies, lambda retry_body: [[retry_body]])
 
-        table.put_item(Item=metadata)
-        print(f"Successfully processed and stored metadata for {object_key}")
-    except Exception as e:
-        print(f"Error processing SQS message: {e}")
 
+@celery_app.task(bind=True, max_retries=MAX_RETRIES)
+def process_sqs_message(self, message_body: dict):
+    """A single SQS message, for producers that still send one message per task"""
+    return store_metadata(self, [message_body], lambda retry_body: [retry_body])
@@ -65,9 +65,18 @@ resource "aws_iam_role_policy" "processing_service_policy" {
 				Action = [
 					"dynamodb:PutItem",
 					"dynamodb:GetItem",
-					"dynamodb:UpdateItem"
+					"dynamodb:UpdateItem",
+					"dynamodb:BatchWriteItem"
 				]
 				Resource = aws_dynamodb_table.image_metadata.arn
+			},
+			{
+				# HeadObject, for each upload's content type and size
+				Effect = "Allow"
+				Action = [
+					"s3:GetObject"
+				]
+				Resource = "${aws_s3_bucket.image_upload.arn}/*"
 			}
 		]
 	})
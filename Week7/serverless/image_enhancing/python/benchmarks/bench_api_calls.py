@@ -0,0 +1,51 @@
+"""
+AWS API calls and wall time of lambda_handler by batch size.
+
+	python -m benchmarks.bench_api_calls [latency_ms]
+
+Runs S3 events of 1, 10 and 25 new 2 MP uploads against local stand-ins that add
+`latency_ms` (default 25) to every AWS call, and counts the calls by operation. Each
+event is run with the object's size and ETag, as S3 sends it, and without them.
+Metadata goes out in BatchWriteItem calls of 25 and notifications in PublishBatch
+calls of 10, where each record used to make one PutItem and one Publish call.
+"""
+import itertools
+import sys
+import time
+from collections import Counter
+
+from benchmarks.common import aws_stand_ins, make_jpeg, s3_event, upload_images
+
+
+def main(latency_ms=25.0):
+	photo = make_jpeg(1600, 1200)
+	uploads = itertools.count()
+	with aws_stand_ins(latency_ms) as image_enhancer:
+		# Every upload has the same bytes; count the calls of a full enhancement for each
+		image_enhancer.DEDUP_ENABLED = False
+		calls = Counter()
+
+		def count(model, **kwargs):
+			calls[model.name] += 1
+
+		clients = (image_enhancer.s3_client, image_enhancer.dynamodb.meta.client, image_enhancer.sns_client)
+		for client in clients:
+			client.meta.events.register("before-call.*.*", count)
+		# An event without the object's size and ETag (as a replay builds) costs a HEAD per record
+		for records, with_size in itertools.product((1, 10, 25), (True, False)):
+			keys = [f"uploads/photo-{next(uploads)}.jpg" for _ in range(records)]
+			upload_images(keys, photo)
+			event = s3_event(keys, body=photo if with_size else None)
+			calls.clear()
+			start = time.perf_counter()
+			image_enhancer.lambda_handler(event, None)
+			elapsed = (time.perf_counter() - start) * 1000
+			summary = " ".join(f"{name}={count}" for name, count in sorted(calls.items()))
+			label = "event size" if with_size else "HEAD"
+			print(f"records={records:<3} {label:<10} calls={sum(calls.values()):<4} wall={elapsed:8.2f}ms  {summary}")
+		for client in clients:
+			client.meta.events.unregister("before-call.*.*", count)
+
+
+if __name__ == "__main__":
+	main(float(sys.argv[1]) if len(sys.argv) > 1 else 25.0)
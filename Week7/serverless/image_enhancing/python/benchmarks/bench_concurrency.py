@@ -0,0 +1,31 @@
+"""
+Batch wall time of lambda_handler by MAX_CONCURRENCY.
+
+	python -m benchmarks.bench_concurrency [records] [latency_ms]
+
+Runs one S3 event of `records` 2 MP uploads (default 10) against local stand-ins that
+add `latency_ms` (default 25) to every AWS call. MAX_CONCURRENCY=1 is the old
+one-record-at-a-time behaviour.
+"""
+import sys
+
+from benchmarks.common import aws_stand_ins, make_jpeg, report, s3_event, timed, upload_images
+
+
+def main(records=10, latency_ms=25.0, iterations=5):
+	keys = [f"uploads/photo-{n}.jpg" for n in range(records)]
+	with aws_stand_ins(latency_ms) as image_enhancer:
+		photo = make_jpeg(1600, 1200)
+		upload_images(keys, photo)
+		event = s3_event(keys, body=photo)
+		for concurrency in (1, 2, 4, 8, records):
+			image_enhancer.MAX_CONCURRENCY = concurrency
+			samples = timed(lambda: image_enhancer.lambda_handler(event, None), iterations)
+			report(f"MAX_CONCURRENCY={concurrency}", samples)
+
+
+if __name__ == "__main__":
+	main(
+		int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+		float(sys.argv[2]) if len(sys.argv) > 2 else 25.0,
+	)
@@ -0,0 +1,71 @@
+"""
+Batch wall time of lambda_handler for re-uploads of already enhanced photos.
+
+	python -m benchmarks.bench_dedup [records] [latency_ms]
+
+One 12 MP photo is enhanced once; every batch then carries `records` (default 10) new
+keys holding the same bytes, or a fresh re-encoding for the perceptual case, against
+local stand-ins that add `latency_ms` (default 25) to every AWS call.
+"""
+import io
+import itertools
+import random
+import sys
+
+from PIL import Image, ImageDraw
+
+from benchmarks.common import aws_stand_ins, make_jpeg, report, s3_event, timed, upload_images
+
+
+def make_photo(width: int, height: int) -> bytes:
+	"""make_jpeg with large shapes on top. Its gradients alone give near-equal neighbouring
+	cells, whose perceptual hash bits flip with any re-encoding."""
+	image = Image.open(io.BytesIO(make_jpeg(width, height)))
+	draw = ImageDraw.Draw(image)
+	rng = random.Random(7)
+	for _ in range(40):
+		x, y, radius = rng.randrange(width), rng.randrange(height), rng.randrange(width // 40, width // 7)
+		draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=tuple(rng.randrange(256) for _ in range(3)))
+	return reencode(image, 90)
+
+
+def reencode(photo, quality: int) -> bytes:
+	if isinstance(photo, bytes):
+		photo = Image.open(io.BytesIO(photo))
+	buffer = io.BytesIO()
+	photo.save(buffer, format="JPEG", quality=quality)
+	return buffer.getvalue()
+
+
+def main(records=10, latency_ms=25.0, iterations=5):
+	photo = make_photo(4000, 3000)
+	batches = itertools.count()
+	with aws_stand_ins(latency_ms) as image_enhancer:
+		# Enhance the photo once, recording both its exact and its perceptual hash
+		image_enhancer.DEDUP_PERCEPTUAL = True
+		upload_images(["uploads/original.jpg"], photo)
+		image_enhancer.lambda_handler(s3_event(["uploads/original.jpg"], body=photo), None)
+
+		def run_batch(body):
+			batch = next(batches)
+			keys = [f"uploads/batch-{batch}/photo-{n}.jpg" for n in range(records)]
+			data = body(batch)
+			upload_images(keys, data)
+			image_enhancer.lambda_handler(s3_event(keys, body=data), None)
+
+		# Each batch of re-encoded copies gets its own quality, so their bytes never matched before
+		for label, enabled, perceptual, body in (
+			("no dedup", False, False, lambda batch: photo),
+			("exact (ETag) hit", True, False, lambda batch: photo),
+			("re-encoded, perceptual hit", True, True, lambda batch: reencode(photo, 75 + batch % 15)),
+		):
+			image_enhancer.DEDUP_ENABLED = enabled
+			image_enhancer.DEDUP_PERCEPTUAL = perceptual
+			report(label, timed(lambda: run_batch(body), iterations))
+
+
+if __name__ == "__main__":
+	main(
+		int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+		float(sys.argv[2]) if len(sys.argv) > 2 else 25.0,
+	)
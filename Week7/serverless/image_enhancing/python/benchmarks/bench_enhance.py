@@ -0,0 +1,78 @@
+"""
+Enhancement time and peak memory on 12 MP images: chained ImageEnhance passes versus
+the fused single-pass kernel in image_enhancer.
+
+	python -m benchmarks.bench_enhance [iterations]
+
+Each variant runs in its own process so its peak RSS can be read. The fused output is
+also compared with the chained one, pixel by pixel.
+"""
+import io
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from PIL import Image, ImageChops, ImageEnhance, ImageStat
+
+from benchmarks.common import make_jpeg, report
+
+WIDTH, HEIGHT = 4000, 3000
+
+
+def chained(img):
+	"""The enhancement as it was: three ImageEnhance passes, each allocating a full image"""
+	contrast = ImageEnhance.Contrast(img).enhance(1.2)
+	sharp = ImageEnhance.Sharpness(contrast).enhance(1.1)
+	return ImageEnhance.Brightness(sharp).enhance(1.05)
+
+
+def fused(img):
+	import image_enhancer
+	return image_enhancer._enhance(img, 1.2, 1.1, 1.05)
+
+
+VARIANTS = {"chained": chained, "fused": fused}
+
+
+def measure(variant, iterations):
+	"""Runs in a child process: decode, enhance `iterations` times, print timings and memory"""
+	enhance = VARIANTS[variant]
+	img = Image.open(io.BytesIO(make_jpeg(WIDTH, HEIGHT))).convert("RGB")
+	baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	samples = []
+	for _ in range(iterations):
+		start = time.perf_counter()
+		enhance(img)
+		samples.append((time.perf_counter() - start) * 1000)
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	print(json.dumps({"samples": samples, "peak_mb": (peak - baseline) / 1024}))
+
+
+def difference():
+	img = Image.open(io.BytesIO(make_jpeg(WIDTH, HEIGHT))).convert("RGB")
+	diff = ImageChops.difference(chained(img), fused(img))
+	mean = sum(ImageStat.Stat(diff).mean) / 3
+	largest = max(high for _, high in diff.getextrema())
+	return mean, largest
+
+
+def main(iterations=10):
+	for variant in VARIANTS:
+		output = subprocess.run(
+			[sys.executable, "-m", "benchmarks.bench_enhance", "--measure", variant, str(iterations)],
+			check=True, capture_output=True, text=True,
+		).stdout
+		result = json.loads(output.strip().splitlines()[-1])
+		report(f"{variant:<8} 12 MP", result["samples"])
+		print(f"{'':<32} peak RSS growth while enhancing: {result['peak_mb']:.0f} MB")
+	mean, largest = difference()
+	print(f"fused vs chained: mean abs difference {mean:.2f}, max {largest} (of 255)")
+
+
+if __name__ == "__main__":
+	if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+		measure(sys.argv[2], int(sys.argv[3]))
+	else:
+		main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,51 @@
+"""
+Time to produce the enhanced output of one large upload, by rendition setting.
+
+	python -m benchmarks.bench_renditions [megapixels]
+
+Compares the single full-size JPEG with web renditions (2048/1024/256 px) decoded at
+reduced scale through draft(), and the same renditions decoded at native resolution.
+"""
+import io
+import sys
+from contextlib import contextmanager
+
+from PIL import JpegImagePlugin
+
+from benchmarks.common import make_jpeg, report, timed
+
+import image_enhancer
+
+
+@contextmanager
+def settings(renditions, draft=True):
+	saved = image_enhancer.RENDITIONS, JpegImagePlugin.JpegImageFile.draft
+	image_enhancer.RENDITIONS = renditions
+	if not draft:
+		JpegImagePlugin.JpegImageFile.draft = lambda self, mode, size: None
+	try:
+		yield
+	finally:
+		image_enhancer.RENDITIONS, JpegImagePlugin.JpegImageFile.draft = saved
+
+
+def render(source):
+	for rendition in image_enhancer._enhance_image(io.BytesIO(source)):
+		rendition.data.close()
+
+
+def main(megapixels=48, iterations=5):
+	width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+	source = make_jpeg(width, width * 3 // 4)
+	print(f"source {width}x{width * 3 // 4} JPEG, {len(source) / 1e6:.1f} MB")
+	for label, renditions, draft in (
+		("full size", [None], True),
+		("2048/1024/256, native decode", [2048, 1024, 256], False),
+		("2048/1024/256, draft decode", [2048, 1024, 256], True),
+	):
+		with settings(renditions, draft):
+			report(label, timed(lambda: render(source), iterations))
+
+
+if __name__ == "__main__":
+	main(int(sys.argv[1]) if len(sys.argv) > 1 else 48)
@@ -0,0 +1,106 @@
+"""
+Local stand-ins for the image enhancer's AWS services, for benchmarks.
+
+moto serves S3, DynamoDB and SNS in-process. Every API call can be delayed by a fixed
+latency to stand in for the network round trip a Lambda pays to reach the real services.
+"""
+import hashlib
+import io
+import os
+import statistics
+import time
+from contextlib import contextmanager
+
+# Keep boto3 away from real credentials, and point the handler at the stand-in resources
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("TABLE_NAME", "ImageMetadata")
+os.environ.setdefault("TARGET_BUCKET_NAME", "image-enhancing-bench")
+os.environ.setdefault("SNS_TOPIC_ARN", "arn:aws:sns:us-east-1:123456789012:ImageNotifications")
+
+import boto3
+from moto import mock_aws
+from PIL import Image
+
+BUCKET = os.environ["TARGET_BUCKET_NAME"]
+
+
+@contextmanager
+def aws_stand_ins(latency_ms: float = 0):
+	"""Start moto with the bucket, table and topic the handler expects; yields the image_enhancer module"""
+	with mock_aws():
+		boto3.client("s3").create_bucket(Bucket=BUCKET)
+		boto3.client("dynamodb").create_table(
+			TableName=os.environ["TABLE_NAME"],
+			BillingMode="PAY_PER_REQUEST",
+			AttributeDefinitions=[{"AttributeName": "ImageId", "AttributeType": "S"}],
+			KeySchema=[{"AttributeName": "ImageId", "KeyType": "HASH"}],
+		)
+		boto3.client("sns").create_topic(Name=os.environ["SNS_TOPIC_ARN"].rsplit(":", 1)[1])
+
+		import image_enhancer
+
+		def delay(**kwargs):
+			time.sleep(latency_ms / 1000)
+
+		clients = (image_enhancer.s3_client, image_enhancer.dynamodb.meta.client, image_enhancer.sns_client)
+		if latency_ms:
+			for client in clients:
+				client.meta.events.register("before-call.*.*", delay)
+		try:
+			yield image_enhancer
+		finally:
+			for client in clients:
+				client.meta.events.unregister("before-call.*.*", delay)
+
+
+def make_jpeg(width: int, height: int, quality: int = 90) -> bytes:
+	"""A photo-sized JPEG with gradients and noise, so it compresses like a real picture"""
+	gradient = Image.linear_gradient("L").resize((width, height))
+	noise = Image.effect_noise((width, height), 40)
+	image = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+	buffer = io.BytesIO()
+	image.save(buffer, format="JPEG", quality=quality)
+	return buffer.getvalue()
+
+
+def upload_images(keys, body: bytes):
+	s3 = boto3.client("s3")
+	for key in keys:
+		s3.put_object(Bucket=BUCKET, Key=key, Body=body)
+
+
+def s3_event(keys, bucket: str = BUCKET, body: bytes = None) -> dict:
+	"""An S3 ObjectCreated event with one record per key, carrying the size and ETag of `body` if given"""
+	s3_object = {"size": len(body), "eTag": hashlib.md5(body).hexdigest()} if body is not None else {}
+	return {
+		"Records": [
+			{
+				"eventSource": "aws:s3",
+				"eventName": "ObjectCreated:Put",
+				"userIdentity": {"principalId": "bench"},
+				"s3": {"bucket": {"name": bucket}, "object": {"key": key, **s3_object}},
+			}
+			for key in keys
+		]
+	}
+
+
+def timed(fn, iterations):
+	"""Call fn repeatedly and return per-call latencies in milliseconds"""
+	samples = []
+	for _ in range(iterations):
+		start = time.perf_counter()
+		fn()
+		samples.append((time.perf_counter() - start) * 1000)
+	return samples
+
+
+def report(label, samples):
+	samples = sorted(samples)
+	p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+	print(
+		f"{label:<32} n={len(samples):<4} mean={statistics.mean(samples):9.2f}ms "
+		f"p50={statistics.median(samples):9.2f}ms p99={p99:9.2f}ms"
+	)
@@ -1,48 +1,378 @@
+import hashlib
+import io
 import json
 import os
+import shutil
 import tempfile
-import uuid
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timezone
+from typing import List, NamedTuple, Optional
 
 import boto3
-from botocore.exceptions import ClientError
+from botocore.config import Config
+from boto3.dynamodb.conditions import Attr
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import BotoCoreError, ClientError
 
 try:
-	from PIL import Image, ImageEnhance
+	from PIL import Image, ImageFilter, ImageStat
 except Exception as import_error:
 	# Pillow should be packaged with the deployment. If it's missing, we still want a clear error.
 	raise import_error
 
 
-s3_client = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
-sns_client = boto3.client("sns")
-
-
 TABLE_NAME = os.environ.get("TABLE_NAME")
 SNS_TOPIC_ARN = os.environ.get("SNS_TOPIC_ARN")
 TARGET_BUCKET_NAME = os.environ.get("TARGET_BUCKET_NAME")
 ENHANCED_PREFIX = os.environ.get("ENHANCED_PREFIX", "enhanced/")
 
+# Records processed at once; each one holds a worker thread for its S3/DynamoDB/SNS calls
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", "8"))
+# Images enhanced at once. Pillow releases the GIL while it works, so this is bounded by vCPUs
+ENHANCE_CONCURRENCY = int(os.environ.get("ENHANCE_CONCURRENCY", str(os.cpu_count() or 1)))
+
+# Enhancement factors; 1.0 leaves the image unchanged
+ENHANCE_CONTRAST = float(os.environ.get("ENHANCE_CONTRAST", "1.2"))
+ENHANCE_SHARPNESS = float(os.environ.get("ENHANCE_SHARPNESS", "1.1"))
+ENHANCE_BRIGHTNESS = float(os.environ.get("ENHANCE_BRIGHTNESS", "1.05"))
+
+# Encoding of the enhanced image: any format Pillow can write, e.g. JPEG, WEBP or PNG
+OUTPUT_FORMAT = os.environ.get("OUTPUT_FORMAT", "JPEG").upper()
+OUTPUT_QUALITY = int(os.environ.get("OUTPUT_QUALITY", "90"))
+# Formats written next to OUTPUT_FORMAT for every rendition, e.g. "WEBP,AVIF"
+EXTRA_FORMATS = [name.strip().upper() for name in os.environ.get("EXTRA_FORMATS", "").split(",") if name.strip()]
+OUTPUT_FORMATS = [OUTPUT_FORMAT] + [name for name in EXTRA_FORMATS if name != OUTPUT_FORMAT]
+
+# Renditions to produce, by longest edge in pixels, e.g. "2048,1024,256"; "full" keeps the native size
+RENDITIONS = sorted(
+	(None if size.strip().lower() == "full" else int(size) for size in os.environ.get("RENDITIONS", "full").split(",") if size.strip()),
+	key=lambda size: float("inf") if size is None else size,
+	reverse=True,
+)
+if not RENDITIONS or any(size is not None and size <= 0 for size in RENDITIONS):
+	raise RuntimeError(f"RENDITIONS must list positive sizes or full, got {os.environ.get('RENDITIONS')!r}")
+
+# Reuse the renditions of an earlier upload with the same content instead of enhancing it again
+DEDUP_ENABLED = os.environ.get("DEDUP_ENABLED", "true").lower() == "true"
+# Also match re-encoded or resized copies by perceptual hash; costs a download on every exact miss
+DEDUP_PERCEPTUAL = os.environ.get("DEDUP_PERCEPTUAL", "false").lower() == "true"
+# Images whose 9x8 grayscale thumbnail varies less than this (standard deviation, 0-255) get no
+# perceptual hash: the bits of flat images compare near-equal cells and say nothing about them
+DEDUP_MIN_STDDEV = float(os.environ.get("DEDUP_MIN_STDDEV", "8"))
+# Dedup entries are only shared between deployments that produce the same renditions
+OUTPUT_SETTINGS_ID = hashlib.sha256(
+	json.dumps([ENHANCE_CONTRAST, ENHANCE_SHARPNESS, ENHANCE_BRIGHTNESS, OUTPUT_FORMATS, OUTPUT_QUALITY, RENDITIONS]).encode()
+).hexdigest()[:12]
+
+FORMAT_EXTENSIONS = {"JPEG": ".jpg", "WEBP": ".webp", "AVIF": ".avif", "PNG": ".png"}
+
+# Error codes of a missing object: NoSuchKey from a GET, a bare 404 from a HEAD
+MISSING_OBJECT_CODES = ("NoSuchKey", "404")
+
+MB = 1024 * 1024
+# The function's memory and /tmp size, from which the limits below are derived by default
+MEMORY_BYTES = int(os.environ.get("AWS_LAMBDA_FUNCTION_MEMORY_SIZE", "1024")) * MB
+TMP_BYTES = shutil.disk_usage(tempfile.gettempdir()).total
+
+# Images up to this size are downloaded and encoded in memory; larger ones spill to /tmp.
+# The in-memory downloads of MAX_CONCURRENCY records take at most a quarter of memory
+IN_MEMORY_MAX_BYTES = int(os.environ.get("IN_MEMORY_MAX_MB", str(max(1, min(32, MEMORY_BYTES // (4 * MAX_CONCURRENCY) // MB))))) * MB
+# Records holding a download spilled to /tmp at once, until they are done with the file
+LARGE_DOWNLOAD_CONCURRENCY = int(os.environ.get("LARGE_DOWNLOAD_CONCURRENCY", "2"))
+# Uploads above this size are recorded as TOO_LARGE without being downloaded. The spilled
+# downloads fit in /tmp with room for as much again of spilled renditions
+MAX_SOURCE_BYTES = int(os.environ.get("MAX_SOURCE_MB", str(min(200, TMP_BYTES // (LARGE_DOWNLOAD_CONCURRENCY + 1) // MB)))) * MB
+# Images with more pixels are recorded as TOO_LARGE without being decoded. ENHANCE_CONCURRENCY
+# decodes and their enhanced copies, at 4 bytes per pixel each, fit in half of memory
+MAX_SOURCE_PIXELS = int(os.environ.get("MAX_SOURCE_MEGAPIXELS", str(max(1, MEMORY_BYTES // 2 // (8 * ENHANCE_CONCURRENCY) // 10**6)))) * 10**6
+
+# Objects above IN_MEMORY_MAX_BYTES are transferred in parts of DOWNLOAD_PART_MB, this many at once
+DOWNLOAD_CONCURRENCY = int(os.environ.get("DOWNLOAD_CONCURRENCY", "8"))
+transfer_config = TransferConfig(
+	multipart_threshold=IN_MEMORY_MAX_BYTES,
+	multipart_chunksize=int(os.environ.get("DOWNLOAD_PART_MB", "8")) * 1024 * 1024,
+	max_concurrency=DOWNLOAD_CONCURRENCY,
+)
+
+# PublishBatch takes at most 10 messages; failed entries are retried up to SNS_MAX_ATTEMPTS times
+SNS_BATCH_SIZE = 10
+SNS_MAX_ATTEMPTS = int(os.environ.get("SNS_MAX_ATTEMPTS", "3"))
+
+# Records a replay ({"replay": "FAILED"}) reprocesses per invocation, unless the event sets "limit"
+REPLAY_LIMIT = int(os.environ.get("REPLAY_LIMIT", "100"))
+
+# One pooled connection per worker thread, plus the ranged GETs of a large download
+client_config = Config(max_pool_connections=max(10, MAX_CONCURRENCY + DOWNLOAD_CONCURRENCY))
+s3_client = boto3.client("s3", config=client_config)
+dynamodb = boto3.resource("dynamodb", config=client_config)
+sns_client = boto3.client("sns", config=client_config)
+
+_enhance_slots = threading.BoundedSemaphore(ENHANCE_CONCURRENCY)
+_large_download_slots = threading.BoundedSemaphore(LARGE_DOWNLOAD_CONCURRENCY)
+
+Image.init()
+for _format in OUTPUT_FORMATS:
+	if _format not in Image.SAVE:
+		raise RuntimeError(f"Pillow cannot write {_format}; check OUTPUT_FORMAT and EXTRA_FORMATS")
+
+
+class Rendition(NamedTuple):
+	max_edge: Optional[int]
+	format: str
+	width: int
+	height: int
+	data: object
+
 
 def _iso_now() -> str:
 	return datetime.now(timezone.utc).isoformat()
 
 
-def _enhance_image(input_path: str, output_path: str) -> None:
-	"""Apply simple enhancements: auto-contrast and slight sharpening/brightness.
+# ImageFilter.SMOOTH, the blur that ImageEnhance.Sharpness sharpens against
+_SMOOTH = (1, 1, 1, 1, 5, 1, 1, 1, 1)
+
+
+def _enhancement_kernel(mean: int, contrast: float, sharpness: float, brightness: float) -> ImageFilter.Kernel:
+	"""Contrast, sharpness and brightness as one 3x3 convolution.
+
+	ImageEnhance computes contrast as mean + c * (x - mean), sharpness as
+	smooth + s * (x - smooth) and brightness as b * x. Each is linear and the smoothing
+	kernel sums to 1, so together they are one kernel plus an offset whatever their
+	order; only the rounding and clipping between chained steps is lost.
+	"""
+	weights = [(1 - sharpness) * weight / 13 for weight in _SMOOTH]
+	weights[4] += sharpness
+	scale = contrast * brightness
+	return ImageFilter.Kernel((3, 3), [scale * weight for weight in weights], scale=1, offset=brightness * mean * (1 - contrast))
+
+
+def _enhance(img: Image.Image, contrast: float = ENHANCE_CONTRAST, sharpness: float = ENHANCE_SHARPNESS, brightness: float = ENHANCE_BRIGHTNESS) -> Image.Image:
+	"""Enhance an RGB image in one filter pass, allocating only the output image"""
+	# ImageEnhance.Contrast pivots on the mean of the grayscale image; the same mean
+	# from the per-channel histograms avoids converting the image to "L"
+	red, green, blue = ImageStat.Stat(img).mean
+	mean = int((red * 299 + green * 587 + blue * 114) / 1000 + 0.5)
+	enhanced = img.filter(_enhancement_kernel(mean, contrast, sharpness, brightness))
+
+	# The 3x3 filter copies the outermost pixels as they are; give them contrast and brightness
+	lut = [min(255, max(0, round(brightness * (mean + contrast * (value - mean))))) for value in range(256)] * 3
+	width, height = img.size
+	for box in ((0, 0, width, 1), (0, height - 1, width, height), (0, 0, 1, height), (width - 1, 0, width, height)):
+		enhanced.paste(img.crop(box).point(lut), box)
+	return enhanced
+
+
+def _fit(size, max_edge: Optional[int]):
+	"""`size` scaled down to fit `max_edge` on its longest side; None or a larger edge keeps it"""
+	width, height = size
+	if max_edge is None or max(width, height) <= max_edge:
+		return size
+	scale = max_edge / max(width, height)
+	return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _rendition_key(source_key: str, max_edge: Optional[int], format: str) -> str:
+	if max_edge is None and format == OUTPUT_FORMAT:
+		# The full-size image in the main format keeps the source's key, as it always has
+		return f"{ENHANCED_PREFIX}{source_key}"
+	root = os.path.splitext(source_key)[0]
+	suffix = "" if max_edge is None else f"_{max_edge}"
+	return f"{ENHANCED_PREFIX}{root}{suffix}{FORMAT_EXTENSIONS.get(format, '.' + format.lower())}"
+
+
+class ImageTooLarge(ValueError):
+	"""The image has more pixels than MAX_SOURCE_PIXELS"""
+
 
+def _open_image(source) -> Image.Image:
+	"""Open an image, reading only its header; raises ImageTooLarge if decoding it would not fit in memory"""
+	img = Image.open(source)
+	if img.width * img.height > MAX_SOURCE_PIXELS:
+		img.close()
+		raise ImageTooLarge(f"{img.width}x{img.height} pixels")
+	return img
+
+
+def _enhance_image(source) -> List[Rendition]:
+	"""Apply simple enhancements: contrast, slight sharpening and brightness.
+
+	`source` is a path or binary file object. It is decoded once and every rendition is
+	resized from it, enhanced and encoded in every output format into a file object
+	positioned at its end; the caller closes them.
 	This keeps dependencies light and fast while demonstrating the pipeline.
 	"""
-	with Image.open(input_path) as img:
-		img = img.convert("RGB")
-		contrast = ImageEnhance.Contrast(img).enhance(1.2)
-		sharp = ImageEnhance.Sharpness(contrast).enhance(1.1)
-		bright = ImageEnhance.Brightness(sharp).enhance(1.05)
-		bright.save(output_path, format="JPEG", quality=90)
+	renditions = []
+	with _open_image(source) as img:
+		native = img.size
+		# JPEG only: decode at 1/2, 1/4 or 1/8 scale (DCT scaling) when the largest rendition allows it
+		img.draft("RGB", _fit(native, RENDITIONS[0]))
+		if img.mode != "RGB":
+			img = img.convert("RGB")
+		base = img
+		for max_edge in RENDITIONS:
+			size = _fit(native, max_edge)
+			if base.size != size:
+				# reducing_gap: shrink by an integer factor with reduce() first, then resample the rest
+				base = base.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+			enhanced = _enhance(base)
+			for format in OUTPUT_FORMATS:
+				data = tempfile.SpooledTemporaryFile(max_size=IN_MEMORY_MAX_BYTES)
+				enhanced.save(data, format=format, quality=OUTPUT_QUALITY)
+				renditions.append(Rendition(max_edge, format, size[0], size[1], data))
+	return renditions
+
+
+def _download(bucket: str, key: str, size: int, etag: Optional[str] = None):
+	"""Read an object into a seekable file object.
+
+	Objects up to IN_MEMORY_MAX_BYTES are read with a single GET into memory, which fails
+	with PreconditionFailed if `etag` is given and the object has been replaced since.
+	Larger ones go through the transfer manager's parallel ranged GETs into a file that
+	spills to /tmp; it HEADs the object first and reads every part of that version.
+	A missing object raises ClientError NoSuchKey, or 404 when large.
+	"""
+	if size <= IN_MEMORY_MAX_BYTES:
+		extra_args = {"IfMatch": f'"{etag}"'} if etag else {}
+		body = s3_client.get_object(Bucket=bucket, Key=key, **extra_args)["Body"]
+		return io.BytesIO(body.read())
+	spooled = tempfile.SpooledTemporaryFile(max_size=IN_MEMORY_MAX_BYTES)
+	try:
+		s3_client.download_fileobj(bucket, key, spooled, Config=transfer_config)
+	except BaseException:
+		spooled.close()
+		raise
+	spooled.seek(0)
+	return spooled
+
+
+def _upload(data, bucket: str, key: str, content_type: str) -> str:
+	"""Upload an encoded image from a file object positioned at its end: one PUT, or multipart if large.
+
+	Returns the ETag of the stored object, quoted as S3 returns it.
+	"""
+	size = data.tell()
+	data.seek(0)
+	if size <= IN_MEMORY_MAX_BYTES:
+		return s3_client.put_object(Bucket=bucket, Key=key, Body=data, ContentType=content_type)["ETag"]
+	# The transfer manager does not return the completed upload's ETag
+	s3_client.upload_fileobj(data, bucket, key, ExtraArgs={"ContentType": content_type}, Config=transfer_config)
+	return s3_client.head_object(Bucket=bucket, Key=key)["ETag"]
+
+
+def _enhance_and_upload(original, source_key: str, target_bucket: str) -> list:
+	"""Enhance a downloaded image and upload its renditions; returns their metadata items"""
+	with _enhance_slots:
+		renditions = _enhance_image(original)
+	rendition_items = []
+	try:
+		for rendition in renditions:
+			key = _rendition_key(source_key, rendition.max_edge, rendition.format)
+			etag = _upload(rendition.data, target_bucket, key, Image.MIME.get(rendition.format, "application/octet-stream"))
+			item = {"Key": key, "ETag": etag, "Format": rendition.format, "Width": rendition.width, "Height": rendition.height}
+			if rendition.max_edge is not None:
+				item["MaxEdge"] = rendition.max_edge
+			rendition_items.append(item)
+	finally:
+		for rendition in renditions:
+			rendition.data.close()
+	return rendition_items
+
+
+def _content_hash(etag: str) -> str:
+	"""Identity of an object's bytes, from its ETag.
+
+	A single-part ETag is the MD5 of the content; a multipart ETag only matches an
+	upload of the same content in the same part size, so at worst a duplicate is missed.
+	"""
+	return "etag:" + etag.strip('"')
+
+
+def _perceptual_hash(source) -> Optional[str]:
+	"""64-bit difference hash of an image: the same for re-encoded or resized copies of it.
+
+	None for images too flat to tell apart by it (see DEDUP_MIN_STDDEV): solid and
+	near-solid images would all share one hash.
+	"""
+	with _enhance_slots, _open_image(source) as img:
+		img.draft("L", (64, 64))
+		small = img.convert("L").resize((9, 8), Image.Resampling.BILINEAR)
+	source.seek(0)
+	if ImageStat.Stat(small).stddev[0] < DEDUP_MIN_STDDEV:
+		return None
+	pixels = list(small.getdata())
+	bits = 0
+	for row in range(8):
+		for col in range(8):
+			bits = bits << 1 | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+	return f"perceptual:{bits:016x}"
+
+
+def _dedup_id(content_hash: str) -> str:
+	"""ImageId of the metadata item that points a content hash at its renditions"""
+	return f"dedup#{content_hash}#{OUTPUT_SETTINGS_ID}"
+
+
+def _find_duplicate(table, content_hash: str) -> Optional[dict]:
+	if not DEDUP_ENABLED:
+		return None
+	return table.get_item(Key={"ImageId": _dedup_id(content_hash)}).get("Item")
+
+
+def _copy_renditions(duplicate: Optional[dict], source_key: str, target_bucket: str) -> Optional[list]:
+	"""Copy a duplicate's renditions to this upload's keys, server-side.
+
+	Each copy is conditioned on the ETag the entry recorded for the rendition, as its key
+	belongs to the earlier upload and a later upload under that key overwrites it.
+	Returns the new rendition items, or None if there is no duplicate or any of its
+	renditions has since been deleted or replaced.
+	"""
+	if duplicate is None:
+		return None
+	rendition_items = []
+	for item in duplicate["Renditions"]:
+		if "ETag" not in item:
+			# Entries written before renditions recorded their ETag cannot be checked
+			return None
+		max_edge = int(item["MaxEdge"]) if "MaxEdge" in item else None
+		key = _rendition_key(source_key, max_edge, item["Format"])
+		try:
+			if duplicate["EnhancedBucket"] == target_bucket and item["Key"] == key:
+				# A re-upload under the same key needs no copy if its rendition is still in place
+				s3_client.head_object(Bucket=target_bucket, Key=key, IfMatch=item["ETag"])
+				etag = item["ETag"]
+			else:
+				response = s3_client.copy_object(
+					Bucket=target_bucket,
+					Key=key,
+					CopySource={"Bucket": duplicate["EnhancedBucket"], "Key": item["Key"]},
+					CopySourceIfMatch=item["ETag"],
+				)
+				etag = response["CopyObjectResult"]["ETag"]
+		except ClientError as e:
+			if e.response["Error"]["Code"] in MISSING_OBJECT_CODES + ("PreconditionFailed", "412"):
+				return None
+			raise
+		rendition_items.append({**item, "Key": key, "ETag": etag})
+	return rendition_items
 
 
-def _put_metadata(table, image_id: str, user_id: str, status: str, source_bucket: str, source_key: str, enhanced_bucket: str, enhanced_key: str) -> None:
+def _dedup_entry(content_hash: str, source_bucket: str, source_key: str, enhanced_bucket: str, renditions: list) -> dict:
+	return {
+		"ImageId": _dedup_id(content_hash),
+		"Timestamp": _iso_now(),
+		"Status": "DEDUP_ENTRY",
+		"SourceBucket": source_bucket,
+		"SourceKey": source_key,
+		"EnhancedBucket": enhanced_bucket,
+		"EnhancedKey": renditions[0]["Key"],
+		"Renditions": renditions,
+	}
+
+
+def _metadata_item(image_id: str, user_id: str, status: str, source_bucket: str, source_key: str, enhanced_bucket: str, enhanced_key: str, renditions: Optional[list] = None, extra: Optional[dict] = None) -> dict:
 	item = {
 		"ImageId": image_id,
 		"UserId": user_id,
@@ -53,128 +383,321 @@ def _put_metadata(table, image_id: str, user_id: str, status: str, source_bucket
 		"EnhancedBucket": enhanced_bucket,
 		"EnhancedKey": enhanced_key,
 	}
-	table.put_item(Item=item)
+	if renditions:
+		item["Renditions"] = renditions
+	if extra:
+		item.update(extra)
+	return item
 
 
-def _publish_sns(topic_arn: str, message: str, subject: str = "Image Enhanced") -> None:
-	if not topic_arn:
-		return
-	sns_client.publish(TopicArn=topic_arn, Message=message, Subject=subject)
+def _status_item(record, status: str, source_bucket: str, source_key: str) -> dict:
+	"""Metadata item of a record that produced no enhanced image"""
+	return _metadata_item(
+		image_id=source_key,
+		user_id=record.get("userIdentity", {}).get("principalId", "anonymous"),
+		status=status,
+		source_bucket=source_bucket,
+		source_key=source_key,
+		enhanced_bucket="",
+		enhanced_key="",
+	)
 
 
-def lambda_handler(event, context):
-	if not (TABLE_NAME and TARGET_BUCKET_NAME):
-		raise RuntimeError("Environment variables TABLE_NAME and TARGET_BUCKET_NAME must be set")
+def _write_metadata(table, items: list) -> None:
+	"""Write metadata items with BatchWriteItem, 25 per call.
 
-	table = dynamodb.Table(TABLE_NAME)
+	batch_writer sends unprocessed items again with the next call, and keeps only the
+	last of several items with the same ImageId, which one request may not contain twice.
+	"""
+	with table.batch_writer(overwrite_by_pkeys=["ImageId"]) as batch:
+		for item in items:
+			batch.put_item(Item=item)
 
-	records = event.get("Records", [])
-	results = []
-	for record in records:
-		# Handle S3 Put event
-		s3_info = record.get("s3", {})
-		source_bucket = s3_info.get("bucket", {}).get("name")
-		source_key = s3_info.get("object", {}).get("key")
-		if not source_bucket or not source_key:
-			continue
 
-		# Avoid infinite loops if we also process enhanced objects
-		if source_key.startswith(ENHANCED_PREFIX):
-			continue
+def _publish_sns(topic_arn: str, messages: list, subject: str = "Image Enhanced") -> list:
+	"""Publish messages with PublishBatch, 10 per call, retrying failed entries with backoff.
+
+	Returns the positions in `messages` of those still unpublished after SNS_MAX_ATTEMPTS;
+	entries SNS rejects as invalid are logged and not returned.
+	"""
+	if not topic_arn or not messages:
+		return []
+	pending = [{"Id": str(n), "Message": message, "Subject": subject} for n, message in enumerate(messages)]
+	for attempt in range(SNS_MAX_ATTEMPTS):
+		if attempt:
+			time.sleep(0.1 * 2 ** attempt)
+		failed = []
+		for start in range(0, len(pending), SNS_BATCH_SIZE):
+			entries = pending[start:start + SNS_BATCH_SIZE]
+			try:
+				response = sns_client.publish_batch(TopicArn=topic_arn, PublishBatchRequestEntries=entries)
+			except (ClientError, BotoCoreError) as e:
+				print(f"Error publishing notifications: {str(e)}")
+				failed.extend(entries)
+				continue
+			by_id = {entry["Id"]: entry for entry in entries}
+			for failure in response.get("Failed", []):
+				if failure.get("SenderFault"):
+					# The entry itself is invalid; sending it again would fail the same way
+					print(f"Notification rejected: {failure.get('Code')}: {failure.get('Message')}")
+				else:
+					failed.append(by_id[failure["Id"]])
+		pending = failed
+		if not pending:
+			return []
+	print(f"Failed to publish {len(pending)} notifications after {SNS_MAX_ATTEMPTS} attempts")
+	return [int(entry["Id"]) for entry in pending]
 
-		# Decide target bucket and key
-		target_bucket = TARGET_BUCKET_NAME
-		enhanced_key = f"{ENHANCED_PREFIX}{source_key}"
 
-		# Download original to /tmp
-		file_ext = os.path.splitext(source_key)[1] or ".jpg"
-		local_original = os.path.join(tempfile.gettempdir(), f"orig_{uuid.uuid4()}{file_ext}")
-		local_enhanced = os.path.join(tempfile.gettempdir(), f"enh_{uuid.uuid4()}.jpg")
+class RecordOutcome(NamedTuple):
+	# Metadata items to write and the SNS message to publish, once the whole batch is done
+	items: list
+	message: Optional[str]
+	result: Optional[dict]
+	# Whether processing failed in a way a retry may fix
+	failed: bool = False
 
-		try:
-			# First check if the object exists
+
+SKIPPED = RecordOutcome([], None, None)
+
+
+def _process_record(table, record) -> RecordOutcome:
+	"""Enhance the image of one S3 event record.
+
+	Returns the metadata items and notification for the record, and the processed image's
+	source and enhanced locations; the result is None if the record was skipped or failed
+	(recorded in its metadata item).
+	"""
+	# Handle S3 Put event
+	s3_info = record.get("s3", {})
+	s3_object = s3_info.get("object", {})
+	source_bucket = s3_info.get("bucket", {}).get("name")
+	source_key = s3_object.get("key")
+	if not source_bucket or not source_key:
+		return SKIPPED
+
+	# Avoid infinite loops if we also process enhanced objects
+	if source_key.startswith(ENHANCED_PREFIX):
+		return SKIPPED
+
+	# Decide target bucket
+	target_bucket = TARGET_BUCKET_NAME
+
+	try:
+		# The event gives the object's size and ETag, so the happy path makes no HEAD request.
+		# Replays and events without them fall back to one.
+		size, etag = s3_object.get("size"), s3_object.get("eTag")
+		if size is None or not etag:
 			try:
-				s3_client.head_object(Bucket=source_bucket, Key=source_key)
+				head = s3_client.head_object(Bucket=source_bucket, Key=source_key)
 			except ClientError as e:
-				if e.response['Error']['Code'] == '404':
+				if e.response["Error"]["Code"] in MISSING_OBJECT_CODES:
 					print(f"Object not found: s3://{source_bucket}/{source_key}")
-					# Store not found metadata
-					image_id = source_key
-					user_id = record.get("userIdentity", {}).get("principalId", "anonymous")
-					_put_metadata(
-						table=table,
-						image_id=image_id,
-						user_id=user_id,
-						status="NOT_FOUND",
-						source_bucket=source_bucket,
-						source_key=source_key,
-						enhanced_bucket="",
-						enhanced_key="",
-					)
-					continue  # Skip to next record
-				else:
-					raise  # Re-raise if it's not a 404 error
-					
-			s3_client.download_file(source_bucket, source_key, local_original)
-			_enhance_image(local_original, local_enhanced)
-			s3_client.upload_file(local_enhanced, target_bucket, enhanced_key, ExtraArgs={"ContentType": "image/jpeg"})
-
-			# Create item metadata
-			image_id = source_key
-			user_id = record.get("userIdentity", {}).get("principalId", "anonymous")
-			_put_metadata(
-				table=table,
-				image_id=image_id,
-				user_id=user_id,
-				status="ENHANCED",
-				source_bucket=source_bucket,
-				source_key=source_key,
-				enhanced_bucket=target_bucket,
-				enhanced_key=enhanced_key,
-			)
+					return RecordOutcome([_status_item(record, "NOT_FOUND", source_bucket, source_key)], None, None)
+				raise
+			size, etag = head["ContentLength"], head["ETag"].strip('"')
+
+		if size > MAX_SOURCE_BYTES:
+			print(f"Object too large ({size} bytes): s3://{source_bucket}/{source_key}")
+			return RecordOutcome([_status_item(record, "TOO_LARGE", source_bucket, source_key)], None, None)
+
+		# Exact duplicates are found from the ETag alone, before anything is downloaded
+		content_hashes = [_content_hash(etag)]
+		duplicate = _find_duplicate(table, content_hashes[0])
+		rendition_items = _copy_renditions(duplicate, source_key, target_bucket)
+		# A download spilling to /tmp holds a slot until the record is done with it, so the
+		# spilled files fit in /tmp
+		large_download = _large_download_slots if size > IN_MEMORY_MAX_BYTES else nullcontext()
+		if rendition_items is None:
+			with large_download:
+				# The GET doubles as the existence check
+				try:
+					original = _download(source_bucket, source_key, size, etag)
+				except ClientError as e:
+					code = e.response["Error"]["Code"]
+					if code in MISSING_OBJECT_CODES:
+						print(f"Object not found: s3://{source_bucket}/{source_key}")
+						return RecordOutcome([_status_item(record, "NOT_FOUND", source_bucket, source_key)], None, None)
+					if code in ("PreconditionFailed", "412"):
+						# Overwritten since this event; the event of the new object enhances it
+						print(f"Object replaced since the event: s3://{source_bucket}/{source_key}")
+						return SKIPPED
+					raise
+				# Decode from and encode to memory; only images above IN_MEMORY_MAX_BYTES touch /tmp
+				try:
+					with original:
+						perceptual_hash = _perceptual_hash(original) if DEDUP_ENABLED and DEDUP_PERCEPTUAL else None
+						if perceptual_hash:
+							content_hashes.append(perceptual_hash)
+							duplicate = _find_duplicate(table, perceptual_hash)
+							rendition_items = _copy_renditions(duplicate, source_key, target_bucket)
+						if rendition_items is None:
+							duplicate = None
+							rendition_items = _enhance_and_upload(original, source_key, target_bucket)
+				except ImageTooLarge as e:
+					print(f"Image too large ({str(e)}): s3://{source_bucket}/{source_key}")
+					return RecordOutcome([_status_item(record, "TOO_LARGE", source_bucket, source_key)], None, None)
+		items = []
+		if duplicate is None and DEDUP_ENABLED:
+			items += [_dedup_entry(content_hash, source_bucket, source_key, target_bucket, rendition_items) for content_hash in content_hashes]
+		extra = {"ContentHash": content_hashes[0]}
+		if duplicate is not None:
+			extra["DedupOf"] = f"s3://{duplicate['SourceBucket']}/{duplicate['SourceKey']}"
+			extra["DedupHash"] = content_hashes[-1]
+		# The largest rendition in OUTPUT_FORMAT
+		enhanced_key = rendition_items[0]["Key"]
+
+		# Create item metadata
+		image_id = source_key
+		user_id = record.get("userIdentity", {}).get("principalId", "anonymous")
+		item = _metadata_item(
+			image_id=image_id,
+			user_id=user_id,
+			status="ENHANCED",
+			source_bucket=source_bucket,
+			source_key=source_key,
+			enhanced_bucket=target_bucket,
+			enhanced_key=enhanced_key,
+			renditions=rendition_items,
+			extra=extra,
+		)
+		items.append(item)
+
+		# Notify via SNS
+		message = json.dumps(
+			{
+				"status": "ENHANCED",
+				"enhanced_image": {
+					"bucket": target_bucket,
+					"key": enhanced_key,
+					"renditions": [item["Key"] for item in rendition_items],
+				},
+				"source_image": {
+					"bucket": source_bucket,
+					"key": source_key,
+				},
+				"deduplicated_from": extra.get("DedupOf"),
+			}
+		)
+		result = {"source": f"s3://{source_bucket}/{source_key}", "enhanced": f"s3://{target_bucket}/{enhanced_key}"}
+		return RecordOutcome(items, message, result)
+	except Exception as e:
+		# AWS errors, images Pillow cannot read (OSError) or refuses to (DecompressionBombError),
+		# and anything else: one record must not fail the batch. Store failure metadata
+		item = _status_item(record, "FAILED", source_bucket, source_key)
+		print(f"Error processing {source_bucket}/{source_key}: {str(e)}")
+		# Don't re-raise the exception to allow processing of other records
+		return RecordOutcome([item], None, None, failed=True)
+
+
+def _s3_records(body: str) -> list:
+	"""S3 event records in an SQS message body or SNS message.
+
+	The body is an S3 event, or an SNS notification wrapping one when S3 publishes to a
+	topic that the queue subscribes to without raw delivery. S3's test event has no records.
+	"""
+	message = json.loads(body)
+	if message.get("Type") == "Notification" and "Message" in message:
+		message = json.loads(message["Message"])
+	return message.get("Records", [])
+
 
-			# Notify via SNS
-			message = json.dumps(
+def _event_messages(event) -> list:
+	"""(SQS message id, S3 records) for each message in an event.
+
+	Records of an S3 event invoking the Lambda directly, or of an SNS event, have no
+	message id. A message whose body cannot be read has None for its records.
+	"""
+	messages = []
+	for record in event.get("Records", []):
+		source = record.get("eventSource") or record.get("EventSource")
+		if source == "aws:sqs":
+			message_id, body = record["messageId"], record["body"]
+		elif source == "aws:sns":
+			message_id, body = None, record["Sns"]["Message"]
+		else:
+			messages.append((None, [record]))
+			continue
+		try:
+			messages.append((message_id, _s3_records(body)))
+		except (ValueError, AttributeError) as e:
+			print(f"Unreadable message {message_id or ''}: {str(e)}")
+			messages.append((message_id, None))
+	return messages
+
+
+def _failed_records(table, limit: int) -> list:
+	"""S3 event records for up to `limit` images whose metadata item is FAILED.
+
+	The table has no index on Status, so this scans it; replays are an operator action.
+	"""
+	records = []
+	kwargs = {"FilterExpression": Attr("Status").eq("FAILED")}
+	while len(records) < limit:
+		page = table.scan(**kwargs)
+		for item in page["Items"]:
+			records.append(
 				{
-					"status": "ENHANCED",
-					"enhanced_image": {
-						"bucket": target_bucket,
-						"key": enhanced_key,
-					},
-					"source_image": {
-						"bucket": source_bucket,
-						"key": source_key,
-					},
+					"userIdentity": {"principalId": item.get("UserId", "anonymous")},
+					"s3": {"bucket": {"name": item["SourceBucket"]}, "object": {"key": item["SourceKey"]}},
 				}
 			)
-			_publish_sns(SNS_TOPIC_ARN, message)
+		if "LastEvaluatedKey" not in page:
+			break
+		kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+	return records[:limit]
 
-			results.append({"source": f"s3://{source_bucket}/{source_key}", "enhanced": f"s3://{target_bucket}/{enhanced_key}"})
-		except ClientError as e:
-			# Store failure metadata
-			image_id = source_key
-			user_id = record.get("userIdentity", {}).get("principalId", "anonymous")
-			_put_metadata(
-				table=table,
-				image_id=image_id,
-				user_id=user_id,
-				status="FAILED",
-				source_bucket=source_bucket,
-				source_key=source_key,
-				enhanced_bucket="",
-				enhanced_key="",
-			)
-			print(f"Error processing {source_bucket}/{source_key}: {str(e)}")
-			# Don't re-raise the exception to allow processing of other records
-		finally:
-			for p in (local_original, local_enhanced):
-				try:
-					if p and os.path.exists(p):
-						os.remove(p)
-				except Exception:
-					pass
 
-	return {
+def lambda_handler(event, context):
+	"""Enhance the images of an S3 event, delivered directly, through SQS or through SNS.
+
+	For SQS the response lists the messages to retry in batchItemFailures (the event
+	source mapping needs ReportBatchItemFailures); the others are deleted from the queue.
+	Invoked with {"replay": "FAILED"}, it reprocesses the images recorded as FAILED.
+	"""
+	if not (TABLE_NAME and TARGET_BUCKET_NAME):
+		raise RuntimeError("Environment variables TABLE_NAME and TARGET_BUCKET_NAME must be set")
+
+	table = dynamodb.Table(TABLE_NAME)
+
+	if event.get("replay") == "FAILED":
+		messages = [(None, [record]) for record in _failed_records(table, int(event.get("limit", REPLAY_LIMIT)))]
+	else:
+		messages = _event_messages(event)
+	records = [(message_id, record) for message_id, message_records in messages for record in message_records or ()]
+
+	# Records run concurrently; results keep the order of the records
+	with ThreadPoolExecutor(max_workers=max(1, min(MAX_CONCURRENCY, len(records)))) as pool:
+		futures = [pool.submit(_process_record, table, record) for _, record in records]
+		outcomes = [future.result() for future in futures]
+
+	# Metadata and notifications for the whole batch go out in as few calls as possible.
+	# Records whose metadata or notification did not go out are unsent, and retried like failures
+	unsent = set()
+	try:
+		_write_metadata(table, [item for outcome in outcomes for item in outcome.items])
+	except (ClientError, BotoCoreError) as e:
+		# Some of the items may be written; a retry puts them again under the same ImageId
+		print(f"Error writing metadata: {str(e)}")
+		unsent.update(n for n, outcome in enumerate(outcomes) if outcome.items)
+	# Only records whose metadata is stored are announced, so a retry does not announce them twice
+	notified = [n for n, outcome in enumerate(outcomes) if outcome.message and n not in unsent]
+	unsent.update(notified[position] for position in _publish_sns(SNS_TOPIC_ARN, [outcomes[n].message for n in notified]))
+	results = [outcome.result for n, outcome in enumerate(outcomes) if outcome.result and n not in unsent]
+
+	# A message is retried if any of its records failed
+	failed_messages = [message_id for message_id, message_records in messages if message_id and message_records is None]
+	for n, ((message_id, _), outcome) in enumerate(zip(records, outcomes)):
+		if message_id and (outcome.failed or n in unsent) and message_id not in failed_messages:
+			failed_messages.append(message_id)
+	if any(not records[n][0] for n in unsent):
+		# Direct S3 and SNS invocations are asynchronous; raising makes Lambda retry the event
+		raise RuntimeError(f"Metadata or notifications of {len(unsent)} records were not sent")
+
+	response = {
 		"statusCode": 200,
-		"body": json.dumps({"processed": results}),
+		"body": json.dumps({"processed": results, "failed": sum(outcome.failed or n in unsent for n, outcome in enumerate(outcomes))}),
 	}
+	if any(message_id for message_id, _ in messages):
+		response["batchItemFailures"] = [{"itemIdentifier": message_id} for message_id in failed_messages]
+	return response
@@ -110,6 +110,8 @@ data "aws_iam_policy_document" "lambda_policy" {
 		actions = [
 			"dynamodb:PutItem",
 			"dynamodb:GetItem",
+			"dynamodb:BatchWriteItem",
+			"dynamodb:Scan",
 		]
 		resources = [aws_dynamodb_table.image_metadata.arn]
 	}
@@ -122,6 +124,20 @@ data "aws_iam_policy_document" "lambda_policy" {
 		]
 		resources = [aws_sns_topic.notifications.arn]
 	}
+
+	dynamic "statement" {
+		for_each = local.use_sqs ? [1] : []
+		content {
+			sid     = "AllowSQS"
+			effect  = "Allow"
+			actions = [
+				"sqs:ReceiveMessage",
+				"sqs:DeleteMessage",
+				"sqs:GetQueueAttributes",
+			]
+			resources = [aws_sqs_queue.uploads[0].arn]
+		}
+	}
 }
 
 resource "aws_iam_role_policy" "lambda_inline" {
@@ -153,12 +169,17 @@ resource "aws_lambda_function" "image_enhancer" {
 	memory_size   = var.lambda_memory
 	architectures = ["x86_64"]
 
+	ephemeral_storage {
+		size = var.lambda_ephemeral_storage
+	}
+
 	environment {
 		variables = {
 			TABLE_NAME         = aws_dynamodb_table.image_metadata.name
 			SNS_TOPIC_ARN      = aws_sns_topic.notifications.arn
 			TARGET_BUCKET_NAME = aws_s3_bucket.images.bucket
 			ENHANCED_PREFIX    = var.enhanced_prefix
+			MAX_CONCURRENCY    = var.max_concurrency
 		}
 	}
 
@@ -175,16 +196,85 @@ resource "aws_lambda_permission" "allow_s3_invoke" {
 	source_arn    = aws_s3_bucket.images.arn
 }
 
-# S3 -> Lambda notifications on object created
+# S3 -> Lambda (or SQS) notifications on object created
 resource "aws_s3_bucket_notification" "images" {
 	bucket = aws_s3_bucket.images.id
 
-	lambda_function {
-		lambda_function_arn = aws_lambda_function.image_enhancer.arn
-		events              = ["s3:ObjectCreated:*"]
+	dynamic "lambda_function" {
+		for_each = local.use_sqs ? [] : [1]
+		content {
+			lambda_function_arn = aws_lambda_function.image_enhancer.arn
+			events              = ["s3:ObjectCreated:*"]
+		}
+	}
+
+	dynamic "queue" {
+		for_each = local.use_sqs ? [1] : []
+		content {
+			queue_arn = aws_sqs_queue.uploads[0].arn
+			events    = ["s3:ObjectCreated:*"]
+		}
+	}
+
+	depends_on = [aws_lambda_permission.allow_s3_invoke, aws_sqs_queue_policy.uploads]
+}
+
+# -----------------
+# SQS queue (optional): S3 -> SQS -> Lambda in batches of up to sqs_batch_size
+# -----------------
+locals {
+	use_sqs = var.sqs_batch_size > 0
+}
+
+resource "aws_sqs_queue" "uploads_dlq" {
+	count                     = local.use_sqs ? 1 : 0
+	name                      = "${var.project_name}-uploads-dlq"
+	message_retention_seconds = 1209600
+}
+
+resource "aws_sqs_queue" "uploads" {
+	count = local.use_sqs ? 1 : 0
+	name  = "${var.project_name}-uploads"
+	# Six times the function timeout, so messages of a running batch are not handed out again
+	visibility_timeout_seconds = var.lambda_timeout * 6
+	redrive_policy = jsonencode({
+		deadLetterTargetArn = aws_sqs_queue.uploads_dlq[0].arn
+		maxReceiveCount     = var.sqs_max_receive_count
+	})
+}
+
+data "aws_iam_policy_document" "uploads_queue" {
+	count = local.use_sqs ? 1 : 0
+	statement {
+		effect = "Allow"
+		principals {
+			type        = "Service"
+			identifiers = ["s3.amazonaws.com"]
+		}
+		actions   = ["sqs:SendMessage"]
+		resources = [aws_sqs_queue.uploads[0].arn]
+		condition {
+			test     = "ArnEquals"
+			variable = "aws:SourceArn"
+			values   = [aws_s3_bucket.images.arn]
+		}
 	}
+}
 
-	depends_on = [aws_lambda_permission.allow_s3_invoke]
+resource "aws_sqs_queue_policy" "uploads" {
+	count     = local.use_sqs ? 1 : 0
+	queue_url = aws_sqs_queue.uploads[0].id
+	policy    = data.aws_iam_policy_document.uploads_queue[0].json
 }
 
+# Only the messages listed in the function's batchItemFailures are retried
+resource "aws_lambda_event_source_mapping" "uploads" {
+	count                              = local.use_sqs ? 1 : 0
+	event_source_arn                   = aws_sqs_queue.uploads[0].arn
+	function_name                      = aws_lambda_function.image_enhancer.arn
+	batch_size                         = var.sqs_batch_size
+	maximum_batching_window_in_seconds = var.sqs_batch_window
+	function_response_types            = ["ReportBatchItemFailures"]
 
+	depends_on = [aws_iam_role_policy.lambda_inline]
+}
@@ -23,4 +23,7 @@ output "lambda_image_uri" {
 	description = "Lambda container image URI"
 }
 
-
+output "uploads_queue_url" {
+	value       = local.use_sqs ? aws_sqs_queue.uploads[0].id : null
+	description = "SQS queue of uploads, when sqs_batch_size is above 0"
+}
@@ -58,4 +58,34 @@ variable "lambda_memory" {
 	default     = 1024
 }
 
+variable "lambda_ephemeral_storage" {
+	type        = number
+	description = "Lambda /tmp size in MB, which holds downloads above IN_MEMORY_MAX_MB; the default MAX_SOURCE_MB is derived from it"
+	default     = 1024
+}
+
+
+
+variable "max_concurrency" {
+	type        = number
+	description = "S3 records the Lambda processes at once"
+	default     = 8
+}
 
+variable "sqs_batch_size" {
+	type        = number
+	description = "If above 0, S3 sends uploads to an SQS queue and the Lambda reads them in batches of up to this many messages; 0 invokes the Lambda directly from S3"
+	default     = 0
+}
+
+variable "sqs_batch_window" {
+	type        = number
+	description = "Seconds the SQS event source waits to fill a batch (required above 0 for batches over 10)"
+	default     = 5
+}
+
+variable "sqs_max_receive_count" {
+	type        = number
+	description = "Deliveries of an SQS message before it moves to the dead-letter queue"
+	default     = 5
+}
@@ -0,0 +1,36 @@
+"""
+Async DynamoDB client for app.async_main, built on aioboto3.
+
+One session is shared by the process and one client is opened for the lifetime
+of the application (see the lifespan in app.async_main), reusing the same
+botocore tuning as the sync client in app.database.
+"""
+from contextlib import asynccontextmanager
+
+import aioboto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app.database import CLIENT_CONFIG, DYNAMODB_ENDPOINT_URL, DYNAMODB_WARM_UP, get_table_name
+
+_session = aioboto3.Session()
+
+
+@asynccontextmanager
+async def dynamodb_client():
+    """
+    Open an async DynamoDB client; it is closed when the context exits
+    """
+    async with _session.client("dynamodb", config=CLIENT_CONFIG, endpoint_url=DYNAMODB_ENDPOINT_URL) as client:
+        yield client
+
+
+async def warm_up(client):
+    """
+    Open a connection to DynamoDB ahead of the first request; failures are logged and never fatal
+    """
+    if not DYNAMODB_WARM_UP:
+        return
+    try:
+        await client.describe_table(TableName=get_table_name())
+    except (BotoCoreError, ClientError) as e:
+        print(f"DynamoDB warm-up failed: {e}")
@@ -0,0 +1,356 @@
+"""
+Async variant of the Orders API.
+
+Same routes and behaviour as app.main, but handlers are `async def` and share one
+aioboto3 client opened in the application lifespan, so a single process can keep
+many DynamoDB calls in flight without tying up threadpool workers. Intended for
+long-running containers: uvicorn app.async_main:app
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional, Union
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.async_database import dynamodb_client, warm_up
+from app.cache import ORDERS_CACHE_STATS_ENDPOINT, AsyncOrderCache, order_cache
+from app.batch import (
+    DYNAMODB_BATCH_CONCURRENCY,
+    READ_CHUNK_SIZE,
+    WRITE_CHUNK_SIZE,
+    GetChunk,
+    WriteChunk,
+    batch_create_response,
+    batch_get_response,
+    chunks,
+    key_of,
+    retry_delays,
+)
+from app.codec import decode_order, decode_order_summary, encode_order, order_key
+from app.database import get_table_name
+from app.idempotency import create_transaction, replay, request_fingerprint, stored_record
+from app.pagination import encode_token
+from app.queries import (
+    build_order,
+    customer_orders_params,
+    export_scan_params,
+    start_key,
+    status_listing_params,
+    status_update_conflict,
+    status_update_params,
+    with_next_token,
+)
+from app.schemas import (
+    OrderBatchCreate,
+    OrderBatchCreateResponse,
+    OrderBatchGet,
+    OrderBatchGetResponse,
+    OrderCreate,
+    OrderResponse,
+    OrderStatus,
+    OrderSummary,
+    OrderUpdate,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with dynamodb_client() as client:
+        await warm_up(client)
+        app.state.dynamodb = client
+        yield
+
+
+app = FastAPI(title="Orders API", lifespan=lifespan)
+
+# Cache calls awaited from the handlers; Redis round trips run off the event loop
+async_order_cache = AsyncOrderCache(order_cache)
+
+
+def get_client(request: Request):
+    """
+    Get the shared async DynamoDB client
+    """
+    return request.app.state.dynamodb
+
+
+async def _query_pages(dynamodb, params: dict, page_size: Optional[int], start):
+    """
+    Yield (items, last_evaluated_key) for each page of a Query
+    """
+    params = {"TableName": get_table_name(), **params}
+    if page_size:
+        params["Limit"] = page_size
+
+    while True:
+        if start:
+            params["ExclusiveStartKey"] = start
+        response = await dynamodb.query(**params)
+        start = response.get("LastEvaluatedKey")
+        yield response.get("Items", []), start
+        if not start:
+            return
+
+
+async def _parallel_scan(dynamodb, total_segments: int, **scan_params):
+    """
+    Yield pages of items from a Scan split into `total_segments` concurrently read segments
+    """
+    pages = asyncio.Queue(maxsize=total_segments * 2)
+    done = object()
+
+    async def scan_segment(segment):
+        params = {**scan_params, "TableName": get_table_name(), "Segment": segment, "TotalSegments": total_segments}
+        try:
+            while True:
+                response = await dynamodb.scan(**params)
+                await pages.put(response.get("Items", []))
+                if "LastEvaluatedKey" not in response:
+                    return
+                params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        except Exception as e:
+            await pages.put(e)
+        finally:
+            await pages.put(done)
+
+    tasks = [asyncio.create_task(scan_segment(segment)) for segment in range(total_segments)]
+    try:
+        remaining = total_segments
+        while remaining:
+            page = await pages.get()
+            if page is done:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield page
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _ndjson(pages, decode):
+    """
+    Stream pages of items as newline-delimited JSON
+    """
+    async def lines():
+        async for items in pages:
+            for item in items:
+                yield decode(item).model_dump_json() + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def _first_page(pages, decode):
+    """
+    Return (results, next_token) for the first page of a query
+    """
+    items, last_key = await pages.__anext__()
+    await pages.aclose()
+    return [decode(item) for item in items], encode_token(last_key)
+
+
+async def _all_pages(pages, decode):
+    return [decode(item) async for items, _ in pages for item in items], None
+
+
+async def _items(pages):
+    async for items, _ in pages:
+        yield items
+
+
+@app.get("/orders", response_model=List[Union[OrderResponse, OrderSummary]])
+async def get_orders(
+    response: Response,
+    order_status: Optional[OrderStatus] = None,
+    since: Optional[str] = Query(None, description="Earliest order_date (ISO 8601), inclusive"),
+    until: Optional[str] = Query(None, description="Latest order_date (ISO 8601), inclusive"),
+    limit: int = Query(100, ge=1, le=1000),
+    next_token: Optional[str] = None,
+    projection: Literal["full", "summary"] = "full",
+    export: bool = False,
+    segments: int = Query(4, ge=1, le=32),
+    dynamodb=Depends(get_client)
+):
+    """
+    List orders by status and order date, oldest first (see app.main.get_orders)
+    """
+    summary = projection == "summary"
+    decode = decode_order_summary if summary else decode_order
+    
+    if export:
+        scan_params = export_scan_params(order_status, since, until, summary)
+        return _ndjson(_parallel_scan(dynamodb, segments, **scan_params), decode)
+    
+    params = status_listing_params(order_status, since, until, summary)
+    orders, token = await _first_page(_query_pages(dynamodb, params, limit, start_key(next_token)), decode)
+    return with_next_token(response, orders, token)
+
+
+@app.post("/orders", response_model=OrderResponse, status_code=201)
+async def create_order(
+    order: OrderCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    dynamodb=Depends(get_client)
+):
+    """
+    Create a new order. Retries with the same Idempotency-Key return the first call's order.
+    """
+    if not idempotency_key:
+        new_order = build_order(order)
+        await dynamodb.put_item(TableName=get_table_name(), Item=encode_order(new_order))
+        await async_order_cache.order_written(new_order)
+        return new_order
+    
+    fingerprint = request_fingerprint(order)
+    record = await async_order_cache.get_idempotent(order.customer_id, idempotency_key)
+    if record:
+        return replay(response, record, fingerprint)
+    
+    new_order = build_order(order)
+    try:
+        await dynamodb.transact_write_items(TransactItems=create_transaction(new_order, idempotency_key, fingerprint))
+    except dynamodb.exceptions.TransactionCanceledException as e:
+        record = stored_record(e.response)
+        if record is None:
+            raise
+        await async_order_cache.put_idempotent(order.customer_id, idempotency_key, record)
+        return replay(response, record, fingerprint)
+    
+    await async_order_cache.put_idempotent(order.customer_id, idempotency_key, (fingerprint, new_order))
+    await async_order_cache.order_written(new_order)
+    return new_order
+
+
+async def _run_chunk(dynamodb, chunk):
+    """
+    Async counterpart of app.batch.run_chunk
+    """
+    call = getattr(dynamodb, chunk.operation)
+    try:
+        for delay in retry_delays():
+            if delay:
+                await asyncio.sleep(delay)
+            if chunk.record(await call(RequestItems=chunk.request_items())):
+                break
+    except Exception as e:
+        return chunk.result(str(e))
+    return chunk.result()
+
+
+async def _gather_limited(coroutines):
+    """
+    Run coroutines with at most DYNAMODB_BATCH_CONCURRENCY in flight
+    """
+    semaphore = asyncio.Semaphore(DYNAMODB_BATCH_CONCURRENCY)
+
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+
+
+@app.post("/orders:batch", response_model=OrderBatchCreateResponse)
+async def create_orders_batch(batch: OrderBatchCreate, dynamodb=Depends(get_client)):
+    """
+    Create many orders with BatchWriteItem. Each result carries its own status.
+    """
+    new_orders = [build_order(order) for order in batch.orders]
+    items = [encode_order(order) for order in new_orders]
+    failed = {}
+    for chunk_failed in await _gather_limited(
+        _run_chunk(dynamodb, WriteChunk(get_table_name(), chunk)) for chunk in chunks(items, WRITE_CHUNK_SIZE)
+    ):
+        failed.update(chunk_failed)
+    for new_order in new_orders:
+        if (new_order.order_id, new_order.customer_id) not in failed:
+            await async_order_cache.order_written(new_order)
+    return batch_create_response(new_orders, failed)
+
+
+@app.post("/orders:batchGet", response_model=OrderBatchGetResponse)
+async def get_orders_batch(batch: OrderBatchGet, dynamodb=Depends(get_client)):
+    """
+    Get many orders with BatchGetItem, in request order
+    """
+    keys = [order_key(key.order_id, key.customer_id) for key in batch.keys]
+    unique = list({key_of(key): key for key in keys}.values())
+    found, failed = {}, {}
+    for chunk_found, chunk_failed in await _gather_limited(
+        _run_chunk(dynamodb, GetChunk(get_table_name(), chunk)) for chunk in chunks(unique, READ_CHUNK_SIZE)
+    ):
+        found.update(chunk_found)
+        failed.update(chunk_failed)
+    return batch_get_response(batch.keys, found, failed)
+
+
+@app.get("/orders/{order_id}", response_model=OrderResponse)
+async def get_order(order_id: str, customer_id: str, dynamodb=Depends(get_client)):
+    """
+    Get an order by ID and customer ID
+    """
+    cached = await async_order_cache.get_order(order_id, customer_id)
+    if cached:
+        return cached
+    
+    response = await dynamodb.get_item(TableName=get_table_name(), Key=order_key(order_id, customer_id))
+    if "Item" not in response:
+        raise HTTPException(status_code=404, detail="Order not found")
+    order = decode_order(response["Item"])
+    await async_order_cache.put_order(order)
+    return order
+
+
+@app.get("/customers/{customer_id}/orders", response_model=List[Union[OrderResponse, OrderSummary]])
+async def get_customer_orders(
+    customer_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    next_token: Optional[str] = None,
+    projection: Literal["full", "summary"] = "full",
+    stream: bool = False,
+    dynamodb=Depends(get_client)
+):
+    """
+    Get orders for a customer, newest first (see app.main.get_customer_orders)
+    """
+    summary = projection == "summary"
+    decode = decode_order_summary if summary else decode_order
+    if stream:
+        pages = _query_pages(dynamodb, customer_orders_params(customer_id, summary), limit, start_key(next_token))
+        return _ndjson(_items(pages), decode)
+    
+    variant = f"{projection}:{limit}:{next_token}"
+    cached = await async_order_cache.get_customer_orders(customer_id, variant, summary)
+    if cached is None:
+        pages = _query_pages(dynamodb, customer_orders_params(customer_id, summary), limit, start_key(next_token))
+        cached = await (_first_page(pages, decode) if limit else _all_pages(pages, decode))
+        await async_order_cache.put_customer_orders(customer_id, variant, *cached)
+    return with_next_token(response, *cached)
+
+
+@app.put("/orders/{order_id}", response_model=OrderResponse)
+async def update_order_status(order_id: str, order_update: OrderUpdate, dynamodb=Depends(get_client)):
+    """
+    Update an order's status in a single conditional write.
+    Returns 404 if the order does not exist and 409 if the transition or version is rejected.
+    """
+    try:
+        response = await dynamodb.update_item(TableName=get_table_name(), **status_update_params(order_id, order_update))
+    except dynamodb.exceptions.ConditionalCheckFailedException as e:
+        raise status_update_conflict(e.response, order_update)
+    
+    order = decode_order(response["Attributes"])
+    await async_order_cache.order_written(order)
+    return order
+
+
+if ORDERS_CACHE_STATS_ENDPOINT:
+    @app.get("/cache/stats")
+    async def get_cache_stats():
+        """
+        Order cache hit/miss counters and size
+        """
+        return await async_order_cache.stats()
@@ -0,0 +1,211 @@
+"""
+Chunked, concurrent BatchWriteItem/BatchGetItem helpers for the Orders API.
+
+Requests are split into DynamoDB's per-call limits (25 writes, 100 reads),
+chunks run on a small thread pool and unprocessed entries are retried with
+exponential backoff and full jitter. Callers get a per-item outcome back.
+"""
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app.codec import KEY_ATTRIBUTES, decode_order
+from app.database import get_dynamodb_client, get_table_name
+from app.schemas import (
+    BatchItemStatus,
+    OrderBatchCreateResponse,
+    OrderBatchCreateResult,
+    OrderBatchGetResponse,
+    OrderBatchGetResult,
+)
+
+WRITE_CHUNK_SIZE = 25
+READ_CHUNK_SIZE = 100
+
+DYNAMODB_BATCH_CONCURRENCY = int(os.getenv("DYNAMODB_BATCH_CONCURRENCY", "8"))
+DYNAMODB_BATCH_MAX_RETRIES = int(os.getenv("DYNAMODB_BATCH_MAX_RETRIES", "5"))
+DYNAMODB_BATCH_BACKOFF_BASE = float(os.getenv("DYNAMODB_BATCH_BACKOFF_BASE", "0.05"))
+DYNAMODB_BATCH_BACKOFF_CAP = float(os.getenv("DYNAMODB_BATCH_BACKOFF_CAP", "2"))
+
+UNPROCESSED_ERROR = "Unprocessed after retries"
+
+
+def key_of(item):
+    """
+    Hashable primary key of a wire-format item or key
+    """
+    return tuple(item[name]["S"] for name in KEY_ATTRIBUTES)
+
+
+def backoff_delay(attempt):
+    """
+    Full-jitter exponential backoff delay in seconds for a retry attempt (0-based)
+    """
+    return random.uniform(0, min(DYNAMODB_BATCH_BACKOFF_CAP, DYNAMODB_BATCH_BACKOFF_BASE * 2 ** attempt))
+
+
+def chunks(values, size):
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def _run_chunks(fn, batches):
+    if len(batches) == 1:
+        return [fn(batches[0])]
+    with ThreadPoolExecutor(max_workers=min(DYNAMODB_BATCH_CONCURRENCY, len(batches))) as pool:
+        return list(pool.map(fn, batches))
+
+
+def retry_delays():
+    """
+    Seconds to wait before each attempt of a batch call: none before the first,
+    then DYNAMODB_BATCH_MAX_RETRIES backoff delays
+    """
+    yield 0
+    for attempt in range(DYNAMODB_BATCH_MAX_RETRIES):
+        yield backoff_delay(attempt)
+
+
+class WriteChunk:
+    """
+    Pending PutRequests of one BatchWriteItem chunk (up to 25 items)
+    """
+    operation = "batch_write_item"
+
+    def __init__(self, table_name, items):
+        self.table_name = table_name
+        self.pending = [{"PutRequest": {"Item": item}} for item in items]
+
+    def request_items(self):
+        return {self.table_name: self.pending}
+
+    def record(self, response):
+        """
+        Keep the unprocessed requests of a response; True once none are left
+        """
+        self.pending = response.get("UnprocessedItems", {}).get(self.table_name, [])
+        return not self.pending
+
+    def result(self, error=UNPROCESSED_ERROR):
+        """
+        {key: error} for the items that did not land
+        """
+        return {key_of(request["PutRequest"]["Item"]): error for request in self.pending}
+
+
+class GetChunk:
+    """
+    Pending keys of one BatchGetItem chunk (up to 100 keys) and the items found so far
+    """
+    operation = "batch_get_item"
+
+    def __init__(self, table_name, keys):
+        self.table_name = table_name
+        self.pending = {"Keys": keys}
+        self.found = {}
+
+    def request_items(self):
+        return {self.table_name: self.pending}
+
+    def record(self, response):
+        """
+        Collect the items of a response and keep its unprocessed keys; True once none are left
+        """
+        for item in response.get("Responses", {}).get(self.table_name, []):
+            self.found[key_of(item)] = item
+        self.pending = response.get("UnprocessedKeys", {}).get(self.table_name) or {"Keys": []}
+        return not self.pending["Keys"]
+
+    def result(self, error=UNPROCESSED_ERROR):
+        """
+        ({key: item} found, {key: error} failed)
+        """
+        return self.found, {key_of(key): error for key in self.pending["Keys"]}
+
+
+def run_chunk(dynamodb, chunk):
+    """
+    Send a WriteChunk or GetChunk, retrying its unprocessed entries with backoff
+    """
+    call = getattr(dynamodb, chunk.operation)
+    try:
+        for delay in retry_delays():
+            if delay:
+                time.sleep(delay)
+            if chunk.record(call(RequestItems=chunk.request_items())):
+                break
+    except (BotoCoreError, ClientError) as e:
+        return chunk.result(str(e))
+    return chunk.result()
+
+
+def _write_chunk(items):
+    """
+    Write up to 25 items, returning {key: error} for the ones that did not land
+    """
+    return run_chunk(get_dynamodb_client(), WriteChunk(get_table_name(), items))
+
+
+def _get_chunk(keys):
+    """
+    Read up to 100 keys, returning ({key: item} found, {key: error} failed)
+    """
+    return run_chunk(get_dynamodb_client(), GetChunk(get_table_name(), keys))
+
+
+def batch_write_items(items):
+    """
+    Put many wire-format items. Returns {key: error} for items that failed;
+    every other item was written.
+    """
+    failed = {}
+    for chunk_failed in _run_chunks(_write_chunk, chunks(items, WRITE_CHUNK_SIZE)):
+        failed.update(chunk_failed)
+    return failed
+
+
+def batch_get_items(keys):
+    """
+    Get many wire-format keys (duplicates allowed). Returns ({key: item}, {key: error});
+    keys in neither dict do not exist.
+    """
+    unique = list({key_of(key): key for key in keys}.values())
+    found, failed = {}, {}
+    for chunk_found, chunk_failed in _run_chunks(_get_chunk, chunks(unique, READ_CHUNK_SIZE)):
+        found.update(chunk_found)
+        failed.update(chunk_failed)
+    return found, failed
+
+
+def batch_create_response(new_orders, failed):
+    """
+    Per-order results for a batch create, in request order
+    """
+    results = []
+    for new_order in new_orders:
+        error = failed.get((new_order.order_id, new_order.customer_id))
+        if error:
+            results.append(OrderBatchCreateResult(status=BatchItemStatus.FAILED, error=error))
+        else:
+            results.append(OrderBatchCreateResult(status=BatchItemStatus.CREATED, order=new_order))
+    return OrderBatchCreateResponse(results=results)
+
+
+def batch_get_response(keys, found, failed):
+    """
+    Per-key results for a batch lookup, in request order
+    """
+    results = []
+    for key in keys:
+        lookup = (key.order_id, key.customer_id)
+        if lookup in found:
+            results.append(OrderBatchGetResult(
+                **key.model_dump(), status=BatchItemStatus.FOUND, order=decode_order(found[lookup])
+            ))
+        elif lookup in failed:
+            results.append(OrderBatchGetResult(**key.model_dump(), status=BatchItemStatus.FAILED, error=failed[lookup]))
+        else:
+            results.append(OrderBatchGetResult(**key.model_dump(), status=BatchItemStatus.NOT_FOUND))
+    return OrderBatchGetResponse(results=results)
@@ -0,0 +1,255 @@
+"""
+Read-through cache for the Orders API.
+
+get_order and get_customer_orders read through it; creates and status updates
+write the new order through and invalidate the customer's cached listings.
+The default backend is an in-process LRU with a TTL and a size bound. Setting
+ORDERS_CACHE_BACKEND=redis shares one cache across Lambda instances/containers.
+Async handlers go through AsyncOrderCache, which keeps Redis round trips off the
+event loop.
+
+Customer listings are cached under a per-customer generation id, so invalidating
+every cached page for a customer is a single write of a fresh generation.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from app.schemas import OrderResponse, OrderSummary
+
+ORDERS_CACHE_BACKEND = os.getenv("ORDERS_CACHE_BACKEND", "memory")
+ORDERS_CACHE_TTL = float(os.getenv("ORDERS_CACHE_TTL", "5"))
+ORDERS_CACHE_MAX_ITEMS = int(os.getenv("ORDERS_CACHE_MAX_ITEMS", "10000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Prefix of every cache key in Redis, so the cache's entries can be told apart from other data
+ORDERS_CACHE_REDIS_PREFIX = os.getenv("ORDERS_CACHE_REDIS_PREFIX", "orders-cache:")
+# Serve GET /cache/stats; off by default, as it is unauthenticated
+ORDERS_CACHE_STATS_ENDPOINT = os.getenv("ORDERS_CACHE_STATS_ENDPOINT", "false").lower() == "true"
+
+
+class MemoryBackend:
+    """
+    Thread-safe in-process LRU with a per-entry TTL. Values are stored as-is.
+    """
+
+    def __init__(self, max_items: int, ttl: float):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load=None):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, dump=None, ttl=None):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + (ttl or self.ttl))
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def size(self):
+        return len(self._items)
+
+
+class RedisBackend:
+    """
+    Redis-backed cache shared between processes. Values go through the dump/load
+    functions supplied by the caller.
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = ORDERS_CACHE_REDIS_PREFIX):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("ORDERS_CACHE_BACKEND=redis requires the redis package") from e
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key, load=None):
+        raw = self._redis.get(self.prefix + key)
+        if raw is None:
+            return None
+        return load(raw) if load else raw.decode()
+
+    def set(self, key, value, dump=None, ttl=None):
+        self._redis.set(self.prefix + key, dump(value) if dump else value, px=int((ttl or self.ttl) * 1000))
+
+    def delete(self, key):
+        self._redis.delete(self.prefix + key)
+
+    def size(self):
+        """
+        Number of cache keys, counted with SCAN over the prefix; the database may hold other data
+        """
+        return sum(1 for _ in self._redis.scan_iter(match=self.prefix + "*", count=1000))
+
+
+class NullBackend:
+    """
+    Cache that never stores anything (ORDERS_CACHE_BACKEND=none)
+    """
+
+    def get(self, key, load=None):
+        return None
+
+    def set(self, key, value, dump=None, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def size(self):
+        return 0
+
+
+def _dump_page(page):
+    orders, next_token = page
+    return json.dumps({"orders": [order.model_dump(mode="json") for order in orders], "next_token": next_token})
+
+
+def _load_page(model):
+    def load(raw):
+        page = json.loads(raw)
+        return [model.model_validate(order) for order in page["orders"]], page["next_token"]
+    return load
+
+
+def _dump_idempotent(record):
+    fingerprint, order = record
+    return json.dumps({"request_hash": fingerprint, "order": order.model_dump(mode="json")})
+
+
+def _load_idempotent(raw):
+    record = json.loads(raw)
+    return record["request_hash"], OrderResponse.model_validate(record["order"])
+
+
+class OrderCache:
+    """
+    Order-level cache operations with hit/miss counters
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._counts = {"order": [0, 0], "customer_orders": [0, 0], "idempotency": [0, 0]}
+        self._lock = threading.Lock()
+
+    def _count(self, kind, hit):
+        with self._lock:
+            self._counts[kind][0 if hit else 1] += 1
+
+    def get_order(self, order_id: str, customer_id: str):
+        order = self.backend.get(f"order:{order_id}:{customer_id}", OrderResponse.model_validate_json)
+        self._count("order", order is not None)
+        return order
+
+    def put_order(self, order: OrderResponse):
+        self.backend.set(f"order:{order.order_id}:{order.customer_id}", order, OrderResponse.model_dump_json)
+
+    def _generation(self, customer_id: str):
+        key = f"customer-generation:{customer_id}"
+        generation = self.backend.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.backend.set(key, generation)
+        return generation
+
+    def _page_key(self, customer_id: str, variant: str):
+        return f"customer-orders:{customer_id}:{self._generation(customer_id)}:{variant}"
+
+    def get_customer_orders(self, customer_id: str, variant: str, summary: bool):
+        """
+        Cached (orders, next_token) for one listing variant (projection/limit/cursor) of a customer
+        """
+        page = self.backend.get(
+            self._page_key(customer_id, variant), _load_page(OrderSummary if summary else OrderResponse)
+        )
+        self._count("customer_orders", page is not None)
+        return page
+
+    def put_customer_orders(self, customer_id: str, variant: str, orders, next_token):
+        self.backend.set(self._page_key(customer_id, variant), (orders, next_token), _dump_page)
+
+    def invalidate_customer(self, customer_id: str):
+        """
+        Drop every cached listing of a customer's orders
+        """
+        self.backend.set(f"customer-generation:{customer_id}", uuid.uuid4().hex)
+
+    def order_written(self, order: OrderResponse):
+        """
+        Write an order through to the cache after it was created or updated
+        """
+        self.put_order(order)
+        self.invalidate_customer(order.customer_id)
+
+    def get_idempotent(self, customer_id: str, idempotency_key: str):
+        """
+        Cached (fingerprint, order) of an Idempotency-Key request
+        """
+        record = self.backend.get(f"idempotency:{customer_id}:{idempotency_key}", _load_idempotent)
+        self._count("idempotency", record is not None)
+        return record
+
+    def put_idempotent(self, customer_id: str, idempotency_key: str, record):
+        self.backend.set(f"idempotency:{customer_id}:{idempotency_key}", record, _dump_idempotent)
+
+    def stats(self):
+        with self._lock:
+            counts = {kind: {"hits": hits, "misses": misses} for kind, (hits, misses) in self._counts.items()}
+        for values in counts.values():
+            lookups = values["hits"] + values["misses"]
+            values["hit_ratio"] = round(values["hits"] / lookups, 4) if lookups else None
+        return {"backend": ORDERS_CACHE_BACKEND, "entries": self.backend.size(), **counts}
+
+
+class AsyncOrderCache:
+    """
+    OrderCache for async handlers. Every method is awaited; with a backend that does
+    network I/O (Redis) it runs in a worker thread, so a cache round trip does not
+    block the event loop, and the in-process backends are called directly.
+    """
+
+    def __init__(self, cache: OrderCache):
+        self.cache = cache
+        self.blocking = isinstance(cache.backend, RedisBackend)
+
+    def __getattr__(self, name):
+        method = getattr(self.cache, name)
+
+        async def call(*args, **kwargs):
+            if self.blocking:
+                return await asyncio.to_thread(method, *args, **kwargs)
+            return method(*args, **kwargs)
+
+        return call
+
+
+def _create_backend():
+    if ORDERS_CACHE_BACKEND == "redis":
+        return RedisBackend(REDIS_URL, ORDERS_CACHE_TTL)
+    if ORDERS_CACHE_BACKEND == "none":
+        return NullBackend()
+    return MemoryBackend(ORDERS_CACHE_MAX_ITEMS, ORDERS_CACHE_TTL)
+
+
+order_cache = OrderCache(_create_backend())
@@ -0,0 +1,131 @@
+"""
+DynamoDB item codec for the Orders API.
+
+Encoders and decoders are compiled from the pydantic schemas once at import,
+so handlers never build or parse the {"S": ...} / {"N": ...} wire format by hand.
+Numbers round-trip through Decimal and decoded items become response models
+directly, skipping validation (the data was validated when it was written).
+"""
+import typing
+from decimal import Decimal
+from enum import Enum
+
+from pydantic import BaseModel
+
+from app.schemas import OPEN_ORDER_STATUSES, OrderResponse, OrderSummary
+
+_object_setattr = object.__setattr__
+
+
+def _scalar_codec(annotation):
+    if annotation is str:
+        return (lambda v: {"S": v}), (lambda a: a["S"])
+    if annotation is int:
+        return (lambda v: {"N": str(v)}), (lambda a: int(a["N"]))
+    if annotation is Decimal:
+        return (lambda v: {"N": str(v)}), (lambda a: Decimal(a["N"]))
+    if annotation is bool:
+        return (lambda v: {"BOOL": v}), (lambda a: a["BOOL"])
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        members = annotation._value2member_map_
+        return (lambda v: {"S": v.value}), (lambda a: members[a["S"]])
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        encode_model, decode_model = compile_encoder(annotation), compile_decoder(annotation)
+        return (lambda v: {"M": encode_model(v)}), (lambda a: decode_model(a["M"]))
+    raise TypeError(f"No DynamoDB codec for {annotation!r}")
+
+
+def _field_codec(annotation):
+    """
+    Build an (encode, decode) pair for a single attribute of the given type
+    """
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin is typing.Union and type(None) in args:
+        (inner,) = [a for a in args if a is not type(None)]
+        encode_inner, decode_inner = _field_codec(inner)
+        return (
+            lambda v: {"NULL": True} if v is None else encode_inner(v),
+            lambda a: None if "NULL" in a else decode_inner(a),
+        )
+
+    if origin in (list, typing.List):
+        encode_inner, decode_inner = _field_codec(args[0])
+        return (
+            lambda v: {"L": [encode_inner(x) for x in v]},
+            lambda a: [decode_inner(x) for x in a["L"]],
+        )
+
+    return _scalar_codec(annotation)
+
+
+def compile_encoder(model):
+    """
+    Compile a function turning an instance of `model` into a DynamoDB attribute map
+    """
+    fields = tuple((name, _field_codec(field.annotation)[0]) for name, field in model.model_fields.items())
+
+    def encode(obj):
+        # None is stored as a missing attribute, not NULL
+        values = obj.__dict__
+        return {name: enc(values[name]) for name, enc in fields if values.get(name) is not None}
+
+    return encode
+
+
+def compile_decoder(model):
+    """
+    Compile a function turning a DynamoDB attribute map into an instance of `model`.
+    Optional attributes missing from the item take their default; required ones
+    missing from the item (e.g. under a projection) are left unset.
+    """
+    fields = tuple((name, _field_codec(field.annotation)[1]) for name, field in model.model_fields.items())
+    defaults = tuple((name, field.default) for name, field in model.model_fields.items() if not field.is_required())
+    new = model.__new__
+
+    def decode(item):
+        # Same end state as model.model_construct(), without its per-call bookkeeping
+        values = {name: dec(item[name]) for name, dec in fields if name in item}
+        fields_set = set(values)
+        for name, default in defaults:
+            if name not in values:
+                values[name] = default
+        obj = new(model)
+        _object_setattr(obj, "__dict__", values)
+        _object_setattr(obj, "__pydantic_fields_set__", fields_set)
+        _object_setattr(obj, "__pydantic_extra__", None)
+        _object_setattr(obj, "__pydantic_private__", None)
+        return obj
+
+    return decode
+
+
+_encode_order_fields = compile_encoder(OrderResponse)
+decode_order = compile_decoder(OrderResponse)
+decode_order_summary = compile_decoder(OrderSummary)
+
+SUMMARY_PROJECTION = ", ".join(OrderSummary.model_fields)
+
+
+KEY_ATTRIBUTES = ("order_id", "customer_id")
+
+# Copy of order_status that only exists while the order is open, keying the sparse status index
+OPEN_STATUS_ATTRIBUTE = "open_status"
+
+
+def encode_order(order):
+    """
+    Encode an order as a DynamoDB item, including its index attributes
+    """
+    item = _encode_order_fields(order)
+    if order.order_status in OPEN_ORDER_STATUSES:
+        item[OPEN_STATUS_ATTRIBUTE] = {"S": order.order_status.value}
+    return item
+
+
+def order_key(order_id: str, customer_id: str):
+    """
+    Primary key of an order in the wire format
+    """
+    return {"order_id": {"S": order_id}, "customer_id": {"S": customer_id}}
@@ -1,5 +1,8 @@
 import boto3
 import os
+import threading
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -8,14 +11,99 @@ load_dotenv()
 # Get table name from environment variable
 DYNAMODB_TABLE = os.getenv("DYNAMODB_TABLE", "orders")
 
+# Records of Idempotency-Key requests, expired by DynamoDB TTL
+DYNAMODB_IDEMPOTENCY_TABLE = os.getenv("DYNAMODB_IDEMPOTENCY_TABLE", "orders-idempotency")
+
+# GSI keyed on customer_id (hash) and order_date (range)
+DYNAMODB_CUSTOMER_INDEX = os.getenv("DYNAMODB_CUSTOMER_INDEX", "customer_id-order_date-index")
+
+# Sparse GSI keyed on open_status (hash) and order_date (range); only open orders carry open_status
+DYNAMODB_STATUS_INDEX = os.getenv("DYNAMODB_STATUS_INDEX", "open_status-order_date-index")
+
+# Client tuning, overridable per deployment
+DYNAMODB_MAX_POOL_CONNECTIONS = int(os.getenv("DYNAMODB_MAX_POOL_CONNECTIONS", "50"))
+DYNAMODB_CONNECT_TIMEOUT = float(os.getenv("DYNAMODB_CONNECT_TIMEOUT", "1"))
+DYNAMODB_READ_TIMEOUT = float(os.getenv("DYNAMODB_READ_TIMEOUT", "3"))
+DYNAMODB_MAX_ATTEMPTS = int(os.getenv("DYNAMODB_MAX_ATTEMPTS", "3"))
+DYNAMODB_RETRY_MODE = os.getenv("DYNAMODB_RETRY_MODE", "adaptive")
+DYNAMODB_WARM_UP = os.getenv("DYNAMODB_WARM_UP", "true").lower() == "true"
+
+# Point at DynamoDB Local or another stand-in instead of AWS
+DYNAMODB_ENDPOINT_URL = os.getenv("DYNAMODB_ENDPOINT_URL") or None
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=DYNAMODB_MAX_POOL_CONNECTIONS,
+    connect_timeout=DYNAMODB_CONNECT_TIMEOUT,
+    read_timeout=DYNAMODB_READ_TIMEOUT,
+    tcp_keepalive=True,
+    retries={"mode": DYNAMODB_RETRY_MODE, "max_attempts": DYNAMODB_MAX_ATTEMPTS},
+)
+
+# One client per process, shared by every request (boto3 clients are thread-safe)
+_client = None
+_client_lock = threading.Lock()
+
+
 def get_dynamodb_client():
     """
-    Get DynamoDB client
+    Get the shared DynamoDB client, creating it on first use
     """
-    return boto3.client('dynamodb')
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = boto3.session.Session().client(
+                    "dynamodb", config=CLIENT_CONFIG, endpoint_url=DYNAMODB_ENDPOINT_URL
+                )
+    return _client
+
+
+def reset_dynamodb_client():
+    """
+    Drop the shared client so the next call builds a fresh one
+    """
+    global _client
+    with _client_lock:
+        _client = None
+
+
+def warm_up():
+    """
+    Create the client and open a connection to DynamoDB ahead of the first request.
+    Meant to run once at cold start; failures are logged and never fatal.
+    """
+    client = get_dynamodb_client()
+    if not DYNAMODB_WARM_UP:
+        return
+    try:
+        client.describe_table(TableName=get_table_name())
+    except (BotoCoreError, ClientError) as e:
+        print(f"DynamoDB warm-up failed: {e}")
+
 
 def get_table_name():
     """
     Get DynamoDB table name
     """
     return DYNAMODB_TABLE
+
+
+def get_idempotency_table_name():
+    """
+    Get the name of the idempotency record table
+    """
+    return DYNAMODB_IDEMPOTENCY_TABLE
+
+
+def get_customer_index_name():
+    """
+    Get the name of the customer/order_date index
+    """
+    return DYNAMODB_CUSTOMER_INDEX
+
+
+def get_status_index_name():
+    """
+    Get the name of the open_status/order_date index
+    """
+    return DYNAMODB_STATUS_INDEX
@@ -0,0 +1,66 @@
+"""
+Parallel full-table export for the Orders API.
+
+The table is read with Scan Segment/TotalSegments across a small worker pool.
+Pages are handed to the caller through a bounded queue as soon as they arrive,
+so an export never holds more than a few pages in memory.
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.database import get_dynamodb_client, get_table_name
+
+_DONE = object()
+
+
+def parallel_scan(total_segments: int, **scan_params):
+    """
+    Yield pages of items from a Scan split into `total_segments` segments.
+    Extra keyword arguments (FilterExpression, ProjectionExpression, ...) are passed to every Scan call.
+    """
+    dynamodb = get_dynamodb_client()
+    table_name = get_table_name()
+    pages = queue.Queue(maxsize=total_segments * 2)
+    stop = threading.Event()
+
+    def put(value):
+        # Give up if the consumer went away, instead of blocking forever on a full queue
+        while not stop.is_set():
+            try:
+                pages.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def scan_segment(segment):
+        params = {**scan_params, "TableName": table_name, "Segment": segment, "TotalSegments": total_segments}
+        try:
+            while True:
+                response = dynamodb.scan(**params)
+                if not put(response.get("Items", [])):
+                    return
+                if "LastEvaluatedKey" not in response:
+                    return
+                params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        except Exception as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    with ThreadPoolExecutor(max_workers=total_segments) as pool:
+        for segment in range(total_segments):
+            pool.submit(scan_segment, segment)
+        try:
+            remaining = total_segments
+            while remaining:
+                page = pages.get()
+                if page is _DONE:
+                    remaining -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    yield page
+        finally:
+            stop.set()
@@ -0,0 +1,90 @@
+"""
+Idempotent order creation for POST /orders with an Idempotency-Key header.
+
+The order and a small idempotency record are written in one TransactWriteItems
+call. The record put is conditional on the key being unused, so a retry cancels
+the transaction instead of writing a second order, and the cancellation reason
+carries the stored record back (ReturnValuesOnConditionCheckFailure), which is
+replayed as the response. Records expire through DynamoDB TTL on `expires_at`.
+"""
+import hashlib
+import os
+import time
+
+from fastapi import HTTPException, Response
+
+from app.codec import decode_order, encode_order
+from app.database import get_idempotency_table_name, get_table_name
+from app.schemas import OrderCreate, OrderResponse
+
+# How long a key keeps returning the original order
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+
+def request_fingerprint(order: OrderCreate) -> str:
+    """
+    Hash of the request body, to reject a key reused with a different request
+    """
+    return hashlib.sha256(order.model_dump_json().encode()).hexdigest()
+
+
+def record_key(customer_id: str, idempotency_key: str):
+    """
+    Key of an idempotency record in the wire format; keys are scoped to the customer
+    """
+    return {"idempotency_key": {"S": f"{customer_id}#{idempotency_key}"}}
+
+
+def create_transaction(new_order: OrderResponse, idempotency_key: str, fingerprint: str):
+    """
+    TransactItems writing the order together with its idempotency record
+    """
+    now = int(time.time())
+    record = {
+        **record_key(new_order.customer_id, idempotency_key),
+        "request_hash": {"S": fingerprint},
+        "order": {"M": encode_order(new_order)},
+        "expires_at": {"N": str(now + IDEMPOTENCY_TTL_SECONDS)},
+    }
+    return [
+        {"Put": {"TableName": get_table_name(), "Item": encode_order(new_order)}},
+        {
+            "Put": {
+                "TableName": get_idempotency_table_name(),
+                "Item": record,
+                # TTL deletion lags expiry, so an expired record counts as unused
+                "ConditionExpression": "attribute_not_exists(idempotency_key) OR expires_at < :now",
+                "ExpressionAttributeValues": {":now": {"N": str(now)}},
+                "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+            }
+        },
+    ]
+
+
+def stored_record(error_response: dict):
+    """
+    (fingerprint, order) of the record that cancelled the transaction, or None if the
+    transaction failed for another reason. 409 while a request with the same key is
+    still being written.
+    """
+    reasons = error_response.get("CancellationReasons") or []
+    if len(reasons) < 2:
+        return None
+    reason = reasons[1]
+    if reason.get("Code") == "TransactionConflict":
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is already in progress")
+    if reason.get("Code") != "ConditionalCheckFailed" or "Item" not in reason:
+        return None
+    item = reason["Item"]
+    return item["request_hash"]["S"], decode_order(item["order"]["M"])
+
+
+def replay(response: Response, record, fingerprint: str) -> OrderResponse:
+    """
+    Return the order stored under a key, or 422 if the key was used for a different request
+    """
+    stored_fingerprint, order = record
+    if stored_fingerprint != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    response.headers["Idempotent-Replayed"] = "true"
+    return order
@@ -1,243 +1,254 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Response
+from fastapi.responses import StreamingResponse
 from mangum import Mangum
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 import os
-import uuid
-from datetime import datetime
 
-from app.database import get_dynamodb_client, get_table_name
-from app.schemas import OrderCreate, OrderResponse, OrderUpdate, OrderStatus
+from app.cache import ORDERS_CACHE_STATS_ENDPOINT, order_cache
+from app.batch import batch_create_response, batch_get_items, batch_get_response, batch_write_items
+from app.codec import decode_order, decode_order_summary, encode_order, order_key
+from app.database import get_dynamodb_client, get_table_name, warm_up
+from app.export import parallel_scan
+from app.idempotency import create_transaction, replay, request_fingerprint, stored_record
+from app.pagination import encode_token
+from app.queries import (
+    build_order,
+    customer_orders_params,
+    export_scan_params,
+    start_key,
+    status_listing_params,
+    status_update_conflict,
+    status_update_params,
+    with_next_token,
+)
+from app.schemas import (
+    OrderBatchCreate,
+    OrderBatchCreateResponse,
+    OrderBatchGet,
+    OrderBatchGetResponse,
+    OrderCreate,
+    OrderResponse,
+    OrderStatus,
+    OrderSummary,
+    OrderUpdate,
+)
 
 app = FastAPI(title="Orders API")
-@app.get("/orders")
-def get_orders():
+
+# Build the DynamoDB client during Lambda init instead of on the first request
+warm_up()
+
+@app.get("/orders", response_model=List[Union[OrderResponse, OrderSummary]])
+def get_orders(
+    response: Response,
+    order_status: Optional[OrderStatus] = None,
+    since: Optional[str] = Query(None, description="Earliest order_date (ISO 8601), inclusive"),
+    until: Optional[str] = Query(None, description="Latest order_date (ISO 8601), inclusive"),
+    limit: int = Query(100, ge=1, le=1000),
+    next_token: Optional[str] = None,
+    projection: Literal["full", "summary"] = "full",
+    export: bool = False,
+    segments: int = Query(4, ge=1, le=32)
+):
     """
-    Get all orders
+    List orders by status and order date, oldest first.
+
+    Open orders (PENDING, PROCESSING, SHIPPED) are served from the sparse status index,
+    one page of `limit` orders at a time with the next cursor in the X-Next-Token header.
+    `export=true` streams every matching order as NDJSON using a parallel Scan split into
+    `segments` segments; use it for full-table jobs and for closed statuses.
     """
-    print("Hello, World!")
-    return {"message": "orders get"}
+    summary = projection == "summary"
+    decode = decode_order_summary if summary else decode_order
+    
+    if export:
+        return _ndjson(parallel_scan(segments, **export_scan_params(order_status, since, until, summary)), decode)
+    
+    params = status_listing_params(order_status, since, until, summary)
+    orders, token = _first_page(_query_pages(params, limit, start_key(next_token)), decode)
+    return with_next_token(response, orders, token)
 
 @app.post("/orders", response_model=OrderResponse, status_code=201)
-def create_order(order: OrderCreate):
+def create_order(
+    order: OrderCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=255)
+):
     """
-    Create a new order
+    Create a new order.
+
+    With an Idempotency-Key header, retries of the same request return the order
+    created by the first call instead of creating another one.
     """
     dynamodb = get_dynamodb_client()
     table_name = get_table_name()
     
-    # Generate a new order ID
-    order_id = str(uuid.uuid4())
-    
-    # Calculate total amount from items
-    total_amount = sum(item.price_per_unit * item.quantity for item in order.items)
-    
-    # Current timestamp
-    timestamp = datetime.utcnow().isoformat()
-    
-    # Create order item for DynamoDB
-    order_item = {
-        "order_id": order_id,
-        "customer_id": order.customer_id,
-        "order_date": timestamp,
-        "order_status": OrderStatus.PENDING.value,
-        "total_amount": total_amount,
-        "shipping_address": {
-            "street": order.shipping_address.street,
-            "city": order.shipping_address.city,
-            "zip_code": order.shipping_address.zip_code,
-            "country": order.shipping_address.country
-        },
-        "items": [
-            {
-                "product_id": item.product_id,
-                "quantity": item.quantity,
-                "price_per_unit": item.price_per_unit
-            } for item in order.items
-        ]
-    }
-    
-    # Put item in DynamoDB
-    dynamodb.put_item(
-        TableName=table_name,
-        Item={
-            "order_id": {"S": order_id},
-            "customer_id": {"S": order.customer_id},
-            "order_date": {"S": timestamp},
-            "order_status": {"S": OrderStatus.PENDING.value},
-            "total_amount": {"N": str(total_amount)},
-            "shipping_address": {"M": {
-                "street": {"S": order.shipping_address.street},
-                "city": {"S": order.shipping_address.city},
-                "zip_code": {"S": order.shipping_address.zip_code},
-                "country": {"S": order.shipping_address.country}
-            }},
-            "items": {"L": [
-                {"M": {
-                    "product_id": {"S": item.product_id},
-                    "quantity": {"N": str(item.quantity)},
-                    "price_per_unit": {"N": str(item.price_per_unit)}
-                }} for item in order.items
-            ]}
-        }
-    )
-    
-    # Return the created order
-    return OrderResponse(
-        order_id=order_id,
-        customer_id=order.customer_id,
-        order_date=timestamp,
-        order_status=OrderStatus.PENDING,
-        total_amount=total_amount,
-        shipping_address=order.shipping_address,
-        items=order.items
-    )
+    if not idempotency_key:
+        new_order = build_order(order)
+        
+        # Put item in DynamoDB
+        dynamodb.put_item(TableName=table_name, Item=encode_order(new_order))
+        order_cache.order_written(new_order)
+        
+        return new_order
+    
+    fingerprint = request_fingerprint(order)
+    record = order_cache.get_idempotent(order.customer_id, idempotency_key)
+    if record:
+        return replay(response, record, fingerprint)
+    
+    new_order = build_order(order)
+    try:
+        dynamodb.transact_write_items(TransactItems=create_transaction(new_order, idempotency_key, fingerprint))
+    except dynamodb.exceptions.TransactionCanceledException as e:
+        record = stored_record(e.response)
+        if record is None:
+            raise
+        order_cache.put_idempotent(order.customer_id, idempotency_key, record)
+        return replay(response, record, fingerprint)
+    
+    order_cache.put_idempotent(order.customer_id, idempotency_key, (fingerprint, new_order))
+    order_cache.order_written(new_order)
+    return new_order
+
+@app.post("/orders:batch", response_model=OrderBatchCreateResponse)
+def create_orders_batch(batch: OrderBatchCreate):
+    """
+    Create many orders with BatchWriteItem. Each result carries its own status.
+    """
+    new_orders = [build_order(order) for order in batch.orders]
+    failed = batch_write_items([encode_order(order) for order in new_orders])
+    for new_order in new_orders:
+        if (new_order.order_id, new_order.customer_id) not in failed:
+            order_cache.order_written(new_order)
+    return batch_create_response(new_orders, failed)
+
+@app.post("/orders:batchGet", response_model=OrderBatchGetResponse)
+def get_orders_batch(batch: OrderBatchGet):
+    """
+    Get many orders with BatchGetItem, in request order
+    """
+    found, failed = batch_get_items([order_key(key.order_id, key.customer_id) for key in batch.keys])
+    return batch_get_response(batch.keys, found, failed)
 
 @app.get("/orders/{order_id}", response_model=OrderResponse)
 def get_order(order_id: str, customer_id: str):
     """
     Get an order by ID and customer ID
     """
+    cached = order_cache.get_order(order_id, customer_id)
+    if cached:
+        return cached
+    
     dynamodb = get_dynamodb_client()
     table_name = get_table_name()
     
     # Get item from DynamoDB
     response = dynamodb.get_item(
         TableName=table_name,
-        Key={
-            "order_id": {"S": order_id},
-            "customer_id": {"S": customer_id}
-        }
+        Key=order_key(order_id, customer_id)
     )
     
     # Check if item exists
     if "Item" not in response:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    # Parse DynamoDB response
-    item = response["Item"]
-    
-    return OrderResponse(
-        order_id=item["order_id"]["S"],
-        customer_id=item["customer_id"]["S"],
-        order_date=item["order_date"]["S"],
-        order_status=OrderStatus(item["order_status"]["S"]),
-        total_amount=float(item["total_amount"]["N"]),
-        shipping_address={
-            "street": item["shipping_address"]["M"]["street"]["S"],
-            "city": item["shipping_address"]["M"]["city"]["S"],
-            "zip_code": item["shipping_address"]["M"]["zip_code"]["S"],
-            "country": item["shipping_address"]["M"]["country"]["S"]
-        },
-        items=[
-            {
-                "product_id": i["M"]["product_id"]["S"],
-                "quantity": int(i["M"]["quantity"]["N"]),
-                "price_per_unit": float(i["M"]["price_per_unit"]["N"])
-            } for i in item["items"]["L"]
-        ]
-    )
+    order = decode_order(response["Item"])
+    order_cache.put_order(order)
+    return order
 
-@app.get("/customers/{customer_id}/orders", response_model=List[OrderResponse])
-def get_customer_orders(customer_id: str):
+def _query_pages(params: dict, page_size: Optional[int], start_key):
     """
-    Get all orders for a customer
+    Yield (items, last_evaluated_key) for each page of a Query
     """
     dynamodb = get_dynamodb_client()
-    table_name = get_table_name()
-    
-    # Query DynamoDB
-    response = dynamodb.query(
-        TableName=table_name,
-        KeyConditionExpression="customer_id = :customer_id",
-        ExpressionAttributeValues={
-            ":customer_id": {"S": customer_id}
-        }
-    )
-    
-    # Parse DynamoDB response
-    orders = []
-    for item in response.get("Items", []):
-        orders.append(OrderResponse(
-            order_id=item["order_id"]["S"],
-            customer_id=item["customer_id"]["S"],
-            order_date=item["order_date"]["S"],
-            order_status=OrderStatus(item["order_status"]["S"]),
-            total_amount=float(item["total_amount"]["N"]),
-            shipping_address={
-                "street": item["shipping_address"]["M"]["street"]["S"],
-                "city": item["shipping_address"]["M"]["city"]["S"],
-                "zip_code": item["shipping_address"]["M"]["zip_code"]["S"],
-                "country": item["shipping_address"]["M"]["country"]["S"]
-            },
-            items=[
-                {
-                    "product_id": i["M"]["product_id"]["S"],
-                    "quantity": int(i["M"]["quantity"]["N"]),
-                    "price_per_unit": float(i["M"]["price_per_unit"]["N"])
-                } for i in item["items"]["L"]
-            ]
-        ))
-    
-    return orders
+    params = {"TableName": get_table_name(), **params}
+    if page_size:
+        params["Limit"] = page_size
+
+    while True:
+        if start_key:
+            params["ExclusiveStartKey"] = start_key
+        response = dynamodb.query(**params)
+        start_key = response.get("LastEvaluatedKey")
+        yield response.get("Items", []), start_key
+        if not start_key:
+            return
+
+def _ndjson(pages, decode):
+    """
+    Stream pages of items as newline-delimited JSON
+    """
+    def lines():
+        for items in pages:
+            for item in items:
+                yield decode(item).model_dump_json() + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+def _first_page(pages, decode):
+    """
+    Return (results, next_token) for the first page of a query
+    """
+    items, last_key = next(pages)
+    return [decode(item) for item in items], encode_token(last_key)
+
+def _all_pages(pages, decode):
+    return [decode(item) for items, _ in pages for item in items], None
+
+@app.get("/customers/{customer_id}/orders", response_model=List[Union[OrderResponse, OrderSummary]])
+def get_customer_orders(
+    customer_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    next_token: Optional[str] = None,
+    projection: Literal["full", "summary"] = "full",
+    stream: bool = False
+):
+    """
+    Get orders for a customer, newest first.
+
+    Without `limit` every order is returned. With `limit` one page is returned and
+    the cursor for the next page is sent in the X-Next-Token header. `stream=true`
+    writes NDJSON page by page (using `limit` as the page size) until the history ends.
+    """
+    summary = projection == "summary"
+    decode = decode_order_summary if summary else decode_order
+    if stream:
+        pages = _query_pages(customer_orders_params(customer_id, summary), limit, start_key(next_token))
+        return _ndjson((items for items, _ in pages), decode)
+    
+    variant = f"{projection}:{limit}:{next_token}"
+    cached = order_cache.get_customer_orders(customer_id, variant, summary)
+    if cached is None:
+        pages = _query_pages(customer_orders_params(customer_id, summary), limit, start_key(next_token))
+        cached = _first_page(pages, decode) if limit else _all_pages(pages, decode)
+        order_cache.put_customer_orders(customer_id, variant, *cached)
+    return with_next_token(response, *cached)
 
 @app.put("/orders/{order_id}", response_model=OrderResponse)
 def update_order_status(order_id: str, order_update: OrderUpdate):
     """
-    Update an order's status
+    Update an order's status in a single conditional write.
+    Returns 404 if the order does not exist and 409 if the transition or version is rejected.
     """
     dynamodb = get_dynamodb_client()
-    table_name = get_table_name()
     
-    # Get item from DynamoDB to check if it exists
-    response = dynamodb.get_item(
-        TableName=table_name,
-        Key={
-            "order_id": {"S": order_id},
-            "customer_id": {"S": order_update.customer_id}
-        }
-    )
-    
-    # Check if item exists
-    if "Item" not in response:
-        raise HTTPException(status_code=404, detail="Order not found")
+    try:
+        response = dynamodb.update_item(TableName=get_table_name(), **status_update_params(order_id, order_update))
+    except dynamodb.exceptions.ConditionalCheckFailedException as e:
+        raise status_update_conflict(e.response, order_update)
     
-    # Update item in DynamoDB
-    response = dynamodb.update_item(
-        TableName=table_name,
-        Key={
-            "order_id": {"S": order_id},
-            "customer_id": {"S": order_update.customer_id}
-        },
-        UpdateExpression="SET order_status = :order_status",
-        ExpressionAttributeValues={
-            ":order_status": {"S": order_update.order_status.value}
-        },
-        ReturnValues="ALL_NEW"
-    )
-    
-    # Parse DynamoDB response
-    item = response["Attributes"]
-    
-    return OrderResponse(
-        order_id=item["order_id"]["S"],
-        customer_id=item["customer_id"]["S"],
-        order_date=item["order_date"]["S"],
-        order_status=OrderStatus(item["order_status"]["S"]),
-        total_amount=float(item["total_amount"]["N"]),
-        shipping_address={
-            "street": item["shipping_address"]["M"]["street"]["S"],
-            "city": item["shipping_address"]["M"]["city"]["S"],
-            "zip_code": item["shipping_address"]["M"]["zip_code"]["S"],
-            "country": item["shipping_address"]["M"]["country"]["S"]
-        },
-        items=[
-            {
-                "product_id": i["M"]["product_id"]["S"],
-                "quantity": int(i["M"]["quantity"]["N"]),
-                "price_per_unit": float(i["M"]["price_per_unit"]["N"])
-            } for i in item["items"]["L"]
-        ]
-    )
+    order = decode_order(response["Attributes"])
+    order_cache.order_written(order)
+    return order
+
+if ORDERS_CACHE_STATS_ENDPOINT:
+    @app.get("/cache/stats")
+    def get_cache_stats():
+        """
+        Order cache hit/miss counters and size
+        """
+        return order_cache.stats()
 
 # Lambda handler
 handler = Mangum(app)
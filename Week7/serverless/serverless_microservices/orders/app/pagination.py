@@ -0,0 +1,29 @@
+import base64
+import json
+
+
+def encode_token(last_evaluated_key):
+    """
+    Turn a DynamoDB LastEvaluatedKey into an opaque cursor token
+    """
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token):
+    """
+    Turn a cursor token back into an ExclusiveStartKey.
+    Raises ValueError if the token was not produced by encode_token.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid pagination token") from e
+    if not isinstance(key, dict):
+        raise ValueError("Invalid pagination token")
+    return key
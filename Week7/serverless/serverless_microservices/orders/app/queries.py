@@ -0,0 +1,183 @@
+"""
+DynamoDB request builders shared by the sync (app.main) and async (app.async_main) services.
+"""
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Response
+
+from app.codec import OPEN_STATUS_ATTRIBUTE, SUMMARY_PROJECTION, decode_order, order_key
+from app.database import get_customer_index_name, get_status_index_name
+from app.pagination import decode_token
+from app.schemas import (
+    OPEN_ORDER_STATUSES,
+    OrderCreate,
+    OrderResponse,
+    OrderStatus,
+    OrderUpdate,
+    allowed_previous_statuses,
+)
+
+
+def build_order(order: OrderCreate) -> OrderResponse:
+    """
+    Turn a create request into a new PENDING order
+    """
+    # Calculate total amount from items
+    total_amount = sum(item.price_per_unit * item.quantity for item in order.items)
+    
+    return OrderResponse(
+        order_id=str(uuid.uuid4()),
+        customer_id=order.customer_id,
+        order_date=datetime.utcnow().isoformat(),
+        order_status=OrderStatus.PENDING,
+        total_amount=total_amount,
+        shipping_address=order.shipping_address,
+        items=order.items,
+        version=1
+    )
+
+
+def start_key(next_token: Optional[str]):
+    """
+    ExclusiveStartKey for a cursor token, or 400 if the token is invalid
+    """
+    try:
+        return decode_token(next_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def with_next_token(response: Response, results, next_token: Optional[str]):
+    """
+    Put the next-page cursor, if any, in the X-Next-Token header and return the results
+    """
+    if next_token:
+        response.headers["X-Next-Token"] = next_token
+    return results
+
+
+def customer_orders_params(customer_id: str, summary: bool):
+    """
+    Query parameters for a customer's orders, newest first
+    """
+    params = {
+        "IndexName": get_customer_index_name(),
+        "KeyConditionExpression": "customer_id = :customer_id",
+        "ExpressionAttributeValues": {":customer_id": {"S": customer_id}},
+        "ScanIndexForward": False,
+    }
+    if summary:
+        params["ProjectionExpression"] = SUMMARY_PROJECTION
+    return params
+
+
+def status_listing_params(order_status: Optional[OrderStatus], since: Optional[str], until: Optional[str], summary: bool):
+    """
+    Query parameters for open orders in a status, oldest first, from the sparse status index
+    """
+    if order_status not in OPEN_ORDER_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail="order_status must be one of PENDING, PROCESSING or SHIPPED; use export=true for other listings"
+        )
+    
+    key_condition = "open_status = :order_status"
+    values = {":order_status": {"S": order_status.value}}
+    if since and until:
+        key_condition += " AND order_date BETWEEN :since AND :until"
+        values.update({":since": {"S": since}, ":until": {"S": until}})
+    elif since:
+        key_condition += " AND order_date >= :since"
+        values[":since"] = {"S": since}
+    elif until:
+        key_condition += " AND order_date <= :until"
+        values[":until"] = {"S": until}
+    params = {
+        "IndexName": get_status_index_name(),
+        "KeyConditionExpression": key_condition,
+        "ExpressionAttributeValues": values,
+    }
+    if summary:
+        params["ProjectionExpression"] = SUMMARY_PROJECTION
+    return params
+
+
+def export_scan_params(order_status: Optional[OrderStatus], since: Optional[str], until: Optional[str], summary: bool):
+    """
+    Scan parameters for a full-table export with optional status/date filters
+    """
+    conditions, values = [], {}
+    if order_status:
+        conditions.append("order_status = :order_status")
+        values[":order_status"] = {"S": order_status.value}
+    if since:
+        conditions.append("order_date >= :since")
+        values[":since"] = {"S": since}
+    if until:
+        conditions.append("order_date <= :until")
+        values[":until"] = {"S": until}
+    params = {}
+    if conditions:
+        params.update(FilterExpression=" AND ".join(conditions), ExpressionAttributeValues=values)
+    if summary:
+        params["ProjectionExpression"] = SUMMARY_PROJECTION
+    return params
+
+
+def status_update_params(order_id: str, order_update: OrderUpdate):
+    """
+    UpdateItem parameters for a conditional status change.
+
+    The write only succeeds if the order exists, its current status may move to the
+    requested one, and (when `expected_version` is given) its version still matches.
+    """
+    target = order_update.order_status
+    previous = allowed_previous_statuses(target)
+    placeholders = [f":from{i}" for i in range(len(previous))]
+    condition = f"attribute_exists(order_id) AND order_status IN ({', '.join(placeholders)})"
+    values = {placeholder: {"S": status.value} for placeholder, status in zip(placeholders, previous)}
+    values.update({
+        ":order_status": {"S": target.value},
+        ":zero": {"N": "0"},
+        ":one": {"N": "1"},
+    })
+    update = "SET order_status = :order_status, version = if_not_exists(version, :zero) + :one"
+    # Closed orders drop out of the sparse status index
+    if target in OPEN_ORDER_STATUSES:
+        update += f", {OPEN_STATUS_ATTRIBUTE} = :order_status"
+    else:
+        update += f" REMOVE {OPEN_STATUS_ATTRIBUTE}"
+    if order_update.expected_version is not None:
+        condition += " AND version = :expected_version"
+        values[":expected_version"] = {"N": str(order_update.expected_version)}
+    
+    return {
+        "Key": order_key(order_id, order_update.customer_id),
+        "UpdateExpression": update,
+        "ConditionExpression": condition,
+        "ExpressionAttributeValues": values,
+        "ReturnValues": "ALL_NEW",
+        "ReturnValuesOnConditionCheckFailure": "ALL_OLD",
+    }
+
+
+def status_update_conflict(error_response: dict, order_update: OrderUpdate) -> HTTPException:
+    """
+    Map a failed status-update condition to 404 (no order) or 409 (transition or version rejected)
+    """
+    current = error_response.get("Item")
+    if not current:
+        return HTTPException(status_code=404, detail="Order not found")
+    current = decode_order(current)
+    target = order_update.order_status
+    if current.order_status not in allowed_previous_statuses(target):
+        return HTTPException(
+            status_code=409,
+            detail=f"Cannot change order status from {current.order_status.value} to {target.value}"
+        )
+    return HTTPException(
+        status_code=409,
+        detail=f"Order version is {current.version}, expected {order_update.expected_version}"
+    )
@@ -10,6 +10,24 @@ class OrderStatus(str, Enum):
     DELIVERED = "DELIVERED"
     CANCELLED = "CANCELLED"
 
+# Statuses an order may move to from each status; DELIVERED and CANCELLED are final
+ORDER_STATUS_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.PROCESSING, OrderStatus.CANCELLED},
+    OrderStatus.PROCESSING: {OrderStatus.SHIPPED, OrderStatus.CANCELLED},
+    OrderStatus.SHIPPED: {OrderStatus.DELIVERED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+# Statuses kept in the sparse open-orders index
+OPEN_ORDER_STATUSES = {OrderStatus.PENDING, OrderStatus.PROCESSING, OrderStatus.SHIPPED}
+
+def allowed_previous_statuses(status: OrderStatus):
+    """
+    Statuses an order may be in before moving to `status` (re-applying the same status is allowed)
+    """
+    return sorted({status} | {s for s, targets in ORDER_STATUS_TRANSITIONS.items() if status in targets})
+
 class Address(BaseModel):
     street: str = Field(..., example="123 Serverless Way")
     city: str = Field(..., example="Cloud City")
@@ -32,9 +50,50 @@ class OrderCreate(OrderBase):
 class OrderUpdate(BaseModel):
     customer_id: str = Field(..., example="cust_a7b8c9d0")
     order_status: OrderStatus = Field(..., example=OrderStatus.SHIPPED)
+    expected_version: Optional[int] = Field(None, example=1, description="Only update if the order is still at this version")
 
 class OrderResponse(OrderBase):
     order_id: str = Field(..., example="a1b2c3d4-e5f6-7890-1234-567890abcdef")
     order_date: str = Field(..., example="2025-09-21T10:30:00Z")
     order_status: OrderStatus = Field(..., example=OrderStatus.PENDING)
     total_amount: Decimal = Field(..., example=149.98)
+    version: Optional[int] = Field(None, example=1)
+
+class OrderSummary(BaseModel):
+    order_id: str = Field(..., example="a1b2c3d4-e5f6-7890-1234-567890abcdef")
+    customer_id: str = Field(..., example="cust_a7b8c9d0")
+    order_date: str = Field(..., example="2025-09-21T10:30:00Z")
+    order_status: OrderStatus = Field(..., example=OrderStatus.PENDING)
+    total_amount: Decimal = Field(..., example=149.98)
+
+class OrderKey(BaseModel):
+    order_id: str = Field(..., example="a1b2c3d4-e5f6-7890-1234-567890abcdef")
+    customer_id: str = Field(..., example="cust_a7b8c9d0")
+
+class BatchItemStatus(str, Enum):
+    CREATED = "CREATED"
+    FOUND = "FOUND"
+    NOT_FOUND = "NOT_FOUND"
+    FAILED = "FAILED"
+
+class OrderBatchCreate(BaseModel):
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=1000)
+
+class OrderBatchCreateResult(BaseModel):
+    status: BatchItemStatus
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+class OrderBatchCreateResponse(BaseModel):
+    results: List[OrderBatchCreateResult]
+
+class OrderBatchGet(BaseModel):
+    keys: List[OrderKey] = Field(..., min_length=1, max_length=1000)
+
+class OrderBatchGetResult(OrderKey):
+    status: BatchItemStatus
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+class OrderBatchGetResponse(BaseModel):
+    results: List[OrderBatchGetResult]
@@ -0,0 +1 @@
+# Orders API benchmarks (run from the orders/ directory, e.g. python -m benchmarks.bench_client)
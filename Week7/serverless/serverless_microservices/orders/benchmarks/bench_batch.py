@@ -0,0 +1,58 @@
+"""
+Throughput of creating and reading orders one per call versus the batch endpoints.
+
+    python -m benchmarks.bench_batch [orders] [simulated_rtt_ms]
+"""
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from app.database import get_dynamodb_client
+from benchmarks.common import local_table, simulate_latency
+
+ORDER = {
+    "customer_id": "cust_bench",
+    "shipping_address": {"street": "123 Serverless Way", "city": "Cloud City", "zip_code": "12345", "country": "AWS"},
+    "items": [{"product_id": "prod_1", "quantity": 2, "price_per_unit": "19.99"}],
+}
+
+
+def rate(label, count, elapsed):
+    print(f"{label:<28} {count / elapsed:>10,.0f} orders/s ({elapsed:.2f}s for {count})")
+
+
+def main(count=1000, rtt_ms=5):
+    with local_table():
+        from app.main import app
+        simulate_latency(get_dynamodb_client(), rtt_ms)
+        client = TestClient(app)
+
+        start = time.perf_counter()
+        keys = []
+        for _ in range(count):
+            order = client.post("/orders", json=ORDER).json()
+            keys.append({"order_id": order["order_id"], "customer_id": order["customer_id"]})
+        rate("single create (before)", count, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for key in keys:
+            client.get(f"/orders/{key['order_id']}", params={"customer_id": key["customer_id"]})
+        rate("single get (before)", count, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        results = client.post("/orders:batch", json={"orders": [ORDER] * count}).json()["results"]
+        rate("batch create (after)", count, time.perf_counter() - start)
+        assert all(result["status"] == "CREATED" for result in results)
+
+        start = time.perf_counter()
+        results = client.post("/orders:batchGet", json={"keys": keys}).json()["results"]
+        rate("batch get (after)", count, time.perf_counter() - start)
+        assert all(result["status"] == "FOUND" for result in results)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    )
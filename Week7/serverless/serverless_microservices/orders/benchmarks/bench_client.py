@@ -0,0 +1,33 @@
+"""
+Per-request latency of a GetItem with a client built per call (old behaviour)
+versus the shared, pre-warmed client from app.database.
+
+    python -m benchmarks.bench_client [iterations]
+"""
+import sys
+
+import boto3
+
+from app.database import get_dynamodb_client, get_table_name, warm_up
+from benchmarks.common import local_table, report, timed
+
+KEY = {"order_id": {"S": "bench-order"}, "customer_id": {"S": "bench-customer"}}
+
+
+def main(iterations=500):
+    with local_table() as client:
+        client.put_item(TableName=get_table_name(), Item={**KEY, "order_status": {"S": "PENDING"}})
+
+        def per_request_client():
+            boto3.client("dynamodb").get_item(TableName=get_table_name(), Key=KEY)
+
+        def shared_client():
+            get_dynamodb_client().get_item(TableName=get_table_name(), Key=KEY)
+
+        warm_up()
+        report("client per request (before)", timed(per_request_client, iterations))
+        report("shared client (after)", timed(shared_client, iterations))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
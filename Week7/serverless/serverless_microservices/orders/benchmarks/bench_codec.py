@@ -0,0 +1,74 @@
+"""
+Decode throughput of the compiled codec versus the hand-written parsing it replaced.
+
+    python -m benchmarks.bench_codec [orders]
+"""
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+from app.codec import decode_order, encode_order
+from app.schemas import Address, OrderItem, OrderResponse, OrderStatus
+
+
+def sample_orders(count, items_per_order=3):
+    address = Address(street="123 Serverless Way", city="Cloud City", zip_code="12345", country="AWS")
+    orders = []
+    for n in range(count):
+        items = [
+            OrderItem(product_id=f"prod_{n}_{i}", quantity=i + 1, price_per_unit=Decimal("19.99"))
+            for i in range(items_per_order)
+        ]
+        orders.append(OrderResponse(
+            order_id=str(uuid.uuid4()),
+            customer_id=f"cust_{n % 100}",
+            order_date="2025-09-21T10:30:00",
+            order_status=OrderStatus.PENDING,
+            total_amount=sum(i.price_per_unit * i.quantity for i in items),
+            shipping_address=address,
+            items=items,
+        ))
+    return orders
+
+
+def legacy_decode(item):
+    return OrderResponse(
+        order_id=item["order_id"]["S"],
+        customer_id=item["customer_id"]["S"],
+        order_date=item["order_date"]["S"],
+        order_status=OrderStatus(item["order_status"]["S"]),
+        total_amount=float(item["total_amount"]["N"]),
+        shipping_address={
+            "street": item["shipping_address"]["M"]["street"]["S"],
+            "city": item["shipping_address"]["M"]["city"]["S"],
+            "zip_code": item["shipping_address"]["M"]["zip_code"]["S"],
+            "country": item["shipping_address"]["M"]["country"]["S"]
+        },
+        items=[
+            {
+                "product_id": i["M"]["product_id"]["S"],
+                "quantity": int(i["M"]["quantity"]["N"]),
+                "price_per_unit": float(i["M"]["price_per_unit"]["N"])
+            } for i in item["items"]["L"]
+        ]
+    )
+
+
+def rate(label, fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {len(items) / elapsed:>10,.0f} orders/s ({elapsed * 1000:.1f}ms for {len(items)})")
+
+
+def main(count=10_000):
+    items = [encode_order(order) for order in sample_orders(count)]
+    assert decode_order(items[0]).total_amount == Decimal(items[0]["total_amount"]["N"])
+    rate("hand-written (before)", legacy_decode, items)
+    rate("compiled codec (after)", decode_order, items)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
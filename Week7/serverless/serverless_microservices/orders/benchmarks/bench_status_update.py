@@ -0,0 +1,85 @@
+"""
+Concurrency check for update_order_status: many threads race on one order and the
+conditional write must let exactly the allowed updates through.
+
+    python -m benchmarks.bench_status_update [threads] [rounds]
+
+Exits non-zero if a race lets through an update the state machine or version check forbids.
+Runs against a moto server that answers one request at a time, as moto's in-process
+backend does not apply conditional writes atomically.
+"""
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, Response
+
+from benchmarks.common import report, serial_server  # sets up the local environment before app.main is imported
+from app.main import create_order, update_order_status
+from app.schemas import OrderCreate, OrderStatus, OrderUpdate
+
+ORDER = OrderCreate(
+    customer_id="cust_race",
+    shipping_address={"street": "123 Serverless Way", "city": "Cloud City", "zip_code": "12345", "country": "AWS"},
+    items=[{"product_id": "prod_1", "quantity": 1, "price_per_unit": "9.99"}],
+)
+
+
+def race(threads, order_id, updates):
+    """
+    Release all updates at once; return (successes, latencies_ms)
+    """
+    barrier = threading.Barrier(threads)
+
+    def attempt(update):
+        barrier.wait()
+        start = time.perf_counter()
+        try:
+            result = update_order_status(order_id, update)
+        except HTTPException as e:
+            assert e.status_code == 409, e.detail
+            result = None
+        return result, (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = list(pool.map(attempt, updates))
+    return [update for update, (result, _) in zip(updates, outcomes) if result], [ms for _, ms in outcomes]
+
+
+def main(threads=32, rounds=20):
+    failures = 0
+    latencies = []
+    with serial_server():
+        for _ in range(rounds):
+            order = create_order(ORDER, Response(), idempotency_key=None)
+
+            # Everyone holds version 1: exactly one writer may win
+            updates = [OrderUpdate(customer_id=order.customer_id, order_status=OrderStatus.PROCESSING, expected_version=1)] * threads
+            winners, ms = race(threads, order.order_id, updates)
+            latencies += ms
+            if len(winners) != 1:
+                failures += 1
+                print(f"version race: {len(winners)} writers succeeded, expected 1")
+
+            # SHIPPED and CANCELLED are mutually exclusive from PROCESSING
+            updates = [
+                OrderUpdate(customer_id=order.customer_id, order_status=status)
+                for status in [OrderStatus.SHIPPED, OrderStatus.CANCELLED] * (threads // 2)
+            ]
+            winners, ms = race(len(updates), order.order_id, updates)
+            latencies += ms
+            if len({update.order_status for update in winners}) != 1:
+                failures += 1
+                print(f"transition race: {sorted({u.order_status.value for u in winners})} all succeeded")
+
+    report(f"conditional update ({threads} threads)", latencies)
+    print("OK" if not failures else f"{failures} race(s) violated the state machine")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 32,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 20,
+    ))
@@ -0,0 +1,177 @@
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Keep boto3 away from real credentials and skip the cold-start call while importing app.main
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("DYNAMODB_WARM_UP", "false")
+
+import boto3
+from botocore.exceptions import EndpointConnectionError
+from moto import mock_aws
+from moto.moto_server.werkzeug_app import DomainDispatcherApplication, create_backend_app
+from werkzeug.serving import make_server
+
+from app import database
+from app.database import (
+    get_customer_index_name,
+    get_idempotency_table_name,
+    get_status_index_name,
+    get_table_name,
+    reset_dynamodb_client,
+)
+
+
+def create_orders_table(client):
+    """
+    Create the orders table with its indexes, and the idempotency record table
+    """
+    client.create_table(
+        TableName=get_table_name(),
+        BillingMode="PAY_PER_REQUEST",
+        AttributeDefinitions=[
+            {"AttributeName": "order_id", "AttributeType": "S"},
+            {"AttributeName": "customer_id", "AttributeType": "S"},
+            {"AttributeName": "order_date", "AttributeType": "S"},
+            {"AttributeName": "open_status", "AttributeType": "S"},
+        ],
+        KeySchema=[
+            {"AttributeName": "order_id", "KeyType": "HASH"},
+            {"AttributeName": "customer_id", "KeyType": "RANGE"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": get_customer_index_name(),
+                "KeySchema": [
+                    {"AttributeName": "customer_id", "KeyType": "HASH"},
+                    {"AttributeName": "order_date", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+            {
+                "IndexName": get_status_index_name(),
+                "KeySchema": [
+                    {"AttributeName": "open_status", "KeyType": "HASH"},
+                    {"AttributeName": "order_date", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+        ],
+    )
+    client.create_table(
+        TableName=get_idempotency_table_name(),
+        BillingMode="PAY_PER_REQUEST",
+        AttributeDefinitions=[{"AttributeName": "idempotency_key", "AttributeType": "S"}],
+        KeySchema=[{"AttributeName": "idempotency_key", "KeyType": "HASH"}],
+    )
+
+
+@contextmanager
+def local_table():
+    """
+    Create the orders table in a moto-backed DynamoDB stand-in
+    """
+    with mock_aws():
+        reset_dynamodb_client()
+        client = boto3.client("dynamodb")
+        create_orders_table(client)
+        try:
+            yield client
+        finally:
+            reset_dynamodb_client()
+
+
+@contextmanager
+def local_server(port=5555):
+    """
+    Run moto as an HTTP server in a separate process with the orders table created, for
+    clients that cannot be patched in-process (aiobotocore, other processes).
+    Yields the endpoint URL.
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-m", "moto.server", "-p", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    endpoint = f"http://127.0.0.1:{port}"
+    try:
+        client = boto3.client("dynamodb", endpoint_url=endpoint)
+        for _ in range(100):
+            try:
+                create_orders_table(client)
+                break
+            except EndpointConnectionError:
+                time.sleep(0.1)
+        yield endpoint
+    finally:
+        process.terminate()
+        process.wait()
+
+
+@contextmanager
+def serial_server():
+    """
+    Run moto as an HTTP server on a thread of this process, answering one request at a
+    time, with the orders table created, and point the app's client at it. Yields the
+    endpoint URL.
+
+    moto checks a write's condition and applies it without a lock, so concurrent
+    requests (in-process or to its threaded server) can both pass one condition.
+    Answering requests one by one gives racing conditional writes DynamoDB's per-item
+    atomicity.
+    """
+    # Request lines are logged at INFO; conditional check failures would flood the output
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, DomainDispatcherApplication(create_backend_app), threaded=False)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+    previous_endpoint = database.DYNAMODB_ENDPOINT_URL
+    database.DYNAMODB_ENDPOINT_URL = endpoint
+    reset_dynamodb_client()
+    try:
+        create_orders_table(boto3.client("dynamodb", endpoint_url=endpoint))
+        yield endpoint
+    finally:
+        database.DYNAMODB_ENDPOINT_URL = previous_endpoint
+        reset_dynamodb_client()
+        server.shutdown()
+        thread.join()
+
+
+def simulate_latency(client, milliseconds):
+    """
+    Add a fixed delay to every call made by client, approximating a network round trip
+    """
+    if milliseconds:
+        client.meta.events.register_first(
+            "before-send.dynamodb.*", lambda **kwargs: time.sleep(milliseconds / 1000)
+        )
+
+
+def timed(fn, iterations):
+    """
+    Call fn repeatedly and return per-call latencies in milliseconds
+    """
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{label:<32} n={len(samples):<6} mean={statistics.mean(samples):8.3f}ms "
+        f"p50={statistics.median(samples):8.3f}ms p99={p99:8.3f}ms"
+    )
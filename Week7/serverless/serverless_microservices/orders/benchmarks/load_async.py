@@ -0,0 +1,134 @@
+"""
+Load test comparing the sync (app.main) and async (app.async_main) Orders services.
+
+Each service runs under uvicorn in its own process and a fixed number of concurrent
+clients issue GET /orders/{order_id} for a set duration. The order cache is off, so
+every request reads DynamoDB.
+
+    python -m benchmarks.load_async [concurrency] [seconds]
+
+By default the services talk to a moto server, which tops out at a few hundred
+requests per second and so caps both services alike. For meaningful numbers run
+DynamoDB Local and point the harness at it with DYNAMODB_ENDPOINT_URL.
+"""
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import boto3
+import httpx
+
+from app.codec import encode_order
+from app.database import DYNAMODB_ENDPOINT_URL, get_table_name
+from app.queries import build_order
+from app.schemas import OrderCreate
+from benchmarks.common import create_orders_table, local_server
+
+SERVICES = [("sync", "app.main:app"), ("async", "app.async_main:app")]
+SEED_ORDERS = 200
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def dynamodb_endpoint():
+    """
+    Use DYNAMODB_ENDPOINT_URL if set (creating the table if needed), else a moto server
+    """
+    if not DYNAMODB_ENDPOINT_URL:
+        with local_server(free_port()) as endpoint:
+            yield endpoint
+        return
+    client = boto3.client("dynamodb", endpoint_url=DYNAMODB_ENDPOINT_URL)
+    try:
+        create_orders_table(client)
+    except client.exceptions.ResourceInUseException:
+        pass
+    yield DYNAMODB_ENDPOINT_URL
+
+
+def seed(endpoint):
+    client = boto3.client("dynamodb", endpoint_url=endpoint)
+    keys = []
+    for n in range(SEED_ORDERS):
+        order = build_order(OrderCreate(
+            customer_id=f"cust_{n % 20}",
+            shipping_address={"street": "123 Serverless Way", "city": "Cloud City", "zip_code": "12345", "country": "AWS"},
+            items=[{"product_id": "prod_1", "quantity": 1, "price_per_unit": "9.99"}],
+        ))
+        client.put_item(TableName=get_table_name(), Item=encode_order(order))
+        keys.append((order.order_id, order.customer_id))
+    return keys
+
+
+def start_service(target, endpoint):
+    port = free_port()
+    # The order cache would answer repeated ids from memory; measure the DynamoDB path
+    env = {**os.environ, "DYNAMODB_ENDPOINT_URL": endpoint, "DYNAMODB_WARM_UP": "true", "ORDERS_CACHE_BACKEND": "none"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base_url}/docs")
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{target} did not start")
+
+
+async def load(base_url, keys, concurrency, seconds):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            order_id, customer_id = random.choice(keys)
+            start = time.perf_counter()
+            response = await client.get(f"/orders/{order_id}", params={"customer_id": customer_id})
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += response.status_code != 200
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def main(concurrency=200, seconds=10):
+    with dynamodb_endpoint() as endpoint:
+        keys = seed(endpoint)
+        for label, target in SERVICES:
+            process, base_url = start_service(target, endpoint)
+            try:
+                latencies, errors = asyncio.run(load(base_url, keys, concurrency, seconds))
+            finally:
+                process.terminate()
+                process.wait()
+            latencies.sort()
+            print(
+                f"{label:<6} c={concurrency:<4} rps={len(latencies) / seconds:8.1f} "
+                f"p50={statistics.median(latencies):8.2f}ms "
+                f"p99={latencies[int(len(latencies) * 0.99) - 1]:8.2f}ms errors={errors}"
+            )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    )
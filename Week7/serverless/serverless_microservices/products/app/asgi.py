@@ -0,0 +1,16 @@
+"""
+ASGI entry point for containers, choosing the sync or async Products API by configuration:
+
+    PRODUCTS_ASYNC=true uvicorn app.asgi:app
+
+serves app.async_main, and app.main otherwise. Lambda runs app.main.handler.
+"""
+import os
+
+# Serve app.async_main instead of app.main; it needs requirements-async.txt
+PRODUCTS_ASYNC = os.getenv("PRODUCTS_ASYNC", "false").lower() == "true"
+
+if PRODUCTS_ASYNC:
+    from app.async_main import app
+else:
+    from app.main import app
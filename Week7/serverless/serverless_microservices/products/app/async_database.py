@@ -0,0 +1,57 @@
+"""
+Async SQLAlchemy engine for app.async_main.
+
+The URL is derived from the sync one in app.database with the driver swapped for an
+asyncio one (aiomysql by default, asyncmy with DB_ASYNC_DRIVER=asyncmy, aiosqlite for
+SQLite), or set outright with ASYNC_DATABASE_URL. The engine takes the same profile and
+pool settings as the sync engine, and keeps its own pool metrics.
+"""
+import os
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import SQLALCHEMY_DATABASE_URL, TimedAsyncQueuePool, async_pool_metrics, engine_options
+
+DB_ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "aiomysql")
+
+
+def async_database_url(url: str = SQLALCHEMY_DATABASE_URL) -> str:
+    """
+    The asyncio driver equivalent of a sync database URL
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "mysql":
+        parsed = parsed.set(drivername=f"mysql+{DB_ASYNC_DRIVER}")
+    elif parsed.get_backend_name() == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    else:
+        raise ValueError(f"No async driver configured for {parsed.drivername}; set ASYNC_DATABASE_URL")
+    return parsed.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url()
+
+# Create async engine
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **engine_options(database_url=ASYNC_DATABASE_URL, pool_class=TimedAsyncQueuePool)
+)
+async_pool_metrics.listen(async_engine.sync_engine)
+
+# Objects stay readable after commit, since they cannot lazy-load outside an await
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    """
+    Get async database session
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_async_pool_stats():
+    """
+    Get connection pool metrics of the async engine
+    """
+    return async_pool_metrics.stats(async_engine.sync_engine)
@@ -0,0 +1,303 @@
+"""
+Async variant of the Products API.
+
+Same routes and behaviour as app.main, but handlers are `async def` on an AsyncSession
+(aiomysql/asyncmy), so a request waiting on MySQL holds no threadpool worker. Bulk
+imports still run on a sync session in the threadpool, since they read the request
+body from there. Intended for long-running containers: uvicorn app.async_main:app, or
+PRODUCTS_ASYNC=true with app.asgi:app
+"""
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from typing import List, Literal, Optional, Union
+import uuid
+
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.async_database import async_engine, get_async_db, get_async_pool_stats
+from app.bulk import import_products, request_text
+from app.cache import PRODUCTS_CACHE_STATS_ENDPOINT, cached_product, product_cache, product_response
+from app.database import DB_CREATE_SCHEMA, PRODUCTS_DB_STATS_ENDPOINT, SessionLocal, init_db
+from app.models import Product
+from app.pagination import decode_search_token, decode_token
+from app.queries import product_listing_query, product_page
+from app.schemas import (
+    BulkUpsertResponse,
+    ProductCreate,
+    ProductResponse,
+    ProductSummary,
+    ProductUpdate,
+    ReservationStatus,
+    StockReservation,
+    StockReservationBatch,
+    StockReservationBatchResponse,
+    StockReservationItem,
+    StockReservationResult,
+)
+from app.search import product_search_query, search_page, search_terms, search_truncated_query
+from app.stock import reserve_stock_async
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema creation runs through `python -m app.manage init-db`, not on every start
+    if DB_CREATE_SCHEMA:
+        await run_in_threadpool(init_db)
+    yield
+    await async_engine.dispose()
+
+
+app = FastAPI(title="Products API", lifespan=lifespan)
+
+
+@app.get("/products", response_model=List[Union[ProductResponse, ProductSummary]])
+async def get_products(
+    response: Response,
+    skip: int = Query(0, ge=0, deprecated=True, description="Offset paging; use next_token instead"),
+    limit: int = Query(100, ge=1, le=1000),
+    active_only: bool = False,
+    next_token: Optional[str] = None,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    in_stock: bool = False,
+    projection: Literal["full", "summary"] = "full",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get products oldest first, one page of `limit` at a time.
+
+    If more products match, the cursor for the next page is returned in the X-Next-Token
+    header; pass it back as `next_token`. `projection=summary` leaves out the description
+    and updated_at.
+    """
+    try:
+        after = decode_token(next_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    summary = projection == "summary"
+    query = product_listing_query(after, active_only, min_price, max_price, in_stock, summary)
+    if skip:
+        query = query.offset(skip)
+    # One extra row tells whether there is a next page
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    products, next_token = product_page(rows, limit, summary)
+    if next_token:
+        response.headers["X-Next-Token"] = next_token
+    return products
+
+
+@app.post("/products", response_model=ProductResponse, status_code=201)
+async def create_product(
+    product: ProductCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Create a new product
+    """
+    existing_product = await db.scalar(select(Product.product_id).where(Product.sku == product.sku))
+    if existing_product:
+        raise HTTPException(status_code=400, detail="Product with this SKU already exists")
+
+    db_product = Product(product_id=str(uuid.uuid4()), **product.model_dump())
+    db.add(db_product)
+    await db.commit()
+    await db.refresh(db_product)
+
+    entry = cached_product(db_product)
+    product_cache.put(entry)
+    return product_response(entry, status_code=201)
+
+
+def _import_products(stream, format: str):
+    db = SessionLocal()
+    try:
+        return import_products(db, stream, format)
+    finally:
+        db.close()
+
+
+@app.post("/products:bulk", response_model=BulkUpsertResponse)
+async def bulk_upsert_products(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Defaults from the Content-Type header")
+):
+    """
+    Create or update products by SKU from a CSV or NDJSON body.
+
+    The body is read as a stream and written in chunks; invalid rows are reported
+    in `errors` and do not stop the import.
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    return await run_in_threadpool(_import_products, request_text(request.stream()), format)
+
+
+@app.post("/products:reserve", response_model=StockReservationBatchResponse)
+async def reserve_products(
+    batch: StockReservationBatch,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Reserve stock for several products in one transaction; each result carries its own status
+    """
+    results = await reserve_stock_async(db, batch.items, batch.all_or_nothing)
+    return StockReservationBatchResponse(reserved=all(r.reserved for r in results), results=results)
+
+
+@app.get("/products/search", response_model=List[Union[ProductResponse, ProductSummary]])
+async def search_products(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in the name or description"),
+    limit: int = Query(20, ge=1, le=100),
+    next_token: Optional[str] = None,
+    active_only: bool = False,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    in_stock: bool = False,
+    projection: Literal["full", "summary"] = "full",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Search products by name and description, best match first.
+
+    Every word of `q` must match; matches in the name rank higher. Paged like
+    GET /products, through the X-Next-Token header and `next_token`. X-Search-Truncated
+    is set when some older matches were not ranked (SQLite, see SEARCH_MAX_CANDIDATES).
+    """
+    try:
+        terms = search_terms(q)
+        after = decode_search_token(next_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    summary = projection == "summary"
+    dialect = async_engine.dialect.name
+    query = product_search_query(dialect, terms, after, active_only, min_price, max_price, in_stock, summary)
+    products, next_token = search_page((await db.execute(query.limit(limit + 1))).all(), limit, summary)
+    if next_token:
+        response.headers["X-Next-Token"] = next_token
+    # SQLite ranks only the newest SEARCH_MAX_CANDIDATES matches
+    truncated = search_truncated_query(dialect, terms)
+    if truncated is not None and await db.scalar(truncated):
+        response.headers["X-Search-Truncated"] = "true"
+    return products
+
+
+@app.get("/products/{product_id}", response_model=ProductResponse, responses={304: {"description": "Not modified"}})
+async def get_product(
+    product_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a product by ID. Answers 304 when If-None-Match holds the current ETag.
+    """
+    entry = product_cache.get(product_id)
+    if entry is None:
+        product = await db.scalar(select(Product).where(Product.product_id == product_id))
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        entry = cached_product(product)
+        product_cache.put(entry)
+    return product_response(entry, request.headers.get("if-none-match"))
+
+
+@app.get("/products/by-sku/{sku}", response_model=ProductResponse, responses={304: {"description": "Not modified"}})
+async def get_product_by_sku(
+    sku: str,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a product by SKU. Answers 304 when If-None-Match holds the current ETag.
+    """
+    entry = product_cache.get_by_sku(sku)
+    if entry is None:
+        product = await db.scalar(select(Product).where(Product.sku == sku))
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        entry = cached_product(product)
+        product_cache.put(entry)
+    return product_response(entry, request.headers.get("if-none-match"))
+
+
+@app.put("/products/{product_id}", response_model=ProductResponse)
+async def update_product(
+    product_id: str,
+    product_update: ProductUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Update a product
+    """
+    db_product = await db.scalar(select(Product).where(Product.product_id == product_id))
+    if not db_product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    for key, value in product_update.model_dump(exclude_unset=True).items():
+        setattr(db_product, key, value)
+
+    await db.commit()
+    await db.refresh(db_product)
+
+    entry = cached_product(db_product)
+    product_cache.put(entry)
+    return product_response(entry)
+
+
+@app.post("/products/{product_id}/reserve", response_model=StockReservationResult)
+async def reserve_product(
+    product_id: str,
+    reservation: StockReservation,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Take `quantity` units from a product's stock if enough are left
+    """
+    item = StockReservationItem(product_id=product_id, quantity=reservation.quantity)
+    (result,) = await reserve_stock_async(db, [item])
+    if result.status == ReservationStatus.NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if result.status == ReservationStatus.INSUFFICIENT_STOCK:
+        raise HTTPException(status_code=409, detail="Not enough stock")
+    return result
+
+
+@app.delete("/products/{product_id}", status_code=204)
+async def delete_product(
+    product_id: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Delete a product
+    """
+    db_product = await db.scalar(select(Product).where(Product.product_id == product_id))
+    if not db_product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    await db.delete(db_product)
+    await db.commit()
+    product_cache.invalidate(product_ids=[product_id])
+    return None
+
+
+if PRODUCTS_CACHE_STATS_ENDPOINT:
+    @app.get("/cache/stats")
+    async def get_cache_stats():
+        """
+        Product cache hit/miss counters and size
+        """
+        return product_cache.stats()
+
+
+if PRODUCTS_DB_STATS_ENDPOINT:
+    @app.get("/db/stats")
+    async def get_db_stats():
+        """
+        Connection pool checkout/wait metrics
+        """
+        return get_async_pool_stats()
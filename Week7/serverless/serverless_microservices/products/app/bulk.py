@@ -0,0 +1,181 @@
+"""
+Bulk product import for POST /products:bulk and `python -m app.manage import-products`.
+
+Input is read as a stream of CSV or NDJSON records, validated with ProductCreate and
+upserted by SKU in chunks, one multi-row INSERT ... ON DUPLICATE KEY UPDATE (ON CONFLICT
+DO UPDATE on SQLite) and one commit per chunk. Rows that fail validation or make their
+chunk fail in the database are reported with their row number; the rest still land.
+"""
+import csv
+import io
+import json
+import os
+import uuid
+
+import anyio.from_thread
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.cache import product_cache
+from app.models import Product
+from app.schemas import BulkRowError, BulkUpsertResponse, ProductCreate
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "1000"))
+
+# At most this many row errors are listed in a response; all of them are counted
+BULK_MAX_REPORTED_ERRORS = int(os.getenv("BULK_MAX_REPORTED_ERRORS", "1000"))
+
+# Columns overwritten when a SKU already exists; product_id and created_at are kept
+UPSERT_COLUMNS = ("name", "description", "price", "stock_quantity", "is_active")
+
+
+class _AsyncBodyReader(io.RawIOBase):
+    """
+    Blocking file object over an ASGI request body stream, for use from a worker thread
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._buffer:
+            try:
+                self._buffer = anyio.from_thread.run(self._chunks.__anext__)
+            except StopAsyncIteration:
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def request_text(chunks):
+    """
+    Text stream over `request.stream()`; read it from a worker thread
+    """
+    return io.TextIOWrapper(io.BufferedReader(_AsyncBodyReader(chunks)), encoding="utf-8", newline="")
+
+
+def read_csv(stream):
+    """
+    Yield (row, record) for each CSV data row; empty cells are left out so defaults apply
+    """
+    reader = csv.DictReader(stream)
+    row = 0
+    try:
+        for row, record in enumerate(reader, 1):
+            yield row, {name: value for name, value in record.items() if name and value != ""}
+    except csv.Error as e:
+        yield row + 1, ValueError(f"Invalid CSV: {e}")
+
+
+def read_ndjson(stream):
+    """
+    Yield (row, record) for each non-empty NDJSON line; a line that does not parse yields the error
+    """
+    for row, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield row, json.loads(line)
+        except ValueError as e:
+            yield row, ValueError(f"Invalid JSON: {e}")
+
+
+def upsert_statement(dialect: str):
+    """
+    Insert that updates the existing product when the SKU is taken. Executed with a list
+    of rows, pymysql sends it as one multi-row INSERT ... ON DUPLICATE KEY UPDATE.
+    """
+    if dialect == "mysql":
+        stmt = mysql.insert(Product)
+        return stmt.on_duplicate_key_update(
+            **{name: stmt.inserted[name] for name in UPSERT_COLUMNS}, updated_at=func.now()
+        )
+    if dialect == "sqlite":
+        stmt = sqlite.insert(Product)
+        return stmt.on_conflict_do_update(
+            index_elements=[Product.sku],
+            set_={**{name: stmt.excluded[name] for name in UPSERT_COLUMNS}, "updated_at": func.now()}
+        )
+    raise ValueError(f"Bulk upsert is not supported on {dialect}")
+
+
+class BulkImport:
+    """
+    Running totals and row errors of one import
+    """
+
+    def __init__(self, db: Session, chunk_size: int = BULK_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.statement = upsert_statement(db.get_bind().dialect.name)
+        self.processed = 0
+        self.upserted = 0
+        self.errors = []
+        self.failed = 0
+
+    def fail(self, row: int, error: str, sku=None):
+        self.failed += 1
+        if len(self.errors) < BULK_MAX_REPORTED_ERRORS:
+            self.errors.append(BulkRowError(row=row, sku=sku, error=error))
+
+    def run(self, records):
+        chunk = []
+        for row, record in records:
+            self.processed += 1
+            if isinstance(record, Exception):
+                self.fail(row, str(record))
+                continue
+            try:
+                product = ProductCreate.model_validate(record)
+            except ValidationError as e:
+                sku = record.get("sku") if isinstance(record, dict) else None
+                self.fail(row, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()), sku)
+                continue
+            chunk.append((row, product))
+            if len(chunk) >= self.chunk_size:
+                self._write(chunk)
+                chunk = []
+        if chunk:
+            self._write(chunk)
+        return BulkUpsertResponse(
+            processed=self.processed, upserted=self.upserted, failed=self.failed, errors=self.errors
+        )
+
+    def _write(self, chunk):
+        # A SKU repeated within the chunk is written once, with its last values
+        rows = {}
+        for _, product in chunk:
+            rows[product.sku] = {"product_id": str(uuid.uuid4()), **product.model_dump()}
+        try:
+            self.db.execute(self.statement, list(rows.values()))
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            if len(chunk) == 1:
+                row, product = chunk[0]
+                self.fail(row, str(getattr(e, "orig", e)), product.sku)
+                return
+            # Retry row by row so only the offending rows are rejected
+            for item in chunk:
+                self._write([item])
+            return
+        self.upserted += len(chunk)
+        product_cache.invalidate(skus=rows)
+
+
+def import_products(db: Session, stream, format: str, chunk_size: int = BULK_CHUNK_SIZE) -> BulkUpsertResponse:
+    """
+    Upsert every product in a CSV or NDJSON text stream
+    """
+    records = read_csv(stream) if format == "csv" else read_ndjson(stream)
+    return BulkImport(db, chunk_size).run(records)
@@ -0,0 +1,143 @@
+"""
+Read cache and ETags for single-product lookups.
+
+GET /products/{product_id} and GET /products/by-sku/{sku} read through an in-process
+LRU with a TTL and a size bound. Entries hold the serialized response body and its
+ETag, so a hit (or a 304 for a client whose copy is current) skips both the database
+and serialization. Every write path invalidates the products it touched. Other Lambda
+instances keep serving their copy until the TTL expires.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from fastapi import Response
+
+from app.schemas import ProductResponse
+
+PRODUCTS_CACHE_TTL = float(os.getenv("PRODUCTS_CACHE_TTL", "30"))
+PRODUCTS_CACHE_MAX_ITEMS = int(os.getenv("PRODUCTS_CACHE_MAX_ITEMS", "10000"))
+PRODUCTS_CACHE_STATS_ENDPOINT = os.getenv("PRODUCTS_CACHE_STATS_ENDPOINT", "false").lower() == "true"
+
+
+class CachedProduct(NamedTuple):
+    product_id: str
+    sku: str
+    etag: str
+    body: bytes
+
+
+def product_etag(product: ProductResponse, body: bytes) -> str:
+    """
+    Strong ETag from updated_at. updated_at only has one-second resolution, so a short
+    hash of the body is added to tell apart two changes made within the same second.
+    """
+    digest = hashlib.sha1(body).hexdigest()[:12]
+    return f'"{product.updated_at:%Y%m%d%H%M%S}-{digest}"'
+
+
+def cached_product(product) -> CachedProduct:
+    """
+    Serialize a Product row once, for the cache and the response
+    """
+    response = ProductResponse.model_validate(product, from_attributes=True)
+    body = response.model_dump_json().encode()
+    return CachedProduct(response.product_id, response.sku, product_etag(response, body), body)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header covers `etag` (weak comparison, as RFC 9110 asks for GET)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def product_response(entry: CachedProduct, if_none_match: Optional[str] = None, status_code: int = 200) -> Response:
+    """
+    Serve a cached product body with its ETag, or an empty 304 if the client's copy is current
+    """
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+class ProductCache:
+    """
+    Thread-safe LRU of CachedProduct keyed by product_id, with a SKU lookup alongside
+    """
+
+    def __init__(self, max_items: int, ttl: float):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._skus = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _drop(self, product_id):
+        entry = self._items.pop(product_id, None)
+        if entry is not None and self._skus.get(entry[0].sku) == product_id:
+            del self._skus[entry[0].sku]
+
+    def get(self, product_id: str) -> Optional[CachedProduct]:
+        with self._lock:
+            entry = self._items.get(product_id)
+            if entry is not None and entry[1] < time.monotonic():
+                self._drop(product_id)
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._items.move_to_end(product_id)
+            self._hits += 1
+            return entry[0]
+
+    def get_by_sku(self, sku: str) -> Optional[CachedProduct]:
+        product_id = self._skus.get(sku)
+        if product_id is None:
+            with self._lock:
+                self._misses += 1
+            return None
+        return self.get(product_id)
+
+    def put(self, product: CachedProduct):
+        with self._lock:
+            self._drop(product.product_id)
+            self._items[product.product_id] = (product, time.monotonic() + self.ttl)
+            self._skus[product.sku] = product.product_id
+            while len(self._items) > self.max_items:
+                self._drop(next(iter(self._items)))
+
+    def invalidate(self, product_ids=(), skus=()):
+        """
+        Drop the given products, by ID and/or SKU
+        """
+        with self._lock:
+            for sku in skus:
+                product_id = self._skus.get(sku)
+                if product_id is not None:
+                    self._drop(product_id)
+            for product_id in product_ids:
+                self._drop(product_id)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._items),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else None,
+            }
+
+
+product_cache = ProductCache(PRODUCTS_CACHE_MAX_ITEMS, PRODUCTS_CACHE_TTL)
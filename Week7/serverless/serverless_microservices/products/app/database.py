@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+import contextvars
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -14,11 +18,177 @@ DB_NAME = os.getenv("DB_NAME", "products")
 DB_USER = os.getenv("DB_USER", "admin")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "password")
 
-# Create database URL
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Create database URL; DATABASE_URL overrides it (e.g. SQLite for local runs and benchmarks)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+
+# Engine profile: "lambda", "proxy" (Lambda behind RDS Proxy) or "container".
+# Defaults to "lambda" inside the Lambda runtime and "container" elsewhere.
+DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE") or ("lambda" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "container")
+
+# Pool tuning, overridable per deployment (defaults depend on the profile)
+DB_POOL_SIZE = os.getenv("DB_POOL_SIZE")
+DB_MAX_OVERFLOW = os.getenv("DB_MAX_OVERFLOW")
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = os.getenv("DB_POOL_RECYCLE")
+DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+
+# Create tables on import; for local development only, deployments run `python -m app.manage init-db`
+DB_CREATE_SCHEMA = os.getenv("DB_CREATE_SCHEMA", "false").lower() == "true"
+
+# Serve GET /db/stats; off by default since the endpoint has no authentication
+PRODUCTS_DB_STATS_ENDPOINT = os.getenv("PRODUCTS_DB_STATS_ENDPOINT", "false").lower() == "true"
+
+
+class PoolMetrics:
+    """
+    Connection pool counters collected from pool events
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.connect_seconds = 0.0
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def record_connect(self, seconds: float):
+        with self._lock:
+            self.connect_seconds += seconds
+
+    def listen(self, engine):
+        pool = engine.pool
+
+        @event.listens_for(pool, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.connects += 1
+
+        @event.listens_for(pool, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            with self._lock:
+                self.checkouts += 1
+
+        @event.listens_for(pool, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def stats(self, engine):
+        pool = engine.pool
+        with self._lock:
+            stats = {
+                "profile": DB_ENGINE_PROFILE,
+                "pool": type(pool).__name__,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "invalidations": self.invalidations,
+                "wait_seconds_total": round(self.wait_seconds, 6),
+                "wait_seconds_max": round(self.max_wait_seconds, 6),
+                "connect_seconds_total": round(self.connect_seconds, 6),
+            }
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        return stats
+
+
+pool_metrics = PoolMetrics()
+
+
+# Seconds spent opening new connections during the current checkout; a context variable
+# because async checkouts interleave on one thread
+_checkout_connect_seconds = contextvars.ContextVar("_checkout_connect_seconds", default=None)
+
+
+class _TimedCheckout:
+    """
+    Pool mixin that records how long each checkout waited for a free connection, and
+    separately how long it spent opening one when the pool had room for another
+    """
+
+    # The PoolMetrics of the engine using the pool class; a class attribute, as the pool
+    # is recreated from its class when the engine is disposed
+    metrics = None
+
+    def _do_get(self):
+        connect_seconds = []
+        token = _checkout_connect_seconds.set(connect_seconds)
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _checkout_connect_seconds.reset(token)
+            self.metrics.record_wait(time.perf_counter() - start - sum(connect_seconds))
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            seconds = time.perf_counter() - start
+            self.metrics.record_connect(seconds)
+            connect_seconds = _checkout_connect_seconds.get()
+            if connect_seconds is not None:
+                connect_seconds.append(seconds)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    metrics = pool_metrics
+
+
+# The async engine's counters, kept apart so each engine's stats describe its own pool
+async_pool_metrics = PoolMetrics()
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics = async_pool_metrics
+
+
+def _setting(value, default):
+    return int(value) if value is not None else default
+
+
+def engine_options(profile: str = DB_ENGINE_PROFILE, database_url: str = SQLALCHEMY_DATABASE_URL, pool_class=TimedQueuePool):
+    """
+    create_engine keyword arguments for a deployment profile.
+
+    lambda:    one request per instance at a time, so a single pooled connection,
+               pinged before use because the instance may have been frozen for minutes.
+    proxy:     RDS Proxy does the pooling; the function opens and closes connections freely.
+    container: a sized pool shared by the worker's threadpool.
+    """
+    options = {}
+    if database_url.startswith("mysql"):
+        options["connect_args"] = {"connect_timeout": DB_CONNECT_TIMEOUT}
+    if profile == "proxy":
+        options["poolclass"] = NullPool
+        return options
+    if profile == "lambda":
+        pool_size, max_overflow, recycle = 1, 0, 300
+    elif profile == "container":
+        pool_size, max_overflow, recycle = 10, 20, 1800
+    else:
+        raise ValueError(f"Unknown DB_ENGINE_PROFILE {profile!r}; expected lambda, proxy or container")
+    options.update(
+        poolclass=pool_class,
+        pool_size=_setting(DB_POOL_SIZE, pool_size),
+        max_overflow=_setting(DB_MAX_OVERFLOW, max_overflow),
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=_setting(DB_POOL_RECYCLE, recycle),
+        pool_pre_ping=True,
+    )
+    return options
+
 
 # Create engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options())
+pool_metrics.listen(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -40,4 +210,18 @@ def init_db():
     """
     Initialize database
     """
+    # Import the models so their tables are registered on Base.metadata
+    import app.models  # noqa: F401
     Base.metadata.create_all(bind=engine)
+    # create_all skips existing tables, so add indexes introduced since they were created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    from app.search import create_search_index
+    create_search_index(engine)
+
+def get_pool_stats():
+    """
+    Get connection pool metrics
+    """
+    return pool_metrics.stats(engine)
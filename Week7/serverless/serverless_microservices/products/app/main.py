@@ -1,34 +1,74 @@
-from fastapi import FastAPI, HTTPException, Depends
+from decimal import Decimal
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from mangum import Mangum
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 import os
 import uuid
 
-from app.database import get_db, init_db
+from app.bulk import import_products, request_text
+from app.cache import PRODUCTS_CACHE_STATS_ENDPOINT, cached_product, product_cache, product_response
+from app.database import DB_CREATE_SCHEMA, PRODUCTS_DB_STATS_ENDPOINT, get_db, get_pool_stats, init_db
+from app.manage import run_function_command
 from app.models import Product
-from app.schemas import ProductCreate, ProductResponse, ProductUpdate
+from app.pagination import decode_search_token, decode_token
+from app.queries import product_listing_query, product_page
+from app.schemas import (
+    BulkUpsertResponse,
+    ProductCreate,
+    ProductResponse,
+    ProductSummary,
+    ProductUpdate,
+    ReservationStatus,
+    StockReservation,
+    StockReservationBatch,
+    StockReservationBatchResponse,
+    StockReservationItem,
+    StockReservationResult,
+)
+from app.search import product_search_query, search_page, search_terms, search_truncated_query
+from app.stock import reserve_stock
 
 app = FastAPI(title="Products API")
 
-@app.on_event("startup")
-async def startup():
+# Schema creation runs through `python -m app.manage init-db`, not on every cold start
+if DB_CREATE_SCHEMA:
     init_db()
 
-@app.get("/products", response_model=List[ProductResponse])
+@app.get("/products", response_model=List[Union[ProductResponse, ProductSummary]])
 def get_products(
-    skip: int = 0, 
-    limit: int = 100, 
+    response: Response,
+    skip: int = Query(0, ge=0, deprecated=True, description="Offset paging; use next_token instead"),
+    limit: int = Query(100, ge=1, le=1000),
     active_only: bool = False,
+    next_token: Optional[str] = None,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    in_stock: bool = False,
+    projection: Literal["full", "summary"] = "full",
     db: Session = Depends(get_db)
 ):
     """
-    Get all products with pagination
+    Get products oldest first, one page of `limit` at a time.
+
+    If more products match, the cursor for the next page is returned in the X-Next-Token
+    header; pass it back as `next_token`. `projection=summary` leaves out the description
+    and updated_at.
     """
-    query = db.query(Product)
-    if active_only:
-        query = query.filter(Product.is_active == True)
-    products = query.offset(skip).limit(limit).all()
+    try:
+        after = decode_token(next_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    summary = projection == "summary"
+    query = product_listing_query(after, active_only, min_price, max_price, in_stock, summary)
+    if skip:
+        query = query.offset(skip)
+    # One extra row tells whether there is a next page
+    products, next_token = product_page(db.execute(query.limit(limit + 1)).all(), limit, summary)
+    if next_token:
+        response.headers["X-Next-Token"] = next_token
     return products
 
 @app.post("/products", response_model=ProductResponse, status_code=201)
@@ -58,20 +98,111 @@ def create_product(
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
-    return db_product
+    
+    entry = cached_product(db_product)
+    product_cache.put(entry)
+    return product_response(entry, status_code=201)
+
+@app.post("/products:bulk", response_model=BulkUpsertResponse)
+async def bulk_upsert_products(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Defaults from the Content-Type header"),
+    db: Session = Depends(get_db)
+):
+    """
+    Create or update products by SKU from a CSV or NDJSON body.
+
+    The body is read as a stream and written in chunks; invalid rows are reported
+    in `errors` and do not stop the import.
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    return await run_in_threadpool(import_products, db, request_text(request.stream()), format)
+
+@app.post("/products:reserve", response_model=StockReservationBatchResponse)
+def reserve_products(
+    batch: StockReservationBatch,
+    db: Session = Depends(get_db)
+):
+    """
+    Reserve stock for several products in one transaction; each result carries its own status
+    """
+    results = reserve_stock(db, batch.items, batch.all_or_nothing)
+    return StockReservationBatchResponse(reserved=all(r.reserved for r in results), results=results)
+
+@app.get("/products/search", response_model=List[Union[ProductResponse, ProductSummary]])
+def search_products(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in the name or description"),
+    limit: int = Query(20, ge=1, le=100),
+    next_token: Optional[str] = None,
+    active_only: bool = False,
+    min_price: Optional[Decimal] = Query(None, ge=0),
+    max_price: Optional[Decimal] = Query(None, ge=0),
+    in_stock: bool = False,
+    projection: Literal["full", "summary"] = "full",
+    db: Session = Depends(get_db)
+):
+    """
+    Search products by name and description, best match first.
+
+    Every word of `q` must match; matches in the name rank higher. Paged like
+    GET /products, through the X-Next-Token header and `next_token`. X-Search-Truncated
+    is set when some older matches were not ranked (SQLite, see SEARCH_MAX_CANDIDATES).
+    """
+    try:
+        terms = search_terms(q)
+        after = decode_search_token(next_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/products/{product_id}", response_model=ProductResponse)
+    summary = projection == "summary"
+    dialect = db.get_bind().dialect.name
+    query = product_search_query(dialect, terms, after, active_only, min_price, max_price, in_stock, summary)
+    products, next_token = search_page(db.execute(query.limit(limit + 1)).all(), limit, summary)
+    if next_token:
+        response.headers["X-Next-Token"] = next_token
+    # SQLite ranks only the newest SEARCH_MAX_CANDIDATES matches
+    truncated = search_truncated_query(dialect, terms)
+    if truncated is not None and db.scalar(truncated):
+        response.headers["X-Search-Truncated"] = "true"
+    return products
+
+@app.get("/products/{product_id}", response_model=ProductResponse, responses={304: {"description": "Not modified"}})
 def get_product(
     product_id: str, 
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
-    Get a product by ID
+    Get a product by ID. Answers 304 when If-None-Match holds the current ETag.
     """
-    product = db.query(Product).filter(Product.product_id == product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    entry = product_cache.get(product_id)
+    if entry is None:
+        product = db.query(Product).filter(Product.product_id == product_id).first()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        entry = cached_product(product)
+        product_cache.put(entry)
+    return product_response(entry, request.headers.get("if-none-match"))
+
+@app.get("/products/by-sku/{sku}", response_model=ProductResponse, responses={304: {"description": "Not modified"}})
+def get_product_by_sku(
+    sku: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Get a product by SKU. Answers 304 when If-None-Match holds the current ETag.
+    """
+    entry = product_cache.get_by_sku(sku)
+    if entry is None:
+        product = db.query(Product).filter(Product.sku == sku).first()
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        entry = cached_product(product)
+        product_cache.put(entry)
+    return product_response(entry, request.headers.get("if-none-match"))
 
 @app.put("/products/{product_id}", response_model=ProductResponse)
 def update_product(
@@ -93,7 +224,27 @@ def update_product(
     
     db.commit()
     db.refresh(db_product)
-    return db_product
+    
+    entry = cached_product(db_product)
+    product_cache.put(entry)
+    return product_response(entry)
+
+@app.post("/products/{product_id}/reserve", response_model=StockReservationResult)
+def reserve_product(
+    product_id: str,
+    reservation: StockReservation,
+    db: Session = Depends(get_db)
+):
+    """
+    Take `quantity` units from a product's stock if enough are left
+    """
+    item = StockReservationItem(product_id=product_id, quantity=reservation.quantity)
+    (result,) = reserve_stock(db, [item])
+    if result.status == ReservationStatus.NOT_FOUND:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if result.status == ReservationStatus.INSUFFICIENT_STOCK:
+        raise HTTPException(status_code=409, detail="Not enough stock")
+    return result
 
 @app.delete("/products/{product_id}", status_code=204)
 def delete_product(
@@ -109,7 +260,34 @@ def delete_product(
     
     db.delete(db_product)
     db.commit()
+    product_cache.invalidate(product_ids=[product_id])
     return None
 
+if PRODUCTS_CACHE_STATS_ENDPOINT:
+    @app.get("/cache/stats")
+    def get_cache_stats():
+        """
+        Product cache hit/miss counters and size
+        """
+        return product_cache.stats()
+
+if PRODUCTS_DB_STATS_ENDPOINT:
+    @app.get("/db/stats")
+    def get_db_stats():
+        """
+        Connection pool checkout/wait metrics
+        """
+        return get_pool_stats()
+
 # Lambda handler
-handler = Mangum(app)
+http_handler = Mangum(app)
+
+
+def handler(event, context):
+    """
+    API Gateway requests, or {"manage": "init-db"} from a deployment to run a
+    management command where the database is reachable
+    """
+    if isinstance(event, dict) and "manage" in event:
+        return run_function_command(event["manage"])
+    return http_handler(event, context)
@@ -0,0 +1,62 @@
+"""
+Products API management commands, run outside the request path:
+
+    python -m app.manage init-db
+    python -m app.manage import-products catalog.csv [--format csv|ndjson] [--chunk-size 1000]
+    python -m app.manage rebuild-search-index
+
+init-db and rebuild-search-index also run inside the deployed function, which can reach
+the database, when it is invoked with {"manage": "<command>"}; see app.main.handler.
+"""
+import argparse
+import sys
+
+from app.bulk import BULK_CHUNK_SIZE, import_products
+from app.database import SessionLocal, engine, init_db
+from app.search import rebuild_search_index
+
+
+# Commands the Lambda runs from a {"manage": ...} invocation; they take no arguments
+FUNCTION_COMMANDS = {
+    "init-db": init_db,
+    "rebuild-search-index": lambda: rebuild_search_index(engine),
+}
+
+
+def run_function_command(command: str) -> dict:
+    """
+    Run a management command from a Lambda invocation
+    """
+    if command not in FUNCTION_COMMANDS:
+        raise ValueError(f"Unknown management command {command!r}; expected one of {', '.join(FUNCTION_COMMANDS)}")
+    FUNCTION_COMMANDS[command]()
+    return {"command": command, "status": "done"}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.manage", description="Products API management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("init-db", help="Create the products tables and indexes if they do not exist")
+    importer = commands.add_parser("import-products", help="Create or update products by SKU from a CSV or NDJSON file")
+    importer.add_argument("path", help="File to import, or - for stdin")
+    importer.add_argument("--format", choices=["csv", "ndjson"], help="Defaults from the file extension")
+    importer.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="Rows per INSERT and commit")
+    commands.add_parser("rebuild-search-index", help="Re-index every product for search (SQLite: run after VACUUM)")
+    args = parser.parse_args(argv)
+
+    if args.command == "init-db":
+        init_db()
+        print("Database schema is up to date")
+    elif args.command == "import-products":
+        format = args.format or ("csv" if args.path.endswith(".csv") else "ndjson")
+        stream = sys.stdin if args.path == "-" else open(args.path, newline="", encoding="utf-8")
+        with stream, SessionLocal() as db:
+            result = import_products(db, stream, format, args.chunk_size)
+        print(result.model_dump_json(indent=2))
+    elif args.command == "rebuild-search-index":
+        rebuild_search_index(engine)
+        print("Search index rebuilt")
+
+
+if __name__ == "__main__":
+    main()
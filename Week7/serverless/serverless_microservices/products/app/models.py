@@ -1,7 +1,15 @@
-from sqlalchemy import Column, String, Text, Numeric, Integer, Boolean, DateTime
+from sqlalchemy import Column, String, Text, Numeric, Integer, Boolean, DateTime, Index
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.sql import func
 from app.database import Base
 
+# SQLite keeps DATETIME as text; store whole seconds like MySQL DATETIME and CURRENT_TIMESTAMP
+# so timestamps written by the server default and by the app compare correctly in keyset seeks
+Timestamp = DateTime().with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
 class Product(Base):
     __tablename__ = "products"
     
@@ -12,5 +20,15 @@ class Product(Base):
     price = Column(Numeric(10, 2), nullable=False)
     stock_quantity = Column(Integer, nullable=False, default=0)
     is_active = Column(Boolean, nullable=False, default=True)
-    created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Keyset pagination order, and the same order restricted to active products
+        Index("ix_products_created_at_product_id", "created_at", "product_id"),
+        Index("ix_products_is_active_created_at_product_id", "is_active", "created_at", "product_id"),
+        # Product search on MySQL; SQLite searches the products_fts table instead (see app.search)
+        Index("ix_products_name_description_fulltext", "name", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+        # Ranks name matches above description matches; MATCH needs an index on exactly its columns
+        Index("ix_products_name_fulltext", "name", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
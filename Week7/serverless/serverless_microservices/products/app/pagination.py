@@ -0,0 +1,49 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_token(created_at, product_id):
+    """
+    Turn the (created_at, product_id) key of the last row on a page into an opaque cursor token
+    """
+    raw = json.dumps([created_at.isoformat(), product_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token):
+    """
+    Turn a cursor token back into the (created_at, product_id) key to continue after.
+    Raises ValueError if the token was not produced by encode_token.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, product_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(product_id)
+    except (ValueError, TypeError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid pagination token") from e
+
+
+def encode_search_token(score, product_id):
+    """
+    Turn the (score, product_id) key of the last search result on a page into an opaque cursor token
+    """
+    raw = json.dumps([score, product_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_search_token(token):
+    """
+    Turn a search cursor token back into the (score, product_id) key to continue after.
+    Raises ValueError if the token was not produced by encode_search_token.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        score, product_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return float(score), str(product_id)
+    except (ValueError, TypeError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid pagination token") from e
@@ -0,0 +1,78 @@
+"""
+Query builders for the Products API
+"""
+from decimal import Decimal
+from typing import Optional, Tuple
+
+from sqlalchemy import or_, select
+
+from app.models import Product
+from app.pagination import encode_token
+from app.schemas import ProductSummary
+
+# Columns loaded for projection=summary; skips the description Text
+SUMMARY_COLUMNS = tuple(getattr(Product, name) for name in ProductSummary.model_fields)
+
+
+def filter_products(
+    query,
+    active_only: bool = False,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    in_stock: bool = False
+):
+    """
+    Add the listing and search filters to a SELECT of products
+    """
+    if active_only:
+        query = query.where(Product.is_active == True)
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+    if in_stock:
+        query = query.where(Product.stock_quantity > 0)
+    return query
+
+
+def product_listing_query(
+    after: Optional[Tuple],
+    active_only: bool = False,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    in_stock: bool = False,
+    summary: bool = False
+):
+    """
+    SELECT of products in (created_at, product_id) order, starting after the `after` key.
+    Runs on a sync Session or an AsyncSession alike.
+
+    The seek condition and ordering match the (created_at, product_id) and
+    (is_active, created_at, product_id) indexes, so every page is an index range
+    read no matter how deep it is.
+    """
+    query = select(*SUMMARY_COLUMNS) if summary else select(Product)
+    query = filter_products(query, active_only, min_price, max_price, in_stock)
+    if after:
+        created_at, product_id = after
+        # The leading created_at >= bound gives MySQL and SQLite an index range start;
+        # the OR only filters rows that share the cursor's created_at
+        query = query.where(
+            Product.created_at >= created_at,
+            or_(Product.created_at > created_at, Product.product_id > product_id)
+        )
+    return query.order_by(Product.created_at, Product.product_id)
+
+
+def product_page(rows, limit: int, summary: bool):
+    """
+    Trim a result fetched with `limit + 1` rows to one page; return (products, next_token)
+    """
+    next_token = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1] if summary else rows[-1][0]
+        next_token = encode_token(last.created_at, last.product_id)
+    if summary:
+        return [ProductSummary.model_validate(row._mapping) for row in rows], next_token
+    return [row[0] for row in rows], next_token
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 from datetime import datetime
+from enum import Enum
 
 class ProductBase(BaseModel):
     sku: str = Field(..., description="Stock Keeping Unit", example="PROD-12345")
@@ -41,3 +42,52 @@ class ProductResponse(ProductBase):
 
     class Config:
         orm_mode = True
+
+class ProductSummary(BaseModel):
+    product_id: str
+    sku: str
+    name: str
+    price: Decimal
+    stock_quantity: int
+    is_active: bool
+    created_at: datetime
+
+    class Config:
+        orm_mode = True
+
+class BulkRowError(BaseModel):
+    row: int = Field(..., description="1-based record number in the uploaded file")
+    sku: Optional[str] = None
+    error: str
+
+class BulkUpsertResponse(BaseModel):
+    processed: int
+    upserted: int
+    failed: int
+    errors: List[BulkRowError]
+
+class ReservationStatus(str, Enum):
+    RESERVED = "RESERVED"
+    INSUFFICIENT_STOCK = "INSUFFICIENT_STOCK"
+    NOT_FOUND = "NOT_FOUND"
+    ROLLED_BACK = "ROLLED_BACK"
+
+class StockReservation(BaseModel):
+    quantity: int = Field(..., description="Units to take from stock", example=1, gt=0)
+
+class StockReservationItem(StockReservation):
+    product_id: str
+
+class StockReservationBatch(BaseModel):
+    items: List[StockReservationItem] = Field(..., min_length=1, max_length=100)
+    all_or_nothing: bool = Field(False, description="Reserve every item or none of them")
+
+class StockReservationResult(BaseModel):
+    product_id: str
+    quantity: int
+    status: ReservationStatus
+    reserved: bool
+
+class StockReservationBatchResponse(BaseModel):
+    reserved: bool = Field(..., description="Whether every item was reserved")
+    results: List[StockReservationResult]
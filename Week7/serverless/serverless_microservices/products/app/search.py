@@ -0,0 +1,185 @@
+"""
+Ranked full-text product search for GET /products/search.
+
+MySQL searches the FULLTEXT index on (name, description) in boolean mode and ranks by
+its relevance plus the weighted relevance from a FULLTEXT index on name alone. SQLite
+keeps an FTS5 table, products_fts, in step with products through triggers and ranks by
+bm25 with name matches weighted above description matches. Every word of the query
+must match. Pages continue from the (score, product_id) of the last result, like the
+listing cursor.
+
+bm25 is computed for every match, so on SQLite a word shared by much of the catalog
+would cost a pass over most of it. Only the SEARCH_MAX_CANDIDATES most recently added
+matches are ranked; a query matching fewer products is ranked exactly, and
+search_truncated_query tells whether older matches were left out.
+"""
+import os
+import re
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, column, func, literal_column, or_, select, table
+from sqlalchemy.dialects import mysql
+
+from app.models import Product
+from app.pagination import encode_search_token
+from app.queries import SUMMARY_COLUMNS, filter_products
+from app.schemas import ProductSummary
+
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "10000"))
+
+# Words beyond this many are ignored
+SEARCH_MAX_TERMS = 8
+
+# Weights of the name and description relevance: bm25 column weights on SQLite, and on
+# MySQL the factors of the name-only and the (name, description) MATCH
+SEARCH_NAME_WEIGHT = 10.0
+SEARCH_DESCRIPTION_WEIGHT = 1.0
+
+products_fts = table("products_fts", column("rowid"))
+
+_SQLITE_SEARCH_INDEX = [
+    "CREATE VIRTUAL TABLE products_fts USING fts5(name, description, content='products', content_rowid='rowid')",
+    """CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END""",
+    """CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+    END""",
+    """CREATE TRIGGER products_fts_update AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.rowid, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.rowid, new.name, new.description);
+    END""",
+]
+
+
+def create_search_index(engine):
+    """
+    Create the SQLite FTS5 table and its triggers, indexing existing products, if missing.
+    MySQL's FULLTEXT index is declared on the model and created with the other indexes.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as connection:
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+        ).first()
+        if exists:
+            return
+        for statement in _SQLITE_SEARCH_INDEX:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+
+
+def rebuild_search_index(engine):
+    """
+    Re-index every product. On SQLite this is needed after a VACUUM, which may renumber
+    the product rowids the FTS5 table points at.
+    """
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as connection:
+            connection.exec_driver_sql("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+    elif engine.dialect.name == "mysql":
+        with engine.begin() as connection:
+            connection.exec_driver_sql("SET SESSION innodb_optimize_fulltext_only = ON")
+            connection.exec_driver_sql("OPTIMIZE TABLE products")
+
+
+def search_terms(q: str) -> List[str]:
+    """
+    Words of a search query, lowercased; operators and punctuation are dropped.
+    Raises ValueError if there are none.
+    """
+    terms = re.findall(r"\w+", q.lower())[:SEARCH_MAX_TERMS]
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    return terms
+
+
+def _sqlite_match(terms: List[str]):
+    return literal_column("products_fts").op("MATCH")(" ".join(f'"{term}"' for term in terms))
+
+
+def _sqlite_scores(terms: List[str]):
+    """
+    (rowid, score) of the matching products_fts rows, higher score first
+    """
+    match = _sqlite_match(terms)
+    newest = (
+        select(products_fts.c.rowid)
+        .where(match)
+        .order_by(products_fts.c.rowid.desc())
+        .limit(SEARCH_MAX_CANDIDATES)
+        .subquery()
+    )
+    bm25 = func.bm25(
+        literal_column("products_fts"),
+        literal_column(repr(SEARCH_NAME_WEIGHT)),
+        literal_column(repr(SEARCH_DESCRIPTION_WEIGHT)),
+    )
+    return (
+        select(products_fts.c.rowid, (-bm25).label("score"))
+        .where(match, products_fts.c.rowid >= select(func.min(newest.c.rowid)).scalar_subquery())
+        .subquery("matches")
+    )
+
+
+def search_truncated_query(dialect: str, terms: List[str]):
+    """
+    SELECT of whether more products match every term than SEARCH_MAX_CANDIDATES, so that
+    the older ones are not ranked; None where every match is ranked (MySQL)
+    """
+    if dialect != "sqlite":
+        return None
+    candidates = select(products_fts.c.rowid).where(_sqlite_match(terms)).limit(SEARCH_MAX_CANDIDATES + 1).subquery()
+    return select(func.count() > SEARCH_MAX_CANDIDATES).select_from(candidates)
+
+
+def product_search_query(
+    dialect: str,
+    terms: List[str],
+    after: Optional[Tuple] = None,
+    active_only: bool = False,
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    in_stock: bool = False,
+    summary: bool = False
+):
+    """
+    SELECT of (product or summary columns, score) for products matching every term,
+    best match first, starting after the `after` key.
+    """
+    columns = SUMMARY_COLUMNS if summary else (Product,)
+    if dialect == "mysql":
+        match = mysql.match(Product.name, Product.description, against=" ".join(f"+{term}" for term in terms))
+        match = match.in_boolean_mode()
+        # Without operators, any of the words in the name adds to the score
+        name_match = mysql.match(Product.name, against=" ".join(terms)).in_boolean_mode()
+        score = SEARCH_NAME_WEIGHT * name_match + SEARCH_DESCRIPTION_WEIGHT * match
+        query = select(*columns, score.label("score")).where(match)
+    elif dialect == "sqlite":
+        matches = _sqlite_scores(terms)
+        score = matches.c.score
+        query = select(*columns, score).join(matches, matches.c.rowid == literal_column("products.rowid"))
+    else:
+        raise ValueError(f"Product search is not supported on {dialect}")
+
+    query = filter_products(query, active_only, min_price, max_price, in_stock)
+    if after:
+        after_score, product_id = after
+        query = query.where(or_(score < after_score, and_(score == after_score, Product.product_id > product_id)))
+    return query.order_by(score.desc(), Product.product_id)
+
+
+def search_page(rows, limit: int, summary: bool):
+    """
+    Trim a search result fetched with `limit + 1` rows to one page; return (products, next_token)
+    """
+    next_token = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_token = encode_search_token(last.score, last.product_id if summary else last[0].product_id)
+    if summary:
+        return [ProductSummary.model_validate(row._mapping) for row in rows], next_token
+    return [row[0] for row in rows], next_token
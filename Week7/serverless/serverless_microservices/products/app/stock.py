@@ -0,0 +1,103 @@
+"""
+Atomic stock reservation.
+
+Each reservation is a single conditional UPDATE that only decrements stock_quantity
+while enough stock is left, so concurrent checkouts can neither oversell nor lose
+updates, and a successful reservation costs one statement instead of a read,
+a write and a refresh.
+"""
+from typing import List
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.cache import product_cache
+from app.models import Product
+from app.schemas import ReservationStatus, StockReservationItem, StockReservationResult
+
+
+def _reserve_statement(item: StockReservationItem):
+    return (
+        update(Product)
+        .where(Product.product_id == item.product_id, Product.stock_quantity >= item.quantity)
+        .values(stock_quantity=Product.stock_quantity - item.quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _lock_order(items: List[StockReservationItem]):
+    # Lock rows in a fixed order so concurrent batches cannot deadlock
+    return sorted(range(len(items)), key=lambda i: items[i].product_id)
+
+
+def _existing_query(items, reserved):
+    """
+    SELECT of the failed items that do exist, to tell a missing product from insufficient
+    stock; None when every item was reserved
+    """
+    failed_ids = {item.product_id for item, ok in zip(items, reserved) if not ok}
+    if not failed_ids:
+        return None
+    return select(Product.product_id).where(Product.product_id.in_(failed_ids))
+
+
+def _results(items, reserved, rolled_back, existing) -> List[StockReservationResult]:
+    results = []
+    for item, ok in zip(items, reserved):
+        if ok:
+            status = ReservationStatus.ROLLED_BACK if rolled_back else ReservationStatus.RESERVED
+        elif item.product_id in existing:
+            status = ReservationStatus.INSUFFICIENT_STOCK
+        else:
+            status = ReservationStatus.NOT_FOUND
+        results.append(StockReservationResult(
+            product_id=item.product_id,
+            quantity=item.quantity,
+            status=status,
+            reserved=status == ReservationStatus.RESERVED
+        ))
+    return results
+
+
+def reserve_stock(db: Session, items: List[StockReservationItem], all_or_nothing: bool = False) -> List[StockReservationResult]:
+    """
+    Reserve stock for every item in one transaction and report each item's outcome.
+
+    With `all_or_nothing`, any failed item rolls back the others and they are
+    reported as ROLLED_BACK.
+    """
+    reserved = [False] * len(items)
+    for i in _lock_order(items):
+        reserved[i] = db.execute(_reserve_statement(items[i])).rowcount == 1
+
+    rolled_back = all_or_nothing and not all(reserved)
+    if rolled_back:
+        db.rollback()
+    else:
+        db.commit()
+        product_cache.invalidate(product_ids=[item.product_id for item, ok in zip(items, reserved) if ok])
+
+    query = _existing_query(items, reserved)
+    existing = set(db.scalars(query)) if query is not None else set()
+    return _results(items, reserved, rolled_back, existing)
+
+
+async def reserve_stock_async(db: AsyncSession, items: List[StockReservationItem], all_or_nothing: bool = False) -> List[StockReservationResult]:
+    """
+    reserve_stock on an AsyncSession, for app.async_main
+    """
+    reserved = [False] * len(items)
+    for i in _lock_order(items):
+        reserved[i] = (await db.execute(_reserve_statement(items[i]))).rowcount == 1
+
+    rolled_back = all_or_nothing and not all(reserved)
+    if rolled_back:
+        await db.rollback()
+    else:
+        await db.commit()
+        product_cache.invalidate(product_ids=[item.product_id for item, ok in zip(items, reserved) if ok])
+
+    query = _existing_query(items, reserved)
+    existing = set(await db.scalars(query)) if query is not None else set()
+    return _results(items, reserved, rolled_back, existing)
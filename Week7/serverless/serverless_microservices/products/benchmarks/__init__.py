@@ -0,0 +1 @@
+# Products API benchmarks (run from the products/ directory, e.g. python -m benchmarks.bench_pagination)
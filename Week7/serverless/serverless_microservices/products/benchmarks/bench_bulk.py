@@ -0,0 +1,66 @@
+"""
+Catalog load throughput: one create_product-style round trip per row versus the bulk upsert.
+
+    python -m benchmarks.bench_bulk [rows]
+"""
+import io
+import json
+import sys
+import time
+import uuid
+
+import benchmarks.common  # noqa: F401
+from app.bulk import import_products
+from app.database import SessionLocal, init_db
+from app.models import Product
+from app.schemas import ProductCreate
+
+PREFIX = "BULK-BENCH-"
+
+
+def catalog(rows, price):
+    return "\n".join(
+        json.dumps({"sku": f"{PREFIX}{n:07d}", "name": f"Bench product {n}", "price": price, "stock_quantity": n % 9})
+        for n in range(rows)
+    )
+
+
+def per_row(db, stream):
+    """
+    The create_product path: SELECT by SKU, INSERT, COMMIT and REFRESH for every row
+    """
+    for line in stream:
+        product = ProductCreate.model_validate_json(line)
+        if db.query(Product).filter(Product.sku == product.sku).first():
+            continue
+        db_product = Product(product_id=str(uuid.uuid4()), **product.model_dump())
+        db.add(db_product)
+        db.commit()
+        db.refresh(db_product)
+
+
+def clear(db):
+    db.query(Product).filter(Product.sku.like(f"{PREFIX}%")).delete(synchronize_session=False)
+    db.commit()
+
+
+def rate(label, rows, fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {rows / elapsed:>10,.0f} rows/s ({elapsed:.2f}s for {rows:,})")
+
+
+def main(rows=10_000):
+    init_db()
+    with SessionLocal() as db:
+        clear(db)
+        rate("per-row create (before)", rows, lambda: per_row(db, io.StringIO(catalog(rows, "1.00"))))
+        clear(db)
+        rate("bulk insert (after)", rows, lambda: import_products(db, io.StringIO(catalog(rows, "1.00")), "ndjson"))
+        rate("bulk update (after)", rows, lambda: import_products(db, io.StringIO(catalog(rows, "2.00")), "ndjson"))
+        clear(db)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
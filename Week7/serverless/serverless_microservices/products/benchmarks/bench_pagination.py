@@ -0,0 +1,42 @@
+"""
+Listing latency by page depth: OFFSET paging versus keyset (cursor) paging.
+
+    python -m benchmarks.bench_pagination [rows]
+
+Seeds `rows` products (default 1,000,000) into a SQLite file, or into the database
+named by DATABASE_URL, then fetches one 100-row page at increasing depths. Offset
+latency grows with depth; keyset latency stays flat.
+"""
+import sys
+
+from benchmarks.common import report, seed_products, timed
+from app.database import SessionLocal
+from app.queries import product_listing_query
+
+PAGE_SIZE = 100
+
+
+def main(rows=1_000_000, iterations=20):
+    seed_products(rows)
+    depths = [d for d in (0, 1_000, 10_000, 100_000, 500_000, 900_000) if d < rows]
+
+    with SessionLocal() as db:
+        for active_only in (False, True):
+            for summary in (False, True):
+                print(f"\nactive_only={active_only} projection={'summary' if summary else 'full'}")
+                listing = lambda after=None: product_listing_query(after, active_only=active_only, summary=summary)
+                for depth in depths:
+                    # Cursor of the row just before this depth, as the previous page would have returned it
+                    after = None
+                    if depth:
+                        cursor_query = product_listing_query(None, active_only=active_only, summary=True)
+                        last = db.execute(cursor_query.offset(depth - 1).limit(1)).first()
+                        if last is None:
+                            break
+                        after = (last.created_at, last.product_id)
+                    report(f"offset  depth={depth:,}", timed(lambda: db.execute(listing().offset(depth).limit(PAGE_SIZE)).all(), iterations))
+                    report(f"keyset  depth={depth:,}", timed(lambda: db.execute(listing(after).limit(PAGE_SIZE)).all(), iterations))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,89 @@
+"""
+Contention check for stock reservations: many threads buy one unit each from the same
+product, first through the old read-modify-write update path, then through reserve_stock.
+
+    python -m benchmarks.bench_reserve [threads] [attempts] [stock]
+
+Reports units sold, lost updates and oversells, and reservations per second. SQLite
+runs one writer at a time, so point DATABASE_URL at MySQL for representative throughput.
+Exits non-zero if the conditional UPDATE path loses an update or oversells.
+"""
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import report
+from app.database import SessionLocal, init_db
+from app.models import Product
+from app.schemas import StockReservationItem
+from app.stock import reserve_stock
+
+
+def read_modify_write(product_id):
+    """
+    The update_product path: load the row, set stock_quantity, commit and refresh
+    """
+    with SessionLocal() as db:
+        product = db.query(Product).filter(Product.product_id == product_id).first()
+        if product.stock_quantity < 1:
+            return False
+        product.stock_quantity = product.stock_quantity - 1
+        db.commit()
+        db.refresh(product)
+        return True
+
+
+def conditional_update(product_id):
+    with SessionLocal() as db:
+        (result,) = reserve_stock(db, [StockReservationItem(product_id=product_id, quantity=1)])
+        return result.reserved
+
+
+def race(label, reserve, threads, attempts, stock):
+    product_id = str(uuid.uuid4())
+    with SessionLocal() as db:
+        db.add(Product(product_id=product_id, sku=f"RESERVE-{product_id}", name="Contended product", price=1, stock_quantity=stock))
+        db.commit()
+
+    barrier = threading.Barrier(threads)
+    latencies = []
+
+    def worker(n):
+        if n < threads:
+            barrier.wait()
+        start = time.perf_counter()
+        ok = reserve(product_id)
+        latencies.append((time.perf_counter() - start) * 1000)
+        return ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        sold = sum(pool.map(worker, range(attempts)))
+    elapsed = time.perf_counter() - start
+
+    with SessionLocal() as db:
+        product = db.query(Product).filter(Product.product_id == product_id).one()
+        remaining = product.stock_quantity
+        db.delete(product)
+        db.commit()
+
+    lost = sold - (stock - remaining)
+    oversold = max(0, sold - stock)
+    print(f"\n{label}: sold={sold} remaining={remaining} lost_updates={lost} oversold={oversold} "
+          f"throughput={attempts / elapsed:,.0f} reservations/s")
+    report(f"{label} ({threads} threads)", latencies)
+    return lost == 0 and oversold == 0
+
+
+def main(threads=16, attempts=2000, stock=1500):
+    init_db()
+    race("read-modify-write (before)", read_modify_write, threads, attempts, stock)
+    ok = race("conditional UPDATE (after)", conditional_update, threads, attempts, stock)
+    print("OK" if ok else "conditional UPDATE lost an update or oversold")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(arg) for arg in sys.argv[1:4])))
@@ -0,0 +1,67 @@
+"""
+Search latency on a large catalog: full-text index versus a LIKE scan.
+
+    python -m benchmarks.bench_search [rows]
+
+Seeds `rows` products (default 1,000,000) into a SQLite file, or into the database
+named by DATABASE_URL, then runs queries from rare to very common words. For each it
+times the first and second page of GET /products/search's query, its truncation
+check, and a LIKE '%word%' scan collecting every match, which ranking without an
+index would need.
+"""
+import sys
+
+from sqlalchemy import and_, or_, select
+
+from benchmarks.common import DESCRIPTION_WORDS, report, seed_products, timed
+from app.database import SessionLocal
+from app.models import Product
+from app.pagination import decode_search_token
+from app.search import product_search_query, search_page, search_terms, search_truncated_query
+
+PAGE_SIZE = 20
+
+QUERIES = [
+    ("rare word", DESCRIPTION_WORDS[3000]),
+    ("uncommon word", DESCRIPTION_WORDS[100]),
+    ("name word", "kettle"),
+    ("two name words", "wireless kettle"),
+    ("three name words", "red wool scarf"),
+    ("very common word", DESCRIPTION_WORDS[0]),
+]
+
+
+def like_query(terms):
+    """
+    Every product containing all terms; a LIKE filter must find them all before it can rank any
+    """
+    return select(Product.product_id).where(
+        and_(*(or_(Product.name.like(f"%{term}%"), Product.description.like(f"%{term}%")) for term in terms))
+    )
+
+
+def main(rows=1_000_000, iterations=20):
+    seed_products(rows)
+    with SessionLocal() as db:
+        dialect = db.get_bind().dialect.name
+        for label, q in QUERIES:
+            terms = search_terms(q)
+            first_page = lambda: search_page(
+                db.execute(product_search_query(dialect, terms).limit(PAGE_SIZE + 1)).all(), PAGE_SIZE, False
+            )
+            _, token = first_page()
+            print(f"\n{label}: {q!r}")
+            report("search  page 1", timed(first_page, iterations))
+            if token:
+                after = decode_search_token(token)
+                report("search  page 2", timed(
+                    lambda: db.execute(product_search_query(dialect, terms, after).limit(PAGE_SIZE + 1)).all(), iterations
+                ))
+            truncated = search_truncated_query(dialect, terms)
+            if truncated is not None:
+                report(f"truncated={db.scalar(truncated)!s:<5} check", timed(lambda: db.scalar(truncated), iterations))
+            report("LIKE    all matches", timed(lambda: db.execute(like_query(terms)).all(), max(1, iterations // 10)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,101 @@
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# Benchmarks run against a SQLite file unless DATABASE_URL points at MySQL
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'products_bench.db')}")
+os.environ.setdefault("DB_ENGINE_PROFILE", "container")
+
+from sqlalchemy import func, insert
+
+from app.database import Base, SessionLocal, engine, init_db
+from app.models import Product
+
+
+ADJECTIVES = ["red", "blue", "green", "black", "white", "vintage", "compact", "deluxe", "organic", "wireless",
+              "waterproof", "classic", "premium", "portable", "ergonomic", "slim", "heavy", "smart", "foldable", "rugged"]
+MATERIALS = ["cotton", "wool", "leather", "steel", "bamboo", "ceramic", "glass", "oak", "silicone", "linen",
+             "copper", "denim", "carbon", "marble", "nylon"]
+NOUNS = ["shirt", "scarf", "lamp", "kettle", "backpack", "chair", "headphones", "mug", "watch", "sneakers",
+         "blender", "tent", "jacket", "speaker", "desk", "pillow", "wallet", "bottle", "keyboard", "umbrella",
+         "blanket", "skillet", "drone", "camera", "router", "stroller", "helmet", "vase", "rug", "clock"]
+
+# Description words follow a Zipf distribution, like real text: a few are very common, most are rare
+_SYLLABLES = ["ka", "lo", "mi", "ra", "te", "su", "ven", "dor", "pli", "qua", "xel", "bri", "on", "tam", "fe"]
+DESCRIPTION_WORDS = ["".join(parts) for parts in itertools.product(_SYLLABLES, repeat=3)]
+_WORD_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(DESCRIPTION_WORDS) + 1)))
+
+
+def product_name(n):
+    return f"{ADJECTIVES[n % 20]} {MATERIALS[n // 20 % 15]} {NOUNS[n // 300 % 30]} {n}"
+
+
+def seed_products(count, chunk_size=50_000):
+    """
+    Fill the products table with `count` rows, reusing an existing table of that size.
+    Ten rows share each created_at second, so keyset seeks have ties to break on product_id.
+    """
+    init_db()
+    with SessionLocal() as db:
+        existing = db.query(func.count(Product.product_id)).scalar()
+        last_name = db.query(Product.name).filter(Product.sku == f"SKU-{count - 1:08d}").scalar()
+        if existing == count and (count == 0 or last_name == product_name(count - 1)):
+            return
+    # Recreate the tables rather than delete row by row through the search index triggers
+    Base.metadata.drop_all(bind=engine)
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as connection:
+            connection.exec_driver_sql("DROP TABLE IF EXISTS products_fts")
+    init_db()
+    with SessionLocal() as db:
+        start = datetime(2024, 1, 1)
+        words = random.Random(count)
+        for offset in range(0, count, chunk_size):
+            rows = [
+                {
+                    "product_id": str(uuid.uuid4()),
+                    "sku": f"SKU-{n:08d}",
+                    "name": product_name(n),
+                    "description": " ".join(words.choices(DESCRIPTION_WORDS, cum_weights=_WORD_WEIGHTS, k=24)),
+                    "price": Decimal(n % 50_000) / 100,
+                    "stock_quantity": n % 7,
+                    "is_active": n % 4 != 0,
+                    "created_at": start + timedelta(seconds=n // 10),
+                    "updated_at": start + timedelta(seconds=n // 10),
+                }
+                for n in range(offset, min(offset + chunk_size, count))
+            ]
+            db.execute(insert(Product), rows)
+            db.commit()
+            print(f"seeded {offset + len(rows):,}/{count:,} products", end="\r", flush=True)
+        print()
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            connection.exec_driver_sql("ANALYZE")
+
+
+def timed(fn, iterations):
+    """
+    Call fn repeatedly and return per-call latencies in milliseconds
+    """
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(
+        f"{label:<32} n={len(samples):<6} mean={statistics.mean(samples):8.3f}ms "
+        f"p50={statistics.median(samples):8.3f}ms p99={p99:8.3f}ms"
+    )
@@ -0,0 +1,98 @@
+"""
+Load test comparing the sync (app.main) and async (app.async_main) Products services.
+
+Each service runs under uvicorn in its own process and a fixed number of concurrent
+clients issue GET /products/{product_id} for a set duration. The product cache is
+turned off in the services so every request reaches the database.
+
+    python -m benchmarks.load_async [concurrency] [seconds]
+
+By default both services share a SQLite file, which serializes access and runs
+aiosqlite on a helper thread, so the gap it shows is small. For representative
+numbers point DATABASE_URL at MySQL (with aiomysql installed).
+"""
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.common import seed_products
+from app.database import SessionLocal
+from app.models import Product
+
+SERVICES = [("sync", "app.main:app"), ("async", "app.async_main:app")]
+SEED_PRODUCTS = 10_000
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_service(target):
+    port = free_port()
+    env = {**os.environ, "PRODUCTS_CACHE_MAX_ITEMS": "0"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{base_url}/docs")
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{target} did not start")
+
+
+async def load(base_url, product_ids, concurrency, seconds):
+    latencies, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker(client):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get(f"/products/{random.choice(product_ids)}")
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += response.status_code != 200
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def main(concurrency=200, seconds=10):
+    seed_products(SEED_PRODUCTS)
+    with SessionLocal() as db:
+        product_ids = [product_id for (product_id,) in db.query(Product.product_id).limit(1000)]
+    for label, target in SERVICES:
+        process, base_url = start_service(target)
+        try:
+            latencies, errors = asyncio.run(load(base_url, product_ids, concurrency, seconds))
+        finally:
+            process.terminate()
+            process.wait()
+        latencies.sort()
+        print(
+            f"{label:<6} c={concurrency:<4} rps={len(latencies) / seconds:8.1f} "
+            f"p50={statistics.median(latencies):8.2f}ms "
+            f"p99={latencies[int(len(latencies) * 0.99) - 1]:8.2f}ms errors={errors}"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    )
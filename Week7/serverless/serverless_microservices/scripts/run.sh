@@ -9,6 +9,7 @@ DB_HOST=$(terraform output -raw rds_endpoint 2>/dev/null)
 DB_PORT=$(terraform output -raw rds_port 2>/dev/null || echo "3306")
 DB_NAME=$(terraform output -raw rds_database_name 2>/dev/null || echo "products")
 DB_USER=$(terraform output -raw rds_username 2>/dev/null || echo "admin")
+PRODUCTS_FUNCTION=$(terraform output -raw products_lambda_function_name 2>/dev/null || echo "products-service")
 
 # Get DynamoDB table name from Terraform output
 DYNAMODB_TABLE=$(terraform output -raw dynamodb_table_name 2>/dev/null || echo "serverless-ecommerce-dev-orders")
@@ -40,6 +41,19 @@ npm install
 echo "Populating DynamoDB table: $DYNAMODB_TABLE"
 node populate_dynamodb.js
 
+# The Products API no longer creates its tables on startup; the function creates them
+# from inside the VPC before populate_rds.js inserts into them
+echo "Creating Products tables with $PRODUCTS_FUNCTION"
+FUNCTION_ERROR=$(aws lambda invoke --function-name "$PRODUCTS_FUNCTION" \
+  --cli-binary-format raw-in-base64-out --payload '{"manage": "init-db"}' \
+  --query FunctionError --output text init-db-response.json)
+cat init-db-response.json; echo ""
+rm -f init-db-response.json
+if [ "$FUNCTION_ERROR" != "None" ]; then
+  echo "init-db failed: $FUNCTION_ERROR"
+  exit 1
+fi
+
 echo "Populating RDS database at: $DB_HOST"
 node populate_rds.js
 
@@ -47,7 +47,10 @@ module "orders_lambda" {
   subnet_ids     = module.vpc.private_subnet_ids
   security_group_ids = [module.vpc.lambda_security_group_id]
   environment_variables = {
-    DYNAMODB_TABLE = module.dynamodb.orders_table_name
+    DYNAMODB_TABLE             = module.dynamodb.orders_table_name
+    DYNAMODB_IDEMPOTENCY_TABLE = module.dynamodb.idempotency_table_name
+    DYNAMODB_CUSTOMER_INDEX    = module.dynamodb.customer_index_name
+    DYNAMODB_STATUS_INDEX      = module.dynamodb.status_index_name
   }
 }
 
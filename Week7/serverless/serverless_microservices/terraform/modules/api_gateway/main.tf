@@ -144,6 +144,58 @@ resource "aws_api_gateway_integration" "orders_integration" {
   uri                     = var.orders_lambda_invoke_arn
 }
 
+# /orders:batch and /orders:batchGet
+resource "aws_api_gateway_resource" "orders_batch" {
+  for_each    = toset(["orders:batch", "orders:batchGet"])
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  parent_id   = aws_api_gateway_rest_api.api.root_resource_id
+  path_part   = each.value
+}
+
+resource "aws_api_gateway_method" "orders_batch_post" {
+  for_each      = aws_api_gateway_resource.orders_batch
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = each.value.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "orders_batch_integration" {
+  for_each                = aws_api_gateway_resource.orders_batch
+  rest_api_id             = aws_api_gateway_rest_api.api.id
+  resource_id             = each.value.id
+  http_method             = aws_api_gateway_method.orders_batch_post[each.key].http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = var.orders_lambda_invoke_arn
+}
+
+# /products:bulk and /products:reserve
+resource "aws_api_gateway_resource" "products_bulk" {
+  for_each    = toset(["products:bulk", "products:reserve"])
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  parent_id   = aws_api_gateway_rest_api.api.root_resource_id
+  path_part   = each.value
+}
+
+resource "aws_api_gateway_method" "products_bulk_post" {
+  for_each      = aws_api_gateway_resource.products_bulk
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = each.value.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "products_bulk_integration" {
+  for_each                = aws_api_gateway_resource.products_bulk
+  rest_api_id             = aws_api_gateway_rest_api.api.id
+  resource_id             = each.value.id
+  http_method             = aws_api_gateway_method.products_bulk_post[each.key].http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = var.products_lambda_invoke_arn
+}
+
 # ORDERS OPTIONS
 resource "aws_api_gateway_method" "orders_options" {
   rest_api_id   = aws_api_gateway_rest_api.api.id
@@ -215,7 +267,9 @@ resource "aws_api_gateway_deployment" "api" {
     aws_api_gateway_integration.orders_integration,
     aws_api_gateway_integration.orders_root_integration,
     aws_api_gateway_integration.products_options_integration,
-    aws_api_gateway_integration.orders_options_integration
+    aws_api_gateway_integration.orders_options_integration,
+    aws_api_gateway_integration.orders_batch_integration,
+    aws_api_gateway_integration.products_bulk_integration
   ]
   triggers = {
     redeployment = sha1(jsonencode([
@@ -227,6 +281,10 @@ resource "aws_api_gateway_deployment" "api" {
       aws_api_gateway_resource.orders_proxy.id,
       aws_api_gateway_method.orders_root_any.id,
       aws_api_gateway_integration.orders_root_integration.id,
+      [for r in aws_api_gateway_resource.orders_batch : r.id],
+      [for i in aws_api_gateway_integration.orders_batch_integration : i.id],
+      [for r in aws_api_gateway_resource.products_bulk : r.id],
+      [for i in aws_api_gateway_integration.products_bulk_integration : i.id],
     ]))
   }
   lifecycle {
@@ -1,3 +1,8 @@
+locals {
+  customer_index_name = "customer_id-order_date-index"
+  status_index_name   = "open_status-order_date-index"
+}
+
 resource "aws_dynamodb_table" "orders" {
   name           = "${var.project_name}-${var.environment}-orders"
   billing_mode   = "PAY_PER_REQUEST"
@@ -14,8 +19,56 @@ resource "aws_dynamodb_table" "orders" {
     type = "S"
   }
   
+  attribute {
+    name = "order_date"
+    type = "S"
+  }
+  
+  attribute {
+    name = "open_status"
+    type = "S"
+  }
+  
+  # Customer order history, newest first
+  global_secondary_index {
+    name            = local.customer_index_name
+    hash_key        = "customer_id"
+    range_key       = "order_date"
+    projection_type = "ALL"
+  }
+  
+  # Sparse index of open orders by status and date; closed orders drop open_status
+  global_secondary_index {
+    name            = local.status_index_name
+    hash_key        = "open_status"
+    range_key       = "order_date"
+    projection_type = "ALL"
+  }
+  
   tags = {
     Name        = "${var.project_name}-orders-table"
     Environment = var.environment
   }
 }
+
+# Idempotency-Key records for order creation, deleted by TTL once expired
+resource "aws_dynamodb_table" "orders_idempotency" {
+  name         = "${var.project_name}-${var.environment}-orders-idempotency"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "idempotency_key"
+  
+  attribute {
+    name = "idempotency_key"
+    type = "S"
+  }
+  
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+  
+  tags = {
+    Name        = "${var.project_name}-orders-idempotency-table"
+    Environment = var.environment
+  }
+}
@@ -7,3 +7,18 @@ output "orders_table_arn" {
   description = "ARN of the DynamoDB table for orders"
   value       = aws_dynamodb_table.orders.arn
 }
+
+output "idempotency_table_name" {
+  description = "Name of the DynamoDB table for order idempotency records"
+  value       = aws_dynamodb_table.orders_idempotency.name
+}
+
+output "customer_index_name" {
+  description = "Name of the customer_id/order_date GSI"
+  value       = local.customer_index_name
+}
+
+output "status_index_name" {
+  description = "Name of the sparse open_status/order_date GSI"
+  value       = local.status_index_name
+}
@@ -28,6 +28,11 @@ output "orders_ecr_repository_url" {
   value       = module.ecr.orders_repository_url
 }
 
+output "products_lambda_function_name" {
+  description = "Name of the Products Lambda function"
+  value       = module.products_lambda.lambda_function_name
+}
+
 output "rds_endpoint" {
   description = "Endpoint of the RDS instance"
   value       = module.rds.db_host